@@ -0,0 +1,281 @@
+"""Supervisor for the Chromium processes launched by the scraper.
+
+Samples RSS and CPU of the Chromium process trees launched by this process
+from /proc, kills renderers and browsers that exceed their memory budgets,
+reaps orphaned or overdue browsers (e.g. ones left behind by an abandoned
+scrape) and keeps the numbers around for the /metrics endpoint. Browsers are
+recognized by an owner switch on their command line (``owner_arg``), so
+other services' browsers and other workers' scrapes are left alone.
+"""
+import logging
+import os
+import signal
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PROC = '/proc'
+# Playwright always drives Chromium over a pipe
+PLAYWRIGHT_MARKER = '--remote-debugging-pipe'
+# Launch switch (ignored by Chromium) naming the scraper instance and process that started a browser,
+# so the watchdog never touches other services' browsers or another worker's in-flight scrapes
+OWNER_FLAG = '--fb-reel-scraper-owner'
+
+
+def instance_name():
+    """Name shared by all processes of one deployment (SCRAPER_INSTANCE)"""
+    return os.getenv('SCRAPER_INSTANCE', 'default')
+
+
+def owner_arg():
+    """Chromium launch argument that marks a browser as started by this process"""
+    return f"{OWNER_FLAG}={instance_name()}.{os.getpid()}"
+
+
+def _owner(args):
+    """(instance, pid) from a browser's owner switch, or None for browsers we did not launch"""
+    prefix = OWNER_FLAG + '='
+    for arg in args:
+        if arg.startswith(prefix):
+            instance, _, pid = arg[len(prefix):].rpartition('.')
+            return (instance, int(pid)) if pid.isdigit() else None
+    return None
+
+
+def _read(path, mode='r'):
+    try:
+        with open(path, mode) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class ChromiumWatchdog:
+    """Watch Chromium process trees and enforce per-context and per-browser memory budgets"""
+
+    def __init__(self, browser_budget_mb=1536, context_budget_mb=768, max_browser_age=300,
+                 interval=15, instance=None):
+        self.browser_budget = browser_budget_mb * 1024 * 1024
+        # Each browser context renders in its own renderer process(es), so the context budget applies per renderer
+        self.context_budget = context_budget_mb * 1024 * 1024
+        # Longer than any scrape timeout; older browsers belong to abandoned scrapes
+        self.max_browser_age = max_browser_age
+        self.interval = interval
+        self.instance = instance or instance_name()
+        self.enabled = os.path.isdir(PROC)
+
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+        self._clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self._boot_time = self._read_boot_time()
+        self._cpu_prev = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._metrics = {
+            'browsers': 0,
+            'renderers': 0,
+            'rss_bytes': 0,
+            'cpu_percent': 0.0,
+            'max_browser_rss_bytes': 0,
+            'browsers_killed': 0,
+            'renderers_killed': 0,
+            'orphans_reaped': 0,
+            'last_sample': None,
+            'trees': [],
+        }
+
+        if not self.enabled:
+            logger.warning("Chromium watchdog disabled: /proc is not available on this platform")
+
+    def _read_boot_time(self):
+        stat = _read(os.path.join(PROC, 'stat')) or ''
+        for line in stat.splitlines():
+            if line.startswith('btime '):
+                return int(line.split()[1])
+        return 0
+
+    def _process(self, pid):
+        """Read the stats of one process, or None if it is gone"""
+        stat = _read(os.path.join(PROC, str(pid), 'stat'))
+        cmdline = _read(os.path.join(PROC, str(pid), 'cmdline'), 'rb')
+        if not stat or not cmdline:
+            return None
+        # The command name may contain spaces, so split after its closing parenthesis
+        fields = stat[stat.rfind(')') + 2:].split()
+        statm = (_read(os.path.join(PROC, str(pid), 'statm')) or '0 0').split()
+        args = cmdline.decode(errors='replace').split('\x00')
+        return {
+            'pid': pid,
+            'ppid': int(fields[1]),
+            'cpu_ticks': int(fields[11]) + int(fields[12]),
+            'started': self._boot_time + int(fields[19]) / self._clock_ticks,
+            'rss': int(statm[1]) * self._page_size,
+            'args': args,
+        }
+
+    def _scan(self, owned_by=None):
+        """Group Chromium processes launched by this instance into trees keyed by browser pid
+
+        With ``owned_by`` (a pid), only browsers launched by that process are included.
+        """
+        processes = {}
+        for name in os.listdir(PROC):
+            if not name.isdigit():
+                continue
+            proc = self._process(int(name))
+            if proc and 'chrom' in os.path.basename(proc['args'][0]).lower():
+                processes[proc['pid']] = proc
+
+        trees = {}
+        for proc in processes.values():
+            if not any(arg.startswith('--type=') for arg in proc['args']):
+                owner = _owner(proc['args'])
+                if PLAYWRIGHT_MARKER not in proc['args'] or owner is None or owner[0] != self.instance:
+                    continue
+                if owned_by is None or owner[1] == owned_by:
+                    trees[proc['pid']] = {'browser': proc, 'children': [], 'owner_pid': owner[1]}
+
+        for proc in processes.values():
+            parent = proc['ppid']
+            # Walk up to the browser process (renderers may sit under a zygote)
+            while parent in processes and parent not in trees:
+                parent = processes[parent]['ppid']
+            if parent in trees and proc['pid'] != parent:
+                trees[parent]['children'].append(proc)
+        return trees
+
+    def _cpu_percent(self, proc, now):
+        prev = self._cpu_prev.get(proc['pid'])
+        self._cpu_prev[proc['pid']] = (proc['cpu_ticks'], now)
+        if not prev or now <= prev[1]:
+            return 0.0
+        return 100.0 * (proc['cpu_ticks'] - prev[0]) / self._clock_ticks / (now - prev[1])
+
+    def _kill(self, pids):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    def _kill_tree(self, tree):
+        self._kill([tree['browser']['pid']] + [c['pid'] for c in tree['children']])
+
+    def reap_orphans(self):
+        """Kill this instance's browser trees whose driver has gone away; returns the number reaped"""
+        if not self.enabled:
+            return 0
+        reaped = 0
+        for pid, tree in self._scan().items():
+            # A browser whose Playwright driver exited is re-parented (to init or a subreaper)
+            parent = self._process(tree['browser']['ppid'])
+            driver_gone = tree['browser']['ppid'] == 1 or parent is None or 'node' not in os.path.basename(parent['args'][0])
+            # Also require the launching worker to be gone, unless it is this process
+            if driver_gone and (tree['owner_pid'] == os.getpid() or not os.path.exists(os.path.join(PROC, str(tree['owner_pid'])))):
+                logger.warning("Reaping orphaned Chromium browser (pid %d)", pid)
+                self._kill_tree(tree)
+                reaped += 1
+        with self._lock:
+            self._metrics['orphans_reaped'] += reaped
+        return reaped
+
+    def sample(self):
+        """Sample all trees, enforce budgets and refresh metrics; returns the metrics snapshot"""
+        if not self.enabled:
+            return self.metrics()
+
+        now = time.time()
+        # Budgets and age limits only apply to this process's browsers; other workers watch their own
+        trees = self._scan(owned_by=os.getpid())
+        summaries = []
+        killed_browsers = killed_renderers = 0
+        total_rss = total_cpu = 0.0
+        renderer_count = 0
+
+        for pid, tree in trees.items():
+            procs = [tree['browser']] + tree['children']
+            cpu = sum(self._cpu_percent(p, now) for p in procs)
+            rss = sum(p['rss'] for p in procs)
+            age = now - tree['browser']['started']
+            renderers = [c for c in tree['children'] if '--type=renderer' in c['args']]
+            renderer_count += len(renderers)
+
+            if age > self.max_browser_age:
+                logger.warning("Killing Chromium browser %d: running for %.0fs (limit %ds)", pid, age, self.max_browser_age)
+                self._kill_tree(tree)
+                killed_browsers += 1
+                continue
+            if rss > self.browser_budget:
+                logger.warning("Killing Chromium browser %d: %.0f MB over browser budget of %.0f MB",
+                               pid, rss / 1048576, self.browser_budget / 1048576)
+                self._kill_tree(tree)
+                killed_browsers += 1
+                continue
+            for renderer in renderers:
+                if renderer['rss'] > self.context_budget:
+                    # The page crashes and its scrape fails fast; the next scrape gets a fresh context
+                    logger.warning("Killing Chromium renderer %d of browser %d: %.0f MB over context budget of %.0f MB",
+                                   renderer['pid'], pid, renderer['rss'] / 1048576, self.context_budget / 1048576)
+                    self._kill([renderer['pid']])
+                    killed_renderers += 1
+                    rss -= renderer['rss']
+
+            total_rss += rss
+            total_cpu += cpu
+            summaries.append({
+                'pid': pid,
+                'processes': len(procs),
+                'rss_bytes': int(rss),
+                'cpu_percent': round(cpu, 1),
+                'age_seconds': round(age, 1),
+            })
+
+        # Forget CPU baselines of processes that are gone
+        live = {p['pid'] for t in trees.values() for p in [t['browser']] + t['children']}
+        for pid in list(self._cpu_prev):
+            if pid not in live:
+                del self._cpu_prev[pid]
+
+        with self._lock:
+            self._metrics.update({
+                'browsers': len(summaries),
+                'renderers': renderer_count,
+                'rss_bytes': int(total_rss),
+                'cpu_percent': round(total_cpu, 1),
+                'max_browser_rss_bytes': max((t['rss_bytes'] for t in summaries), default=0),
+                'last_sample': now,
+                'trees': summaries,
+            })
+            self._metrics['browsers_killed'] += killed_browsers
+            self._metrics['renderers_killed'] += killed_renderers
+        return self.metrics()
+
+    def metrics(self):
+        """Copy of the latest metrics"""
+        with self._lock:
+            return dict(self._metrics, trees=list(self._metrics['trees']), enabled=self.enabled)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.reap_orphans()
+                self.sample()
+            except Exception as e:
+                logger.error("Chromium watchdog sample failed: %s", e)
+
+    def start(self):
+        """Reap leftovers from earlier runs, then sample on a background timer"""
+        if not self.enabled or self._thread:
+            return
+        reaped = self.reap_orphans()
+        if reaped:
+            logger.info("Reaped %d orphaned Chromium browsers at startup", reaped)
+        self._thread = threading.Thread(target=self._run, name='chromium-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
@@ -0,0 +1,155 @@
+"""Incremental comment harvesting for reel pages.
+
+Comments are read in rounds: each round collects only the comment nodes that
+appeared since the previous one (collected nodes are removed from the page),
+then expands/scrolls for more. Comments are
+yielded as they are found, deduplicated by comment ID in a bounded set, and
+harvesting stops at a caller-given limit or time budget.
+"""
+import collections
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Text of the buttons that load more comments or replies
+EXPAND_BUTTON_RE = r'/^(view|see) (more|previous) (comments|replies)|^view all \d+ repl|^\d+ repl(y|ies)/i'
+
+# Returns comment nodes not seen by an earlier round. Collected nodes are removed from the page, so
+# every round only queries new nodes and a long thread does not keep growing the DOM; nodes that
+# still hold replies or "view more" buttons are only marked, so they can be expanded later.
+COLLECT_COMMENTS_JS = '''() => {
+    const expandRe = %s;
+    const out = [];
+    for (const node of document.querySelectorAll('div[role="article"]:not([data-harvested])')) {
+        const label = node.getAttribute('aria-label') || '';
+        if (!/comment|repl/i.test(label)) continue;
+        node.dataset.harvested = '1';
+
+        let id = null;
+        let date = null;
+        for (const a of node.querySelectorAll('a[href*="comment_id="]')) {
+            const match = a.href.match(/[?&]reply_comment_id=(\\d+)/) || a.href.match(/[?&]comment_id=(\\d+)/);
+            if (match) {
+                id = match[1];
+                date = a.textContent.trim() || null;
+                break;
+            }
+        }
+        const authorEl = node.querySelector('a[role="link"]');
+        const textEl = node.querySelector('div[dir="auto"]');
+        out.push({
+            id: id,
+            author: authorEl ? authorEl.textContent.trim() : '',
+            author_url: authorEl ? authorEl.href : null,
+            text: textEl ? textEl.textContent.trim() : '',
+            date: date,
+            is_reply: /repl/i.test(label)
+        });
+
+        const holdsMore = node.querySelector('div[role="article"]') ||
+            Array.from(node.querySelectorAll('div[role="button"], span[role="button"]'))
+                .some(el => expandRe.test((el.textContent || '').trim()));
+        if (!holdsMore) node.remove();
+    }
+    return out;
+}''' % EXPAND_BUTTON_RE
+
+# Clicks a few "view more comments/replies" buttons and scrolls; returns how many buttons were clicked
+EXPAND_COMMENTS_JS = '''() => {
+    const expandRe = %s;
+    let clicked = 0;
+    for (const el of document.querySelectorAll('div[role="button"], span[role="button"]')) {
+        const text = (el.textContent || '').trim();
+        if (expandRe.test(text)) {
+            el.click();
+            if (++clicked >= 3) break;
+        }
+    }
+    const articles = document.querySelectorAll('div[role="article"]');
+    if (articles.length) {
+        articles[articles.length - 1].scrollIntoView({block: 'end'});
+    }
+    window.scrollBy(0, window.innerHeight);
+    return clicked;
+}''' % EXPAND_BUTTON_RE
+
+
+class BoundedIdSet:
+    """Set of the most recently seen IDs, evicting the oldest beyond max_size"""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._ids = collections.OrderedDict()
+
+    def add(self, item_id):
+        """Add an ID; returns False if it was already present"""
+        if item_id in self._ids:
+            self._ids.move_to_end(item_id)
+            return False
+        self._ids[item_id] = None
+        if len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+        return True
+
+    def __len__(self):
+        return len(self._ids)
+
+
+class CommentHarvester:
+    """Stream comments from an open reel page"""
+
+    def __init__(self, page, max_seen=10000, round_wait_ms=800, idle_rounds=4):
+        self.page = page
+        self.seen = BoundedIdSet(max_seen)
+        self.round_wait_ms = round_wait_ms
+        # Stop after this many rounds in a row that found nothing new and had nothing to expand
+        self.idle_rounds = idle_rounds
+
+    @staticmethod
+    def comment_key(comment):
+        """Comment ID, or a content hash for comments rendered without a permalink"""
+        if comment.get('id'):
+            return comment['id']
+        digest = hashlib.sha1(f"{comment.get('author')}\x00{comment.get('text')}".encode('utf-8')).hexdigest()
+        return f"h:{digest[:16]}"
+
+    def harvest(self, limit=None, time_budget=None):
+        """Yield comment dicts until ``limit`` comments, ``time_budget`` seconds, or no more comments"""
+        deadline = time.monotonic() + time_budget if time_budget else None
+        yielded = 0
+        idle = 0
+
+        while True:
+            try:
+                batch = self.page.evaluate(COLLECT_COMMENTS_JS)
+            except Exception as e:
+                logger.warning("Comment collection failed: %s", e)
+                return
+
+            new = 0
+            for comment in batch:
+                if not self.seen.add(self.comment_key(comment)):
+                    continue
+                new += 1
+                yield comment
+                yielded += 1
+                if limit is not None and yielded >= limit:
+                    return
+
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.info("Comment time budget spent after %d comments", yielded)
+                return
+
+            try:
+                clicked = self.page.evaluate(EXPAND_COMMENTS_JS)
+            except Exception as e:
+                logger.warning("Comment expansion failed: %s", e)
+                return
+
+            idle = 0 if (new or clicked) else idle + 1
+            if idle >= self.idle_rounds:
+                logger.info("No more comments after %d", yielded)
+                return
+            self.page.wait_for_timeout(self.round_wait_ms)
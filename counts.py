@@ -0,0 +1,276 @@
+"""Locale-aware normalizer for compact engagement counts ("1,2 K", "3.4 mil", "2 tsd.", "1.2B", "3万").
+
+The suffix table drives both the Python normalizer and the JavaScript
+version that is injected into page.evaluate scripts, so counts parse the
+same way in the page and in post-processing.
+
+Run ``python counts.py`` to check the fixtures (in Python, and in JavaScript
+when node is installed) and benchmark the batch API.
+"""
+import functools
+import json
+import math
+import re
+import shutil
+import subprocess
+
+# Compact-number suffixes (lowercase, without trailing dot) -> multiplier
+SUFFIXES = {
+    # thousand
+    'k': 10 ** 3,
+    'tsd': 10 ** 3,       # de
+    'mil': 10 ** 3,       # es, pt
+    'mille': 10 ** 3,     # fr
+    'mila': 10 ** 3,      # it
+    'tys': 10 ** 3,       # pl
+    'rb': 10 ** 3,        # id
+    'ribu': 10 ** 3,      # id
+    'тыс': 10 ** 3,       # ru
+    '천': 10 ** 3,        # ko
+    # ten thousand / hundred million (CJK)
+    '万': 10 ** 4,
+    '萬': 10 ** 4,
+    '만': 10 ** 4,
+    '亿': 10 ** 8,
+    '億': 10 ** 8,
+    '억': 10 ** 8,
+    # million
+    'm': 10 ** 6,
+    'mio': 10 ** 6,       # de
+    'mln': 10 ** 6,       # pl, nl, it
+    'mn': 10 ** 6,
+    'mi': 10 ** 6,        # pt
+    'jt': 10 ** 6,        # id
+    'млн': 10 ** 6,       # ru
+    # billion
+    'b': 10 ** 9,
+    'bn': 10 ** 9,
+    'mrd': 10 ** 9,       # de, nl
+    'md': 10 ** 9,        # fr
+    'mld': 10 ** 9,       # pl, it
+    'bi': 10 ** 9,        # pt
+    'млрд': 10 ** 9,      # ru
+}
+
+# Digits, optionally grouped by spaces/apostrophes/dots/commas, then an optional word suffix (with
+# optional dot). The suffix is captured generically and looked up in SUFFIXES, which is much cheaper
+# than a regex alternation over every suffix.
+# ASCII digits only: Python's \d also matches other scripts' digits, which the page's \d does not.
+_NUMBER = r"([0-9]+(?:[ \u00a0\u202f'.,][0-9]+)*)"
+PATTERN = _NUMBER + r"\s*([^\W\d_]+)?\.?$"
+# Non-strict variant: the count may be followed by other words ("1.2K views")
+LOOSE_PATTERN = _NUMBER + r"(?:\s*([^\W\d_]+)\.?)?"
+# Same grammar for the page; JavaScript needs \p{L} (with the u flag) to match non-ASCII letters
+JS_PATTERN = "^" + _NUMBER + r"\s*(\p{L}+)?\.?$"
+
+_STRICT_RE = re.compile(PATTERN)
+_LOOSE_RE = re.compile(LOOSE_PATTERN)
+_GROUPING = str.maketrans('', '', " \u00a0\u202f'")
+
+
+def _to_number(digits, suffix):
+    if suffix:
+        multiplier = SUFFIXES.get(suffix.lower())
+        if multiplier is None:
+            return None
+    digits = digits.translate(_GROUPING)
+    if ',' in digits and '.' in digits:
+        # Whichever separator comes last is the decimal mark
+        decimal = ',' if digits.rfind(',') > digits.rfind('.') else '.'
+        digits = digits.replace('.' if decimal == ',' else ',', '').replace(decimal, '.')
+    elif ',' in digits or '.' in digits:
+        sep = ',' if ',' in digits else '.'
+        parts = digits.split(sep)
+        # "1.234.567" and a bare "1,234" group thousands; "1,2 K" and "3.4" are decimals
+        if len(parts) > 2 or (len(parts[1]) == 3 and not suffix):
+            digits = ''.join(parts)
+        else:
+            digits = parts[0] + '.' + parts[1]
+    value = float(digits) if '.' in digits else int(digits)
+    if suffix:
+        value *= multiplier
+    # Round half up, like Math.round in the page
+    return int(math.floor(value + 0.5))
+
+
+def normalize_count(text, strict=True):
+    """Parse a localized compact count to an int, or None if the text is not a count.
+
+    With ``strict`` the whole text must be a count (as when scanning spans);
+    otherwise the first count in the text is used ("1.2K views").
+    """
+    if not text:
+        return None
+    return _normalize_cached(text, strict)
+
+
+@functools.lru_cache(maxsize=8192)
+def _normalize_cached(text, strict):
+    text = text.strip()
+    if strict:
+        match = _STRICT_RE.match(text)
+        return _to_number(match.group(1), match.group(2)) if match else None
+    # First count in the text; a word after it that is not a known suffix is ignored ("15 comments" -> 15)
+    match = _LOOSE_RE.search(text)
+    if not match:
+        return None
+    value = _to_number(match.group(1), match.group(2))
+    return value if value is not None else _to_number(match.group(1), None)
+
+
+def normalize_counts(texts, strict=True):
+    """Normalize a list of strings in one call; repeated strings are parsed once"""
+    memo = {}
+    out = []
+    append = out.append
+    for text in texts:
+        try:
+            value = memo[text]
+        except KeyError:
+            value = memo[text] = normalize_count(text, strict) if isinstance(text, str) else None
+        append(value)
+    return out
+
+
+def js_normalizer():
+    """JavaScript source defining normalizeCount(text), generated from the same table"""
+    return '''const COUNT_SUFFIXES = %s;
+const COUNT_RE = new RegExp(%s, 'u');
+function normalizeCount(text) {
+    if (!text) return null;
+    const match = COUNT_RE.exec(text.trim());
+    if (!match) return null;
+    const suffix = match[2];
+    if (suffix && !(suffix.toLowerCase() in COUNT_SUFFIXES)) return null;
+    let digits = match[1].replace(/[ \\u00a0\\u202f']/g, '');
+    if (digits.includes(',') && digits.includes('.')) {
+        const decimal = digits.lastIndexOf(',') > digits.lastIndexOf('.') ? ',' : '.';
+        digits = digits.split(decimal === ',' ? '.' : ',').join('').replace(decimal, '.');
+    } else if (digits.includes(',') || digits.includes('.')) {
+        const parts = digits.split(digits.includes(',') ? ',' : '.');
+        if (parts.length > 2 || (parts[1].length === 3 && !suffix)) {
+            digits = parts.join('');
+        } else {
+            digits = parts[0] + '.' + parts[1];
+        }
+    }
+    let value = parseFloat(digits);
+    if (suffix) value *= COUNT_SUFFIXES[suffix.toLowerCase()];
+    return Math.round(value);
+}
+''' % (json.dumps(SUFFIXES, ensure_ascii=False), json.dumps(JS_PATTERN))
+
+
+# (input, expected) pairs covering the formats seen on localized reel pages
+FIXTURES = [
+    ('0', 0),
+    ('42', 42),
+    ('1.2K', 1200),
+    ('1.2k', 1200),
+    ('15K', 15000),
+    ('3M', 3000000),
+    ('1.2B', 1200000000),
+    ('1,2 K', 1200),
+    ('1,2\u00a0K', 1200),
+    ('3.4 mil', 3400),
+    ('3,4 mil', 3400),
+    ('2 tsd.', 2000),
+    ('1,5 Mio.', 1500000),
+    ('2 Mrd.', 2000000000),
+    ('12 tys.', 12000),
+    ('1,2 mln', 1200000),
+    ('4,5 rb', 4500),
+    ('1,2 jt', 1200000),
+    ('3,1 тыс.', 3100),
+    ('2 млн', 2000000),
+    ('3万', 30000),
+    ('1.5萬', 15000),
+    ('2억', 200000000),
+    ('1,234', 1234),
+    ('1.234', 1234),
+    ('1.234.567', 1234567),
+    ('1,234,567', 1234567),
+    ('1 234 567', 1234567),
+    ("1'234", 1234),
+    ('1,234.5', 1235),
+    ('1.234,5', 1235),
+    ('', None),
+    ('Like', None),
+    ('2 hours ago', None),
+    ('12:30', None),
+    ('3 hrs', None),
+    ('\u0663', None),
+    ('\u0663K', None),
+]
+
+
+def check_fixtures():
+    """Return the fixtures the normalizer gets wrong, as (input, expected, actual)"""
+    return [(text, expected, actual)
+            for (text, expected), actual in zip(FIXTURES, normalize_counts([t for t, _ in FIXTURES]))
+            if actual != expected]
+
+
+def check_js_fixtures(node='node'):
+    """Run the fixtures through the generated JavaScript normalizer with node.
+
+    Returns the failures as (input, expected, actual), or None when node is not installed.
+    """
+    executable = shutil.which(node)
+    if executable is None:
+        return None
+    script = js_normalizer() + (
+        'const fixtures = JSON.parse(require("fs").readFileSync(0, "utf8"));\n'
+        'process.stdout.write(JSON.stringify(fixtures.map(normalizeCount)));\n'
+    )
+    output = subprocess.run([executable, '-e', script], input=json.dumps([t for t, _ in FIXTURES]),
+                            capture_output=True, text=True, check=True).stdout
+    return [(text, expected, actual)
+            for (text, expected), actual in zip(FIXTURES, json.loads(output))
+            if actual != expected]
+
+
+def _legacy_extract_number(text):
+    """The per-call re.sub parser this module replaced, kept for benchmarking"""
+    try:
+        if not text:
+            return 0
+        text = text.lower().strip()
+        text = re.sub(r'[^0-9km.]', '', text)
+        if 'k' in text:
+            return int(float(text.replace('k', '')) * 1000)
+        elif 'm' in text:
+            return int(float(text.replace('m', '')) * 1000000)
+        else:
+            return int(float(text))
+    except Exception:
+        return 0
+
+
+def benchmark(size=200000, repeat=3):
+    """Time the legacy parser, per-call normalize_count and batch normalize_counts over a backfill-sized list"""
+    import timeit
+    samples = [text for text, _ in FIXTURES if text] * (size // len(FIXTURES) + 1)
+    samples = samples[:size]
+    timings = {
+        'legacy extract_number': lambda: [_legacy_extract_number(t) for t in samples],
+        'normalize_count': lambda: [normalize_count(t) for t in samples],
+        'normalize_counts (batch)': lambda: normalize_counts(samples),
+    }
+    return {name: min(timeit.repeat(fn, number=1, repeat=repeat)) for name, fn in timings.items()}
+
+
+if __name__ == "__main__":
+    failures = check_fixtures()
+    for text, expected, actual in failures:
+        print(f"FAIL {text!r}: expected {expected}, got {actual}")
+    print(f"{len(FIXTURES) - len(failures)}/{len(FIXTURES)} fixtures passed")
+    js_failures = check_js_fixtures()
+    if js_failures is None:
+        print("node not found, skipped the JavaScript normalizer")
+    else:
+        for text, expected, actual in js_failures:
+            print(f"JS FAIL {text!r}: expected {expected}, got {actual}")
+        print(f"{len(FIXTURES) - len(js_failures)}/{len(FIXTURES)} fixtures passed in JavaScript")
+    for name, seconds in benchmark().items():
+        print(f"{name:28s} {seconds * 1000:8.1f} ms")
@@ -0,0 +1,72 @@
+"""Gunicorn configuration for serving the API in production.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+Runs one worker process per core (threads within each for concurrent scrapes).
+Each worker warms up Chromium before it starts accepting connections and
+reports not-ready on /health if that fails; a failed warmup is retried in the
+background with backoff, and after ``WARMUP_ATTEMPTS`` failures the worker
+exits so gunicorn replaces it. On SIGTERM a worker stops accepting new
+connections, reports draining on /health, and gets ``graceful_timeout``
+seconds to finish in-flight scrapes.
+"""
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', '8000')}"
+workers = int(os.getenv('WEB_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '4'))
+
+# A scrape can take up to ~60s plus a streamed crawl/comments response, so keep workers alive longer
+timeout = int(os.getenv('WEB_TIMEOUT', '180'))
+# /crawl and /comments streams are capped 30s below the watchdog's browser age limit, so by default
+# draining waits longer than the longest of them
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', int(os.getenv('CHROMIUM_MAX_BROWSER_AGE', '300')) + 30))
+keepalive = 5
+
+# Load the app in each worker, not in the master: Playwright and the watchdog thread must not be forked
+preload_app = False
+
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+accesslog = '-'
+
+# Warmup attempts (the first one included) before a worker whose browsers do not launch is replaced
+WARMUP_ATTEMPTS = int(os.getenv('WARMUP_ATTEMPTS', '5'))
+
+
+def post_worker_init(worker):
+    """Warm up browsers before the worker accepts traffic, and mark it draining on SIGTERM"""
+    import main
+
+    state = main.warm_up()
+    if not state['ready']:
+        worker.log.error("Worker %s: %s; /health reports unhealthy while warmup is retried", worker.pid, state['error'])
+        threading.Thread(target=retry_warm_up, args=(worker, main), daemon=True).start()
+
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def on_sigterm(signum, frame):
+        main.readiness['draining'] = True
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+
+def retry_warm_up(worker, main, delay=5, max_delay=60):
+    """Retry a failed warmup with exponential backoff; stop the worker if it keeps failing"""
+    for attempt in range(2, WARMUP_ATTEMPTS + 1):
+        time.sleep(delay)
+        if main.readiness['draining']:
+            return
+        if main.warm_up()['ready']:
+            worker.log.info("Worker %s: browser warmup succeeded on attempt %d", worker.pid, attempt)
+            return
+        delay = min(delay * 2, max_delay)
+    worker.log.error("Worker %s: browser warmup failed %d times; restarting the worker", worker.pid, WARMUP_ATTEMPTS)
+    # The worker loop exits and the arbiter starts a replacement
+    worker.alive = False
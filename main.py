@@ -1,70 +1,334 @@
-from flask import Flask, request, jsonify
-from scraper import FacebookReelScraper
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from scraper import FacebookReelScraper, parse_fields, shared_selector_registry
+from timeseries import EngagementStore, METRICS
+from reel_index import ReelIndex, SORT_KEYS
+from browser_watchdog import ChromiumWatchdog
+from batch import BatchScraper
+from profile_crawl import reels_tab_url
+from proxies import ProxyPool
+from profiles import ProfilePool
+from sinks import sinks_from_env
+from tiers import LatencyTracker, CircuitBreaker
+from records import json_default
+from scheduling import FairScheduler, QueueTimeout, QuotaExceeded, load_policies
+from structured_logging import begin_job, configure_logging, end_job, job_id_var, reel_id_var, submit_in_context
+import atexit
+import collections
+import contextvars
+import functools
+import json
 import logging
+import math
+import os
+import queue
 import time
+import uuid
 from typing import Optional
 import threading
 import concurrent.futures
+import contextlib
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (queue-backed JSON lines; LOG_LEVEL, LOG_SAMPLE_RATE, LOG_FORMAT)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Create Flask app
 app = Flask(__name__)
 
-def run_scraper_with_fallback(url: str):
-    """Run scraper with smart fallback: authenticated -> public -> quick"""
-    logger.info(f"Starting scraper with fallback for URL: {url}")
-    
-    # Try authenticated scraping first (with timeout)
+@app.before_request
+def bind_job_id():
+    """Tag every log record of a request with its job ID (X-Request-ID, or a generated one)"""
+    g.job_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+    job_id_var.set(g.job_id)
+    reel_id_var.set(None)
+    begin_job(g.job_id)
+
+@app.after_request
+def add_job_id_header(response):
+    job_id = g.get("job_id")
+    response.headers["X-Request-ID"] = job_id or ""
+    # Unsampled jobs keep their INFO records only if they fail; streams are judged when they end
+    success = response.status_code < 400
+    if response.is_streamed:
+        response.call_on_close(lambda: end_job(job_id, success))
+    else:
+        end_job(job_id, success)
+    return response
+
+@app.teardown_request
+def unbind_job_id(exc=None):
+    if exc is not None:
+        end_job(g.get("job_id"), success=False)
+    # Worker threads are reused across requests
+    job_id_var.set(None)
+    reel_id_var.set(None)
+
+# Engagement snapshots are recorded for every successful scrape when a store directory is configured
+ENGAGEMENT_STORE_DIR = os.getenv('ENGAGEMENT_STORE_DIR')
+engagement_store = EngagementStore(ENGAGEMENT_STORE_DIR) if ENGAGEMENT_STORE_DIR else None
+
+# Successful scrapes are indexed by hashtag, creator and post time for /reels (empty REEL_INDEX_PATH disables)
+REEL_INDEX_PATH = os.getenv('REEL_INDEX_PATH', 'reel_index.sqlite')
+reel_index = ReelIndex(REEL_INDEX_PATH) if REEL_INDEX_PATH else None
+
+# Chromium memory supervisor: enforces budgets and reaps browsers left behind by abandoned scrapes
+watchdog = ChromiumWatchdog(
+    browser_budget_mb=int(os.getenv('CHROMIUM_BROWSER_BUDGET_MB', '1536')),
+    context_budget_mb=int(os.getenv('CHROMIUM_CONTEXT_BUDGET_MB', '768')),
+    max_browser_age=int(os.getenv('CHROMIUM_MAX_BROWSER_AGE', '300')),
+    interval=int(os.getenv('WATCHDOG_INTERVAL', '15'))
+)
+if os.getenv('WATCHDOG_ENABLED', 'true').lower() == 'true':
+    watchdog.start()
+
+# Profile crawls: the crawl browser must finish before the watchdog's browser age limit recycles it
+CRAWL_MAX_TIME_BUDGET = min(float(os.getenv('CRAWL_MAX_TIME_BUDGET', '240')), watchdog.max_browser_age - 30)
+CRAWL_MAX_REELS = int(os.getenv('CRAWL_MAX_REELS', '1000'))
+
+# Outbound proxies (comma-separated SCRAPER_PROXIES); all traffic goes out directly when unset
+proxy_pool = ProxyPool.from_env()
+PROXY_SCOPE = os.getenv('PROXY_SCOPE', 'browser')
+
+# Per-tier latency (adaptive timeouts) and circuit breakers for the fallback chain
+latency_tracker = LatencyTracker(window=int(os.getenv('LATENCY_WINDOW', '200')))
+circuit_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '3')),
+    cooldown=int(os.getenv('CIRCUIT_COOLDOWN', '60'))
+)
+TIER_MIN_TIMEOUT = float(os.getenv('TIER_MIN_TIMEOUT', '10'))
+TIER_MAX_TIMEOUT = float(os.getenv('TIER_MAX_TIMEOUT', '90'))
+
+# Persistent browser profiles: reuse Chromium's HTTP disk cache across scrapes
+profile_pool = None
+if os.getenv('PERSISTENT_PROFILES', 'false').lower() == 'true':
+    profile_pool = ProfilePool(
+        root=os.getenv('PROFILE_DIR', 'browser_profiles'),
+        size=int(os.getenv('PROFILE_POOL_SIZE', '8')),
+        cache_size_mb=int(os.getenv('BROWSER_CACHE_SIZE_MB', '256')),
+        max_total_cache_mb=int(os.getenv('BROWSER_CACHE_TOTAL_MB', '2048'))
+    )
+BROWSER_WARMUP = os.getenv('BROWSER_WARMUP', 'cold')
+
+# Output sinks (SINK_SQLITE_PATH, SINK_JSONL_DIR, SINK_WEBHOOK_URL) receive every successful scrape result
+result_sinks = sinks_from_env()
+if result_sinks is not None:
+    atexit.register(result_sinks.close)
+
+def scraper_options():
+    """Shared keyword arguments for FacebookReelScraper instances created by the API"""
+    return {"proxy_pool": proxy_pool, "proxy_scope": PROXY_SCOPE, "latency_tracker": latency_tracker,
+            "profile_pool": profile_pool, "warmup": BROWSER_WARMUP}
+
+# Readiness of this process: not ready until a browser warmup succeeded, and not ready again once draining
+readiness = {"ready": False, "draining": False, "error": None}
+
+def warm_up():
+    """Check that Chromium launches before the process reports ready; returns the readiness state"""
+    logger.info("Warming up browsers...")
+    if FacebookReelScraper(use_cookies=False, **scraper_options()).warm_up():
+        readiness.update(ready=True, error=None)
+    else:
+        readiness.update(ready=False, error="Browser warmup failed")
+    return readiness
+
+# Fair scheduling of scrape requests between API clients (identified by X-API-Key)
+scheduler = FairScheduler(
+    capacity=int(os.getenv('SCHEDULER_CAPACITY', '8')),
+    policies=load_policies(os.getenv('API_CLIENTS')),
+    queue_timeout=int(os.getenv('SCHEDULER_QUEUE_TIMEOUT', '60'))
+)
+REQUIRE_API_KEY = os.getenv('REQUIRE_API_KEY', 'false').lower() == 'true'
+
+# Attempts per batch scrape at getting a scheduler slot before the reel is given up
+BATCH_SLOT_ATTEMPTS = 3
+
+def client_policy():
+    """(policy, None) for the calling client (None policy = default), or (None, 401 response)"""
+    policy = scheduler.policy_for(request.headers.get("X-API-Key"))
+    if policy is None and REQUIRE_API_KEY:
+        return None, (jsonify({
+            "success": False,
+            "error": "Invalid or missing API key",
+            "message": "Please provide a valid X-API-Key header"
+        }), 401)
+    return policy, None
+
+def rejected_response(error):
+    """429/503 with Retry-After for a request the scheduler turned away"""
+    logger.warning("Rejected request: %s", error)
+    return jsonify({
+        "success": False,
+        "error": str(error),
+        "message": "Please retry after the number of seconds in the Retry-After header"
+    }), 429 if isinstance(error, QuotaExceeded) else 503, {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+
+def scheduled(view):
+    """Run a scrape endpoint in a scheduler slot for the calling client; 429/503 with Retry-After when over quota"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        policy, error = client_policy()
+        if error:
+            return error
+        try:
+            with scheduler.slot(policy, priority=request.headers.get("X-Priority")):
+                return view(*args, **kwargs)
+        except (QuotaExceeded, QueueTimeout) as e:
+            return rejected_response(e)
+    return wrapper
+
+def hold_slot(policy, priority=None):
+    """Take a scheduler slot that outlives the view (streamed responses); returns a release function
+
+    Raises QuotaExceeded/QueueTimeout like scheduler.slot(). Releasing more than once is harmless.
+    """
+    stack = contextlib.ExitStack()
+    stack.enter_context(scheduler.slot(policy, priority=priority))
+    lock = threading.Lock()
+    def release():
+        with lock:
+            stack.close()
+    return release
+
+def scheduled_scrape(policy):
+    """scrape(url, fields) for batch runs: every scrape takes a bulk-priority slot of the client"""
+    def scrape(url, fields=None):
+        for attempt in range(BATCH_SLOT_ATTEMPTS):
+            try:
+                with scheduler.slot(policy, priority='bulk'):
+                    return run_scraper_with_fallback(url, fields)
+            except (QuotaExceeded, QueueTimeout) as e:
+                if attempt == BATCH_SLOT_ATTEMPTS - 1:
+                    raise
+                # Back off instead of dropping the reel; other clients keep their share meanwhile
+                time.sleep(min(e.retry_after, 30))
+    return scrape
+
+def get_requested_fields(data):
+    """Parse the optional 'fields' selection from a request body (raises ValueError on unknown fields)"""
+    return parse_fields(data.get('fields'))
+
+def invalid_fields_response(error):
+    """400 response for an invalid 'fields' selection"""
+    return jsonify({
+        "success": False,
+        "error": str(error),
+        "message": "Please provide 'fields' as a list or comma-separated string of known output fields"
+    }), 400
+
+def record_engagement(result):
+    """Append the counters of a scrape result to the engagement store, if enabled"""
+    if engagement_store is None or not result:
+        return
     try:
-        logger.info("Attempting authenticated scraping...")
-        scraper_auth = FacebookReelScraper(use_cookies=True, auto_login=True)
-        result = scraper_auth.get_reel_data(url)
-        if result:
-            logger.info("✅ Authenticated scraping successful")
-            return result
+        engagement_store.append_reel(result)
     except Exception as e:
-        logger.warning(f"Authenticated scraping failed: {str(e)}")
-    
-    # Try public scraping as fallback
+        logger.warning("Failed to record engagement snapshot: %s", e)
+
+def emit_result(result):
+    """Queue an accepted scrape result for the output sinks, if any are configured
+
+    The API's scrapers get no sinks of their own: a tier abandoned after its timeout
+    would still emit from inside the scraper when it finishes.
+    """
+    if result_sinks is None or not result:
+        return
     try:
-        logger.info("Attempting public scraping...")
-        scraper_public = FacebookReelScraper(use_cookies=False)
-        result = scraper_public.get_reel_data(url)
-        if result:
-            logger.info("✅ Public scraping successful")
-            return result
+        result_sinks.put(result)
     except Exception as e:
-        logger.warning(f"Public scraping failed: {str(e)}")
-    
-    # Try quick scraping as last resort
+        logger.warning("Failed to queue result for output sinks: %s", e)
+
+def index_result(result):
+    """Add a scrape result to the reel index, if enabled; partial results (projections) are merged into the row"""
+    if reel_index is None or not result:
+        return
     try:
-        logger.info("Attempting quick scraping...")
-        scraper_quick = FacebookReelScraper(use_cookies=False)
-        result = scraper_quick.quick_scrape(url)
+        reel_index.add(result)
+    except Exception as e:
+        logger.warning("Failed to index reel: %s", e)
+
+# Scraping tiers in fallback order, with the timeout each gets until enough latency samples exist
+TIERS = ("authenticated", "public", "quick")
+TIER_DEFAULT_TIMEOUTS = {"authenticated": 45, "public": 45, "quick": 30}
+
+def scrape_tier(tier: str, url: str, fields=None, snapshot=False):
+    """Run a single scraping tier with a fresh scraper"""
+    if tier == "authenticated":
+        scraper = FacebookReelScraper(use_cookies=True, auto_login=True, **scraper_options())
+        return scraper.get_reel_data(url, fields=fields, snapshot=snapshot)
+    scraper = FacebookReelScraper(use_cookies=False, **scraper_options())
+    if tier == "public":
+        return scraper.get_reel_data(url, fields=fields, snapshot=snapshot)
+    return scraper.quick_scrape(url, fields=fields, snapshot=snapshot)
+
+def run_tier_with_timeout(tier: str, url: str, timeout: float, fields=None, snapshot=False):
+    """Run a tier in a worker thread; gives up after timeout seconds without waiting for the thread"""
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    future = submit_in_context(executor, scrape_tier, tier, url, fields, snapshot)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        # The abandoned scrape keeps its browser until it finishes (or the watchdog reaps it),
+        # so it keeps counting against scheduler capacity after the request's slot is released
+        scheduler.hold_until_done(future)
+        raise
+    finally:
+        executor.shutdown(wait=False)
+
+def run_scraper_with_fallback(url: str, fields=None, snapshot=False, budget: Optional[float] = None):
+    """Run scraper with smart fallback: authenticated -> public -> quick.
+
+    Tiers whose circuit is open are skipped; each tier gets a timeout derived
+    from its observed p99 latency, capped by what is left of ``budget`` seconds.
+    """
+    logger.info("Starting scraper with fallback for URL: %s", url)
+    deadline = time.monotonic() + budget if budget else None
+
+    for tier in TIERS:
+        remaining = deadline - time.monotonic() if deadline is not None else None
+        if remaining is not None and remaining <= 1:
+            logger.error("Scrape budget spent before trying the remaining tiers")
+            break
+        if not circuit_breaker.allow(tier):
+            logger.info("Skipping %s scraping: circuit open", tier)
+            continue
+        timeout = latency_tracker.timeout(tier, TIER_DEFAULT_TIMEOUTS[tier], floor=TIER_MIN_TIMEOUT, ceiling=TIER_MAX_TIMEOUT)
+        if remaining is not None:
+            timeout = min(timeout, remaining)
+
+        logger.info("Attempting %s scraping (timeout %.1fs)...", tier, timeout)
+        started = time.monotonic()
+        try:
+            result = run_tier_with_timeout(tier, url, timeout, fields, snapshot)
+        except concurrent.futures.TimeoutError:
+            logger.warning("%s scraping timed out after %.1f seconds", tier.capitalize(), timeout)
+            if remaining is None or timeout < remaining:
+                # Not cut short by the request budget: the tier really took at least this long
+                latency_tracker.record_timeout(tier, timeout)
+            result = None
+        except Exception as e:
+            logger.warning("%s scraping failed: %s", tier.capitalize(), e)
+            result = None
+
+        circuit_breaker.record(tier, bool(result))
         if result:
-            logger.info("✅ Quick scraping successful")
+            latency_tracker.record(tier, time.monotonic() - started)
+            logger.info("%s scraping successful", tier.capitalize())
+            # Only the accepted result is emitted; a tier abandoned after its timeout never reaches the sinks
+            emit_result(result)
             return result
-    except Exception as e:
-        logger.warning(f"Quick scraping failed: {str(e)}")
-    
-    logger.error("❌ All scraping methods failed")
+
+    logger.error("All scraping methods failed")
     return None
 
-def run_scraper_with_timeout(url: str, timeout: int = 60):
-    """Run scraper with timeout using ThreadPoolExecutor"""
+def run_scraper_with_timeout(url: str, timeout: int = 60, fields=None, snapshot=False):
+    """Run the fallback chain within an overall timeout"""
     try:
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(run_scraper_with_fallback, url)
-            result = future.result(timeout=timeout)
-            return result
-    except concurrent.futures.TimeoutError:
-        logger.error(f"Scraper timed out after {timeout} seconds")
-        return None
+        result = run_scraper_with_fallback(url, fields, snapshot, budget=timeout)
+        record_engagement(result)
+        index_result(result)
+        return result
     except Exception as e:
-        logger.error(f"Scraper error: {str(e)}")
+        logger.error("Scraper error: %s", e)
         return None
 
 @app.route("/", methods=["GET"])
@@ -75,15 +339,50 @@ def root():
         "version": "1.0.0",
         "endpoints": {
             "/search": "POST - Search and scrape Facebook Reel data",
+            "/comments": "POST - Stream a reel's comments as NDJSON",
+            "/crawl": "POST - Stream a creator's reels (and optionally scrape them) as NDJSON",
+            "/history/<reel_id>": "GET - Recorded engagement snapshots for a reel",
+            "/reels": "GET - Query scraped reels by hashtag, creator and post time",
+            "/selectors": "GET - Hit rate, cost and order of the extraction selector strategies",
+            "/metrics": "GET - Chromium process metrics",
             "/health": "GET - Health check endpoint"
         }
     })
 
 @app.route("/health", methods=["GET"])
 def health_check():
-    """Health check endpoint"""
+    """Health/readiness check: 503 until browser warmup succeeded and while shutting down"""
+    if readiness["draining"]:
+        return jsonify({"status": "draining", "message": "Shutting down, finishing in-flight scrapes"}), 503
+    if not readiness["ready"]:
+        return jsonify({
+            "status": "starting" if readiness["error"] is None else "unhealthy",
+            "message": readiness["error"] or "Browser warmup not finished"
+        }), 503
     return jsonify({"status": "healthy", "message": "API is running"})
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Chromium memory/CPU metrics from the watchdog, proxy health, tier latency/circuit state, scheduler queues, browser cache hits and output sinks"""
+    return jsonify({
+        "chromium": watchdog.metrics(),
+        "proxies": proxy_pool.stats() if proxy_pool else [],
+        "latency": latency_tracker.stats(),
+        "circuits": circuit_breaker.stats(),
+        "scheduler": scheduler.stats(),
+        "browser_cache": profile_pool.stats() if profile_pool else None,
+        "sinks": result_sinks.stats() if result_sinks else {}
+    })
+
+@app.route("/selectors", methods=["GET"])
+def selector_report():
+    """Extraction selector strategies per group in their current order, with hit rate, mean cost and status"""
+    return jsonify({
+        "success": True,
+        "data": shared_selector_registry().report(),
+        "message": "Selectors are ordered by hit rate, then cost; 'dead' ones are only retried occasionally"
+    })
+
 @app.route("/test", methods=["GET"])
 def test_endpoint():
     """Simple test endpoint to verify API is working"""
@@ -94,6 +393,7 @@ def test_endpoint():
     })
 
 @app.route("/search", methods=["POST"])
+@scheduled
 def search_reel():
     """
     Search and scrape Facebook Reel data
@@ -116,16 +416,20 @@ def search_reel():
             }), 400
         
         url = data['url']
-        logger.info(f"Received search request for URL: {url}")
+        try:
+            fields = get_requested_fields(data)
+        except ValueError as e:
+            return invalid_fields_response(e)
+        logger.info("Received search request for URL: %s", url)
         
         # Run scraper with timeout
-        result = run_scraper_with_timeout(url, timeout=60)
+        result = run_scraper_with_timeout(url, timeout=60, fields=fields, snapshot=bool(data.get('snapshot')))
         
         if result:
             logger.info("Successfully scraped reel data")
             return jsonify({
                 "success": True,
-                "data": result,
+                "data": result.to_dict(),
                 "message": "Reel data extracted successfully"
             })
         else:
@@ -137,7 +441,7 @@ def search_reel():
             }), 400
             
     except Exception as e:
-        logger.error(f"Error processing search request: {str(e)}")
+        logger.error("Error processing search request: %s", e)
         return jsonify({
             "success": False,
             "error": str(e),
@@ -145,6 +449,7 @@ def search_reel():
         }), 500
 
 @app.route("/search/public", methods=["POST"])
+@scheduled
 def search_reel_public():
     """
     Search and scrape Facebook Reel data using public scraping (no authentication)
@@ -162,16 +467,20 @@ def search_reel_public():
             }), 400
         
         url = data['url']
-        logger.info(f"Received public search request for URL: {url}")
+        try:
+            fields = get_requested_fields(data)
+        except ValueError as e:
+            return invalid_fields_response(e)
+        logger.info("Received public search request for URL: %s", url)
         
         # Run scraper with timeout
-        result = run_scraper_with_timeout(url, timeout=60)
+        result = run_scraper_with_timeout(url, timeout=60, fields=fields, snapshot=bool(data.get('snapshot')))
         
         if result:
             logger.info("Successfully scraped reel data (public mode)")
             return jsonify({
                 "success": True,
-                "data": result,
+                "data": result.to_dict(),
                 "message": "Reel data extracted successfully using public scraping"
             })
         else:
@@ -183,7 +492,7 @@ def search_reel_public():
             }), 400
             
     except Exception as e:
-        logger.error(f"Error processing public search request: {str(e)}")
+        logger.error("Error processing public search request: %s", e)
         return jsonify({
             "success": False,
             "error": str(e),
@@ -191,6 +500,7 @@ def search_reel_public():
         }), 500
 
 @app.route("/search/quick", methods=["POST"])
+@scheduled
 def search_reel_quick():
     """
     Quick search and scrape Facebook Reel data (basic extraction only)
@@ -209,16 +519,20 @@ def search_reel_quick():
             }), 400
         
         url = data['url']
-        logger.info(f"Received quick search request for URL: {url}")
+        try:
+            fields = get_requested_fields(data)
+        except ValueError as e:
+            return invalid_fields_response(e)
+        logger.info("Received quick search request for URL: %s", url)
         
         # Run scraper with shorter timeout for quick mode
-        result = run_scraper_with_timeout(url, timeout=30)
+        result = run_scraper_with_timeout(url, timeout=30, fields=fields, snapshot=bool(data.get('snapshot')))
         
         if result:
             logger.info("Successfully scraped reel data (quick mode)")
             return jsonify({
                 "success": True,
-                "data": result,
+                "data": result.to_dict(),
                 "message": "Reel data extracted successfully using quick mode"
             })
         else:
@@ -230,18 +544,289 @@ def search_reel_quick():
             }), 400
             
     except Exception as e:
-        logger.error(f"Error processing quick search request: {str(e)}")
+        logger.error("Error processing quick search request: %s", e)
         return jsonify({
             "success": False,
             "error": str(e),
             "message": "An error occurred while processing the request"
         }), 500
 
+# Upper bound for a single comments stream; like the crawl cap, it stays below the watchdog's browser age limit
+MAX_COMMENTS_TIME_BUDGET = min(300, watchdog.max_browser_age - 30)
+
+@app.route("/comments", methods=["POST"])
+def stream_comments():
+    """
+    Stream a reel's comments as NDJSON (one JSON object per line)
+
+    Body: {"url": ..., "limit": optional max comments, "time_budget": optional seconds (default 60)}
+    Comments are sent as soon as they are harvested.
+    """
+    data = request.get_json(silent=True)
+    if not data or 'url' not in data:
+        return jsonify({
+            "success": False,
+            "error": "Missing URL in request body",
+            "message": "Please provide a 'url' field in the JSON body"
+        }), 400
+
+    try:
+        limit = int(data['limit']) if data.get('limit') is not None else None
+        time_budget = max(0.0, min(float(data.get('time_budget', 60)), MAX_COMMENTS_TIME_BUDGET))
+    except (TypeError, ValueError):
+        return jsonify({
+            "success": False,
+            "error": "Invalid limit or time_budget",
+            "message": "'limit' must be an integer and 'time_budget' a number of seconds"
+        }), 400
+
+    policy, error = client_policy()
+    if error:
+        return error
+    try:
+        # Held until the stream ends, not just until this view returns
+        release = hold_slot(policy, priority=request.headers.get("X-Priority"))
+    except (QuotaExceeded, QueueTimeout) as e:
+        return rejected_response(e)
+
+    url = data['url']
+    logger.info("Received comments request for URL: %s", url)
+    scraper = FacebookReelScraper(use_cookies=False, **scraper_options())
+
+    def generate():
+        for comment in scraper.iter_comments(url, limit=limit, time_budget=time_budget):
+            yield json.dumps(comment) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.call_on_close(release)
+    return response
+
+@app.route("/crawl", methods=["POST"])
+def crawl_profile():
+    """
+    Enumerate a creator's reels and optionally scrape them, streamed as NDJSON
+
+    Body: {"profile_url": ..., "limit": max reels (1 to CRAWL_MAX_REELS),
+           "time_budget": crawl seconds (default 120, above 0 and at most CRAWL_MAX_TIME_BUDGET),
+           "scrape": true to scrape each reel, "max_age": skip reels scraped within this many seconds
+           (default 86400, needs ENGAGEMENT_STORE_DIR), "workers": concurrent scrapes (default 2),
+           "fields": optional output fields}
+    Lines are {"event": "reel", ...grid tile}, {"event": "skipped", "reel_id": ...}
+    or {"event": "result", "reel_id": ..., "data": ...}.
+    """
+    data = request.get_json(silent=True)
+    if not data or 'profile_url' not in data:
+        return jsonify({
+            "success": False,
+            "error": "Missing profile_url in request body",
+            "message": "Please provide a 'profile_url' field in the JSON body"
+        }), 400
+
+    try:
+        fields = get_requested_fields(data)
+    except ValueError as e:
+        return invalid_fields_response(e)
+    try:
+        limit = min(int(data['limit']), CRAWL_MAX_REELS) if data.get('limit') is not None else CRAWL_MAX_REELS
+        time_budget = min(float(data.get('time_budget', 120)), CRAWL_MAX_TIME_BUDGET)
+        max_age = float(data.get('max_age', 86400))
+        workers = max(1, min(int(data.get('workers', 2)), 8))
+        if limit < 1 or not time_budget > 0:
+            raise ValueError("limit and time_budget must be positive")
+    except (TypeError, ValueError):
+        return jsonify({
+            "success": False,
+            "error": "Invalid crawl parameters",
+            "message": "'limit' (at least 1) and 'workers' must be integers; "
+                       "'time_budget' (above 0) and 'max_age' numbers of seconds"
+        }), 400
+
+    profile_url = data['profile_url']
+    try:
+        reels_tab_url(profile_url)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "message": "Please provide a Facebook profile URL"
+        }), 400
+    policy, error = client_policy()
+    if error:
+        return error
+    try:
+        # The crawl browser takes a bulk slot; with scrape=true each scrape takes its own
+        release = hold_slot(policy, priority='bulk')
+    except (QuotaExceeded, QueueTimeout) as e:
+        return rejected_response(e)
+    logger.info("Received crawl request for profile: %s", profile_url)
+    crawler = FacebookReelScraper(use_cookies=False, **scraper_options())
+
+    def generate():
+        if not data.get('scrape'):
+            for tile in crawler.crawl_profile(profile_url, limit=limit, time_budget=time_budget):
+                yield json.dumps(dict(tile, event="reel")) + "\n"
+            return
+
+        # The grid is walked in its own thread into a buffer that holds every tile (limit is capped), so
+        # the crawl browser closes once enumeration ends instead of waiting on the scrapes
+        tiles = queue.Queue(maxsize=limit + 1)
+        stop = threading.Event()
+        end = object()
+        def enumerate_tiles():
+            crawl = crawler.crawl_profile(profile_url, limit=limit, time_budget=time_budget)
+            try:
+                for tile in crawl:
+                    if stop.is_set():
+                        break
+                    tiles.put(tile)
+            except Exception as e:
+                logger.error("Profile crawl failed: %s", e)
+            finally:
+                crawl.close()
+                release()
+                tiles.put(end)
+        threading.Thread(target=contextvars.copy_context().run, args=(enumerate_tiles,),
+                         name="profile-crawl", daemon=True).start()
+
+        # Tiles are announced as the batch scraper pulls them from the buffer
+        announced = collections.deque()
+        def announce():
+            while True:
+                tile = tiles.get()
+                if tile is end:
+                    return
+                announced.append(tile)
+                yield tile
+
+        batch = BatchScraper(
+            scrape=scheduled_scrape(policy),
+            max_workers=workers,
+            engagement_store=engagement_store,
+            max_age=max_age
+        )
+        try:
+            for status, tile, result in batch.run(announce(), fields=fields):
+                while announced:
+                    yield json.dumps(dict(announced.popleft(), event="reel")) + "\n"
+                event = {"event": status, "reel_id": tile.get('reel_id')}
+                if status == 'result':
+                    index_result(result)
+                    event["data"] = result
+                yield json.dumps(event, default=json_default) + "\n"
+            while announced:
+                yield json.dumps(dict(announced.popleft(), event="reel")) + "\n"
+        finally:
+            # Client went away: stop the crawl early
+            stop.set()
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.call_on_close(release)
+    return response
+
+@app.route("/history/<reel_id>", methods=["GET"])
+def reel_history(reel_id):
+    """
+    Recorded engagement snapshots for a reel
+
+    Query parameters:
+    - metric: one of num_comments, shares, likes, views (default: all counters)
+    - days: only return snapshots from the last N days
+    - start / end: unix timestamps bounding the range (ignored when days is given)
+    """
+    if engagement_store is None:
+        return jsonify({
+            "success": False,
+            "error": "Engagement store disabled",
+            "message": "Set ENGAGEMENT_STORE_DIR to record engagement snapshots"
+        }), 404
+
+    metric = request.args.get('metric')
+    if metric is not None and metric not in METRICS:
+        return jsonify({
+            "success": False,
+            "error": f"Unknown metric: {metric}",
+            "message": f"metric must be one of: {', '.join(METRICS)}"
+        }), 400
+
+    try:
+        if 'days' in request.args:
+            start, end = time.time() - float(request.args['days']) * 86400, None
+        else:
+            start = float(request.args['start']) if 'start' in request.args else None
+            end = float(request.args['end']) if 'end' in request.args else None
+        snapshots = engagement_store.range(reel_id, start=start, end=end, metric=metric)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "message": "Invalid history query"
+        }), 400
+
+    if metric is not None:
+        snapshots = [{"timestamp": ts, metric: value} for ts, value in snapshots]
+    return jsonify({
+        "success": True,
+        "data": {"reel_id": reel_id, "snapshots": snapshots},
+        "message": f"Found {len(snapshots)} snapshots"
+    })
+
+@app.route("/reels", methods=["GET"])
+def query_reels():
+    """
+    Scraped reels from the reel index
+
+    Query parameters:
+    - hashtag: reels tagged with this hashtag (with or without '#')
+    - creator: reels by this creator (username, profile ID or profile URL)
+    - days: only reels posted in the last N days; or since / until: unix timestamps bounding the post time
+    - sort: one of likes, views, num_comments, shares, posted_at, scraped_at (default likes)
+    - order: desc (default) or asc
+    - limit (default 50, at most 500) / offset
+    """
+    if reel_index is None:
+        return jsonify({
+            "success": False,
+            "error": "Reel index disabled",
+            "message": "Set REEL_INDEX_PATH to index scraped reels"
+        }), 404
+
+    try:
+        if 'days' in request.args:
+            since, until = time.time() - float(request.args['days']) * 86400, None
+        else:
+            since = float(request.args['since']) if 'since' in request.args else None
+            until = float(request.args['until']) if 'until' in request.args else None
+        limit = max(1, min(int(request.args.get('limit', 50)), 500))
+        offset = max(0, int(request.args.get('offset', 0)))
+        reels = reel_index.query(
+            hashtag=request.args.get('hashtag'),
+            creator=request.args.get('creator'),
+            since=since,
+            until=until,
+            sort=request.args.get('sort', 'likes'),
+            descending=request.args.get('order', 'desc').lower() != 'asc',
+            limit=limit,
+            offset=offset
+        )
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "message": f"Invalid reel query; sort must be one of: {', '.join(SORT_KEYS)}"
+        }), 400
+
+    return jsonify({
+        "success": True,
+        "data": reels,
+        "message": f"Found {len(reels)} reels"
+    })
+
 if __name__ == "__main__":
-    # Run the Flask app
+    # Development server; use gunicorn (gunicorn.conf.py) in production
+    warm_up()
     app.run(
-        host="0.0.0.0",
-        port=8000,
-        debug=True,
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        debug=os.getenv("FLASK_DEBUG", "false").lower() == "true",
         threaded=True
-    ) 
\ No newline at end of file
+    )
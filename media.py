@@ -0,0 +1,242 @@
+"""Media metadata probe using HTTP range reads.
+
+Reads just enough of an MP4 to parse the ``moov`` box: ``mvhd`` (or ``mehd``
+for fragmented files) for the duration, ``tkhd`` for the video track's
+resolution. The file size comes from the ``Content-Range`` header, and the
+bitrate from size and duration. A file whose ``moov`` sits before ``mdat``
+costs one request of ``chunk_size`` bytes; a file with ``moov`` at the end
+costs one more request for the box itself. Nothing else is downloaded.
+
+Probes run concurrently over a pooled ``requests.Session`` and results are
+cached by media URL (without its query string, which for CDN URLs only
+carries signatures and byte ranges).
+"""
+import collections
+import concurrent.futures
+import logging
+import struct
+import threading
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from structured_logging import submit_in_context
+
+logger = logging.getLogger(__name__)
+
+# Container boxes walked on the way to mvhd/tkhd/mehd
+CONTAINER_BOXES = {b'moov', b'trak', b'mvex'}
+
+# Query parameters that select a byte range of a segment rather than the file itself
+RANGE_PARAMS = {'bytestart', 'byteend'}
+
+
+def iter_boxes(data, start=0, end=None):
+    """Yield (type, payload_start, box_end) for the boxes in data[start:end]; stops at a truncated header
+
+    ``end`` may lie beyond ``data`` (the logical end of a partially fetched
+    file); boxes are yielded as long as their header is within ``data``.
+    """
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= min(end, len(data)):
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > min(end, len(data)):
+                return
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def parse_moov(data):
+    """Duration, width and height from a complete moov box payload (data starts after the moov header)"""
+    info = {'duration': None, 'width': None, 'height': None}
+    timescale = None
+    fragment_duration = None
+
+    def walk(start, end):
+        nonlocal timescale, fragment_duration
+        for box_type, payload, box_end in iter_boxes(data, start, end):
+            box_end = min(box_end, end)
+            if box_type in CONTAINER_BOXES:
+                walk(payload, box_end)
+            elif box_type == b'mvhd':
+                version = data[payload]
+                if version == 1:
+                    timescale, duration = struct.unpack_from('>IQ', data, payload + 20)
+                else:
+                    timescale, duration = struct.unpack_from('>II', data, payload + 12)
+                if timescale and duration and duration not in (0xFFFFFFFF, 0xFFFFFFFFFFFFFFFF):
+                    info['duration'] = duration / timescale
+            elif box_type == b'mehd':
+                version = data[payload]
+                fragment_duration = struct.unpack_from('>Q' if version == 1 else '>I', data, payload + 4)[0]
+            elif box_type == b'tkhd':
+                version = data[payload]
+                # width/height are 16.16 fixed point at the end of the box
+                width, height = struct.unpack_from('>II', data, payload + (88 if version == 1 else 76))
+                width, height = width >> 16, height >> 16
+                # Audio tracks have 0x0; keep the largest video track
+                if width and height and width * height > (info['width'] or 0) * (info['height'] or 0):
+                    info['width'], info['height'] = width, height
+
+    walk(0, len(data))
+    if not info['duration'] and fragment_duration and timescale:
+        info['duration'] = fragment_duration / timescale
+    return info
+
+
+def cache_key(url):
+    """Media URL without its query string"""
+    parsed = urlparse(url)
+    return urlunparse(parsed._replace(query='', fragment=''))
+
+
+def full_file_url(url):
+    """Strip byte-range query parameters from a segment URL so it addresses the whole file"""
+    parsed = urlparse(url)
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if k not in RANGE_PARAMS]
+    return urlunparse(parsed._replace(query=urlencode(query)))
+
+
+class MediaRequestWatcher:
+    """Collect the MP4 files a page's player requests (as whole-file URLs)"""
+
+    def __init__(self, page, limit=20):
+        self.limit = limit
+        self.urls = []
+        page.on('request', self._on_request)
+
+    def _on_request(self, request):
+        try:
+            if len(self.urls) >= self.limit:
+                return
+            if request.resource_type != 'media' and not urlparse(request.url).path.endswith('.mp4'):
+                return
+            url = full_file_url(request.url)
+            if url not in self.urls:
+                self.urls.append(url)
+        except Exception as e:
+            logger.debug("Ignoring media request: %s", e)
+
+
+class MediaProber:
+    """Concurrent, cached MP4 metadata probe over a pooled HTTP session"""
+
+    def __init__(self, session=None, max_workers=8, cache_size=4096, timeout=10,
+                 chunk_size=64 * 1024, max_moov_bytes=4 * 1024 * 1024, proxies=None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        # moov boxes larger than this (very long videos) are not fetched
+        self.max_moov_bytes = max_moov_bytes
+        self.session = session or self._new_session(max_workers)
+        if proxies:
+            self.session.proxies.update(proxies)
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='media-probe')
+
+    @staticmethod
+    def _new_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _fetch(self, url, start, length, proxies=None):
+        """Fetch up to length bytes at start; returns (bytes, total_size or None)"""
+        headers = {'Range': f"bytes={start}-{start + length - 1}"}
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True, proxies=proxies) as response:
+            response.raise_for_status()
+            total = None
+            content_range = response.headers.get('Content-Range', '')
+            if response.status_code == 206 and '/' in content_range:
+                total = content_range.rsplit('/', 1)[1]
+                total = int(total) if total.isdigit() else None
+            elif response.status_code == 200:
+                if start:
+                    raise ValueError("Server does not support range requests")
+                total = int(response.headers['Content-Length']) if response.headers.get('Content-Length', '').isdigit() else None
+            # raw.read bounds the transfer even when the server ignored the Range header
+            data = response.raw.read(length, decode_content=True)
+            return data, total
+
+    def _probe(self, url, proxies=None):
+        head, total = self._fetch(url, 0, self.chunk_size, proxies)
+        moov = None
+        for box_type, payload, box_end in iter_boxes(head):
+            if box_type != b'moov':
+                continue
+            if box_end <= len(head):
+                moov = head[payload:box_end]
+            elif box_end - payload <= self.max_moov_bytes:
+                rest, _ = self._fetch(url, len(head), box_end - len(head), proxies)
+                moov = (head + rest)[payload:box_end]
+            break
+        else:
+            # moov after mdat: jump over the boxes we can size from the first chunk
+            offset = 0
+            for box_type, payload, box_end in iter_boxes(head, 0, 2 ** 63):
+                offset = box_end
+            if total is None or offset >= total:
+                return None
+            header, _ = self._fetch(url, offset, 16, proxies)
+            for box_type, payload, box_end in iter_boxes(header, 0, 2 ** 63):
+                if box_type == b'moov' and box_end - payload <= self.max_moov_bytes:
+                    body, _ = self._fetch(url, offset + payload, box_end - payload, proxies)
+                    moov = body
+                break
+        if moov is None:
+            return None
+
+        info = parse_moov(moov)
+        info['size'] = total
+        info['bitrate'] = int(total * 8 / info['duration']) if total and info['duration'] else None
+        return info
+
+    def probe(self, url, proxies=None):
+        """Metadata dict (duration, width, height, size, bitrate) for an MP4 URL, or None
+
+        ``proxies`` (requests format) routes this probe's range reads, e.g. through the
+        proxy of the scrape that found the URL; the session's proxies apply otherwise.
+        """
+        if not url or not url.startswith(('http://', 'https://')):
+            return None
+        url = full_file_url(url)
+        key = cache_key(url)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        try:
+            info = self._probe(url, proxies)
+        except (requests.RequestException, ValueError, struct.error) as e:
+            logger.warning("Media probe failed for %s: %s", key, e)
+            return None
+        if info is not None:
+            with self._lock:
+                self._cache[key] = info
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return info
+
+    def submit(self, url, proxies=None):
+        """Probe in the background; returns a future"""
+        return submit_in_context(self._executor, self.probe, url, proxies)
+
+    def probe_many(self, urls, proxies=None):
+        """Probe several URLs concurrently; returns {url: metadata or None}"""
+        unique = list(dict.fromkeys(u for u in urls if u))
+        futures = {url: self.submit(url, proxies) for url in unique}
+        return {url: future.result() for url, future in futures.items()}
@@ -3,24 +3,17 @@
 import sys
 import json
 import logging
+import os
 import subprocess
 import time
 from scraper import FacebookReelScraper
+from structured_logging import configure_logging
+from sinks import sinks_from_env
 
 def setup_logger():
-    """Setup logger with timestamp and formatting"""
-    logger = logging.getLogger('FacebookReelScraper')
-    logger.setLevel(logging.INFO)
-    
-    # Create console handler with formatting
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    ch.setFormatter(formatter)
-    
-    # Add handler to logger
-    logger.addHandler(ch)
-    return logger
+    """Setup logging (plain text unless LOG_FORMAT says otherwise) and return the scraper logger"""
+    configure_logging(fmt=os.getenv('LOG_FORMAT', 'text'))
+    return logging.getLogger('FacebookReelScraper')
 
 def install_playwright_browsers():
     """Install Playwright browsers"""
@@ -30,7 +23,7 @@ def install_playwright_browsers():
         subprocess.run(['playwright', 'install', 'chromium'], check=True, capture_output=True)
         logger.info("Playwright browsers installed successfully")
     except subprocess.CalledProcessError as e:
-        logger.error(f"Failed to install Playwright browsers: {str(e)}")
+        logger.error("Failed to install Playwright browsers: %s", e)
         logger.info("Continuing anyway - browsers might already be installed")
     except FileNotFoundError:
         logger.warning("Playwright not found in PATH. Make sure it's installed: pip install playwright")
@@ -50,12 +43,15 @@ def main():
         sys.exit(1)
         
     url = sys.argv[1]
-    logger.info(f"Processing URL: {url}")
+    logger.info("Processing URL: %s", url)
     
     # Initialize scraper with both modes - use single instances
     logger.info("Initializing scrapers...")
-    scraper_authenticated = FacebookReelScraper(use_cookies=True, auto_login=True)
-    scraper_public = FacebookReelScraper(use_cookies=False)
+    # The accepted result also goes to the output sinks configured with SINK_* environment variables;
+    # the chain stops at the first method that returns one, so it is written once
+    sinks = sinks_from_env()
+    scraper_authenticated = FacebookReelScraper(use_cookies=True, auto_login=True, sinks=sinks)
+    scraper_public = FacebookReelScraper(use_cookies=False, sinks=sinks)
     
     try:
         # Try authenticated scraping first
@@ -65,13 +61,13 @@ def main():
         auth_time = time.time() - start_time
         
         if reel_data:
-            logger.info(f"✅ Successfully scraped reel data (authenticated) in {auth_time:.2f}s")
+            logger.info("✅ Successfully scraped reel data (authenticated) in %.2fs", auth_time)
             print("\n" + "="*60)
             print("SCRAPED DATA (Authenticated)")
             print("="*60)
-            print(json.dumps(reel_data, indent=2))
+            print(json.dumps(reel_data.to_dict(), indent=2))
         else:
-            logger.warning(f"Authenticated scraping failed after {auth_time:.2f}s, trying public scraping...")
+            logger.warning("Authenticated scraping failed after %.2fs, trying public scraping...", auth_time)
             
             # Try public scraping as fallback
             start_time = time.time()
@@ -79,13 +75,13 @@ def main():
             public_time = time.time() - start_time
             
             if reel_data:
-                logger.info(f"✅ Successfully scraped reel data (public) in {public_time:.2f}s")
+                logger.info("✅ Successfully scraped reel data (public) in %.2fs", public_time)
                 print("\n" + "="*60)
                 print("SCRAPED DATA (Public)")
                 print("="*60)
-                print(json.dumps(reel_data, indent=2))
+                print(json.dumps(reel_data.to_dict(), indent=2))
             else:
-                logger.warning(f"Public scraping also failed after {public_time:.2f}s, trying quick scrape...")
+                logger.warning("Public scraping also failed after %.2fs, trying quick scrape...", public_time)
                 
                 # Try quick scrape as last resort
                 start_time = time.time()
@@ -93,13 +89,13 @@ def main():
                 quick_time = time.time() - start_time
                 
                 if reel_data:
-                    logger.info(f"✅ Successfully scraped reel data (quick mode) in {quick_time:.2f}s")
+                    logger.info("✅ Successfully scraped reel data (quick mode) in %.2fs", quick_time)
                     print("\n" + "="*60)
                     print("SCRAPED DATA (Quick Mode)")
                     print("="*60)
-                    print(json.dumps(reel_data, indent=2))
+                    print(json.dumps(reel_data.to_dict(), indent=2))
                 else:
-                    logger.error(f"❌ All scraping methods failed")
+                    logger.error("❌ All scraping methods failed")
                     print("\n" + "="*60)
                     print("SCRAPING FAILED")
                     print("="*60)
@@ -135,7 +131,7 @@ def main():
         print("\nScraping interrupted by user")
         sys.exit(1)
     except Exception as e:
-        logger.error(f"Error occurred: {str(e)}")
+        logger.error("Error occurred: %s", e)
         print(f"\nError: {str(e)}")
         print("\nIf you're seeing subprocess errors, try:")
         print("1. Restarting the script")
@@ -143,6 +139,8 @@ def main():
         print("3. Verifying the URL is accessible")
         sys.exit(1)
     finally:
+        if sinks is not None:
+            sinks.close()
         logger.info("Scraping process completed")
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+"""Creator-level crawl: enumerate the reels on a profile's reels tab.
+
+The grid is walked with incremental scrolling; each round returns only the
+reel tiles rendered since the previous one, so reel IDs (with the view count
+shown on the tile) are streamed as the grid loads.
+"""
+import logging
+import re
+import time
+from urllib.parse import parse_qs, quote
+
+from urls import FACEBOOK_HOST, _parse, is_short_link, reel_id_from_url
+
+logger = logging.getLogger(__name__)
+
+# Returns reel tiles not seen by an earlier round; needs normalizeCount() in scope
+COLLECT_REELS_JS = '''() => {
+    const out = [];
+    for (const a of document.querySelectorAll('a[href*="/reel/"]')) {
+        if (a.dataset.crawled) continue;
+        a.dataset.crawled = '1';
+        const match = a.href.match(/\\/reel\\/(\\d+)/);
+        if (!match) continue;
+        let views = null;
+        for (const span of a.querySelectorAll('span')) {
+            const number = normalizeCount(span.textContent);
+            if (number !== null) {
+                views = number;
+                break;
+            }
+        }
+        out.push({reel_id: match[1], url: a.href.split('?')[0], views: views});
+    }
+    window.scrollBy(0, window.innerHeight * 2);
+    return out;
+}'''
+
+
+# First path segments of facebook.com URLs that are not profiles
+NON_PROFILE_PATHS = {
+    'reel', 'reels', 'watch', 'video.php', 'videos', 'share', 'story.php', 'stories', 'photo.php', 'photo',
+    'groups', 'events', 'marketplace', 'gaming', 'hashtag', 'search', 'login', 'login.php', 'l.php',
+    'permalink.php', 'pages', 'help', 'settings', 'messages', 'notifications', 'friends', 'home.php',
+}
+VANITY_NAME = re.compile(r'^[A-Za-z0-9.\-_]+$')
+
+
+def reels_tab_url(profile_url):
+    """URL of a creator's reels tab for a profile URL (vanity, /people/<name>/<id> or profile.php?id=)
+
+    Raises ValueError for anything that is not a facebook.com profile, including reel and watch URLs.
+    """
+    if not profile_url or not isinstance(profile_url, str):
+        raise ValueError("Missing profile URL")
+    parsed = _parse(profile_url)
+    host = (parsed.hostname or '').lower()
+    if not FACEBOOK_HOST.match(host):
+        raise ValueError(f"Not a Facebook URL: {profile_url}")
+    if reel_id_from_url(profile_url) or is_short_link(profile_url):
+        raise ValueError(f"Reel or video URL, not a profile: {profile_url}")
+
+    segments = [s for s in parsed.path.split('/') if s]
+    if segments and segments[-1] in ('reels', 'videos', 'reels_tab'):
+        segments.pop()
+    if segments == ['profile.php']:
+        profile_id = parse_qs(parsed.query).get('id', [''])[0]
+        if not profile_id.isdigit():
+            raise ValueError(f"profile.php URL without a numeric id: {profile_url}")
+        return f"https://web.facebook.com/profile.php?id={profile_id}&sk=reels_tab"
+    if len(segments) == 3 and segments[0] == 'people' and segments[2].isdigit():
+        return f"https://web.facebook.com/people/{quote(segments[1])}/{segments[2]}/reels/"
+    if len(segments) == 1 and VANITY_NAME.match(segments[0]) and segments[0].lower() not in NON_PROFILE_PATHS:
+        return f"https://web.facebook.com/{segments[0]}/reels/"
+    raise ValueError(f"Not a profile URL: {profile_url}")
+
+
+class ProfileReelCrawler:
+    """Stream reel tiles from an open reels-tab page"""
+
+    def __init__(self, page, count_normalizer_js, round_wait_ms=1000, idle_rounds=3):
+        self.page = page
+        self.script = '() => {\n' + count_normalizer_js + '\nreturn (' + COLLECT_REELS_JS + ')();\n}'
+        self.round_wait_ms = round_wait_ms
+        # Stop after this many scrolls in a row that rendered no new tiles
+        self.idle_rounds = idle_rounds
+
+    def crawl(self, limit=None, time_budget=None):
+        """Yield {'reel_id', 'url', 'views'} dicts until limit, time budget, or the end of the grid"""
+        deadline = time.monotonic() + time_budget if time_budget else None
+        seen = set()
+        idle = 0
+
+        while True:
+            try:
+                tiles = self.page.evaluate(self.script)
+            except Exception as e:
+                logger.warning("Reel grid collection failed: %s", e)
+                return
+
+            new = 0
+            for tile in tiles:
+                if tile['reel_id'] in seen:
+                    continue
+                seen.add(tile['reel_id'])
+                new += 1
+                yield tile
+                if limit is not None and len(seen) >= limit:
+                    return
+
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.info("Profile crawl time budget spent after %d reels", len(seen))
+                return
+            idle = 0 if new else idle + 1
+            if idle >= self.idle_rounds:
+                logger.info("Reached the end of the reels grid after %d reels", len(seen))
+                return
+            self.page.wait_for_timeout(self.round_wait_ms)
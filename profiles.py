@@ -0,0 +1,289 @@
+"""Persistent Chromium profiles with an on-disk HTTP cache.
+
+A ``ProfilePool`` hands out user-data-dirs under one root, each locked
+(``flock``) by the process that uses it, so gunicorn workers and threads never
+share a profile. Each profile keeps its HTTP disk cache in ``<profile>/cache``,
+capped by ``--disk-cache-size`` (Chromium evicts within a profile). The pool
+also caps the total cache size and deletes the caches of the least recently
+used idle profiles when the cap is exceeded.
+
+Chromium's disk cache cannot be shared by concurrently running browsers, so
+"shared" here means a pool of warm caches reused across scrapes. Everything
+else a profile stores (cookies, localStorage, IndexedDB, service workers) is
+cleared before each scrape, and eviction runs in a background thread.
+
+``CacheStats`` counts, per scrape, how many responses and bytes came from the
+disk cache versus the network, using CDP Network events.
+"""
+import fcntl
+import logging
+import os
+import shutil
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = 'cache'
+LAST_USED_FILE = '.last_used'
+
+
+class Profile:
+    """A locked user-data-dir"""
+
+    def __init__(self, pool, path, lock_fd, cold):
+        self.pool = pool
+        self.path = path
+        self.cache_dir = os.path.join(path, CACHE_DIR)
+        self._lock_fd = lock_fd
+        # True when the profile has no cache yet (new, or its cache was evicted)
+        self.cold = cold
+
+    def release(self):
+        if self._lock_fd is None:
+            return
+        try:
+            with open(os.path.join(self.path, LAST_USED_FILE), 'w') as f:
+                f.write(str(time.time()))
+        except OSError:
+            pass
+        fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        os.close(self._lock_fd)
+        self._lock_fd = None
+        self.pool.profile_released()
+
+
+class ProfilePool:
+    """Per-worker persistent profiles with a pool-wide disk cache cap"""
+
+    def __init__(self, root='browser_profiles', size=8, cache_size_mb=256, max_total_cache_mb=2048,
+                 acquire_timeout=30, evict_interval=60):
+        self.root = root
+        # Profiles per kind ('public', 'auth'); at most this many browsers use persistent profiles at once
+        self.size = size
+        self.cache_size = cache_size_mb * 1024 * 1024
+        self.max_total_cache = max_total_cache_mb * 1024 * 1024
+        self.acquire_timeout = acquire_timeout
+        self.evict_interval = evict_interval
+        self._last_evict = 0.0
+        self._evicting = False
+        self._lock = threading.Lock()
+        self._totals = {'scrapes': 0, 'cache_hits': 0, 'cache_hit_bytes': 0, 'network_bytes': 0, 'evictions': 0}
+        os.makedirs(root, exist_ok=True)
+
+    def _try_lock(self, path):
+        os.makedirs(path, exist_ok=True)
+        fd = os.open(os.path.join(path, '.lock'), os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def acquire(self, kind='public'):
+        """Lock a free profile of the given kind; returns a Profile, or None if none frees up in time"""
+        self.evict_in_background()
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            for n in range(self.size):
+                path = os.path.join(self.root, f"{kind}-{n}")
+                fd = self._try_lock(path)
+                if fd is not None:
+                    cold = not os.path.isdir(os.path.join(path, CACHE_DIR))
+                    return Profile(self, path, fd, cold)
+            if time.monotonic() >= deadline:
+                logger.warning("No free %s browser profile after %ds", kind, self.acquire_timeout)
+                return None
+            time.sleep(0.2)
+
+    def launch_args(self, profile):
+        """Chromium flags that put the profile's HTTP cache in its cache dir with the per-profile cap"""
+        return [f"--disk-cache-dir={profile.cache_dir}", f"--disk-cache-size={self.cache_size}"]
+
+    def profile_released(self):
+        self.evict_in_background()
+
+    def evict_in_background(self):
+        """Start maybe_evict in a thread when due, so walking the cache dirs never delays a scrape"""
+        with self._lock:
+            if self._evicting or time.monotonic() - self._last_evict < self.evict_interval:
+                return
+            self._evicting = True
+
+        def evict():
+            try:
+                self.maybe_evict()
+            except Exception as e:
+                logger.warning("Browser cache eviction failed: %s", e)
+            finally:
+                with self._lock:
+                    self._evicting = False
+        threading.Thread(target=evict, name='profile-evict', daemon=True).start()
+
+    @staticmethod
+    def _dir_size(path):
+        total = 0
+        for directory, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(directory, name))
+                except OSError:
+                    pass
+        return total
+
+    def maybe_evict(self, force=False):
+        """Delete caches of least recently used idle profiles while the total exceeds max_total_cache"""
+        with self._lock:
+            if not force and time.monotonic() - self._last_evict < self.evict_interval:
+                return 0
+            self._last_evict = time.monotonic()
+
+        profiles = []
+        total = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            cache_dir = os.path.join(path, CACHE_DIR)
+            if not os.path.isdir(cache_dir):
+                continue
+            size = self._dir_size(cache_dir)
+            total += size
+            try:
+                last_used = float(open(os.path.join(path, LAST_USED_FILE)).read())
+            except (OSError, ValueError):
+                last_used = 0.0
+            profiles.append((last_used, path, size))
+
+        evicted = 0
+        for last_used, path, size in sorted(profiles):
+            if total <= self.max_total_cache:
+                break
+            fd = self._try_lock(path)
+            if fd is None:
+                continue  # in use
+            try:
+                shutil.rmtree(os.path.join(path, CACHE_DIR), ignore_errors=True)
+                total -= size
+                evicted += 1
+                logger.info("Evicted browser cache of %s (%d bytes)", path, size)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+        if evicted:
+            with self._lock:
+                self._totals['evictions'] += evicted
+        return evicted
+
+    def record(self, stats):
+        """Add one scrape's CacheStats summary to the pool totals"""
+        with self._lock:
+            self._totals['scrapes'] += 1
+            for key in ('cache_hits', 'cache_hit_bytes', 'network_bytes'):
+                self._totals[key] += stats.get(key, 0)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._totals)
+
+
+class PersistentBrowser:
+    """Browser-like wrapper over launch_persistent_context, so callers keep the launch -> new_context -> close flow"""
+
+    WARMUP_URL = 'https://web.facebook.com/'
+    # Origins whose site data is wiped before every scrape
+    STORAGE_ORIGINS = ('https://web.facebook.com', 'https://www.facebook.com', 'https://m.facebook.com',
+                       'https://facebook.com')
+    # Every Storage.clearDataForOrigin type except 'cache' (the HTTP cache the profile exists for)
+    STORAGE_TYPES = ('cookies,local_storage,indexeddb,websql,service_workers,cache_storage,file_systems,'
+                     'shader_cache')
+
+    def __init__(self, chromium, profile, launch_options, warmup=False):
+        self.chromium = chromium
+        self.profile = profile
+        self.launch_options = launch_options
+        # Load the origin first so a cold profile fetches the shared static bundles once
+        self.warmup = warmup
+        self.context = None
+        # Error paths that never call close() must not keep the profile locked
+        weakref.finalize(self, profile.release)
+
+    def new_context(self, **options):
+        if self.context is not None:
+            raise RuntimeError("A persistent browser has a single context")
+        self.context = self.chromium.launch_persistent_context(self.profile.path, **self.launch_options, **options)
+        try:
+            # Start every scrape with the same site data as a fresh browser; only the HTTP cache persists
+            self.clear_site_data()
+            if self.warmup:
+                page = self.context.pages[0] if self.context.pages else self.context.new_page()
+                started = time.monotonic()
+                try:
+                    page.goto(self.WARMUP_URL, wait_until='domcontentloaded', timeout=15000)
+                    logger.info("Warmed up %s in %.2fs", self.profile.path, time.monotonic() - started)
+                except Exception as e:
+                    logger.warning("Warmup navigation failed: %s", e)
+                self.clear_site_data()
+        except Exception:
+            self.close()
+            raise
+        return self.context
+
+    def clear_site_data(self):
+        """Clear cookies, localStorage, IndexedDB, service workers and other site storage, keeping the HTTP cache"""
+        self.context.clear_cookies()
+        page = self.context.pages[0] if self.context.pages else self.context.new_page()
+        session = self.context.new_cdp_session(page)
+        try:
+            for origin in self.STORAGE_ORIGINS:
+                session.send('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': self.STORAGE_TYPES})
+        finally:
+            session.detach()
+
+    def close(self):
+        try:
+            if self.context is not None:
+                self.context.close()
+        except Exception as e:
+            # Callers often close the context themselves first
+            logger.debug("Persistent context already closed: %s", e)
+        finally:
+            self.profile.release()
+
+
+class CacheStats:
+    """Disk-cache vs network bytes for the requests of one page, from CDP Network events"""
+
+    def __init__(self, context, page):
+        self.responses = 0
+        self.cache_hits = 0
+        self.cache_hit_bytes = 0
+        self.network_bytes = 0
+        self._cached = set()
+        self._session = context.new_cdp_session(page)
+        self._session.on('Network.responseReceived', self._on_response)
+        self._session.on('Network.dataReceived', self._on_data)
+        self._session.on('Network.loadingFinished', self._on_finished)
+        self._session.send('Network.enable')
+
+    def _on_response(self, event):
+        self.responses += 1
+        if event.get('response', {}).get('fromDiskCache'):
+            self.cache_hits += 1
+            self._cached.add(event['requestId'])
+
+    def _on_data(self, event):
+        if event['requestId'] in self._cached:
+            self.cache_hit_bytes += event.get('dataLength', 0)
+
+    def _on_finished(self, event):
+        if event['requestId'] not in self._cached:
+            self.network_bytes += int(event.get('encodedDataLength', 0))
+
+    def summary(self):
+        return {
+            'responses': self.responses,
+            'cache_hits': self.cache_hits,
+            'cache_hit_bytes': self.cache_hit_bytes,
+            'network_bytes': self.network_bytes,
+        }
@@ -0,0 +1,162 @@
+"""Proxy pool with latency-weighted selection and health tracking.
+
+Each proxy keeps a rolling (EWMA) latency and success score. Selection is
+weighted random by success rate over latency, so fast healthy proxies carry
+most of the traffic while slower ones still get probed. Proxies that fail
+repeatedly are quarantined for a cooldown that grows with each quarantine.
+Sessions (e.g. a logged-in account) can be pinned to one proxy so the
+account is always seen from the same IP.
+
+Any HTTP/SOCKS proxy URL works, including local stand-ins
+(e.g. ``SCRAPER_PROXIES=http://127.0.0.1:8081,http://127.0.0.1:8082``).
+"""
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class Proxy:
+    """One proxy endpoint and its rolling health statistics"""
+
+    def __init__(self, url):
+        parsed = urlparse(url if '://' in url else f"http://{url}")
+        if not parsed.hostname or not parsed.port:
+            raise ValueError(f"Proxy URL needs a host and port: {url}")
+        self.server = f"{parsed.scheme}://{parsed.hostname}:{parsed.port}"
+        self.username = parsed.username
+        self.password = parsed.password
+        self.latency = None          # EWMA of successful request latency, seconds
+        self.success_rate = 1.0      # EWMA of outcomes (1 = success, 0 = failure)
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.quarantines = 0
+        self.quarantined_until = 0.0
+
+    def to_playwright(self):
+        """Proxy settings for chromium.launch / browser.new_context"""
+        settings = {'server': self.server}
+        if self.username:
+            settings['username'] = self.username
+            settings['password'] = self.password or ''
+        return settings
+
+    def to_requests(self):
+        """Proxy settings for requests"""
+        parsed = urlparse(self.server)
+        auth = f"{self.username}:{self.password or ''}@" if self.username else ''
+        url = f"{parsed.scheme}://{auth}{parsed.hostname}:{parsed.port}"
+        return {'http': url, 'https': url}
+
+    def is_quarantined(self, now=None):
+        return (now or time.time()) < self.quarantined_until
+
+    def stats(self):
+        return {
+            'server': self.server,
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'success_rate': round(self.success_rate, 3),
+            'requests': self.requests,
+            'failures': self.failures,
+            'quarantined': self.is_quarantined(),
+            'quarantined_until': self.quarantined_until or None,
+        }
+
+
+class ProxyPool:
+    """Weighted proxy selection with quarantine and session pinning"""
+
+    def __init__(self, proxies, alpha=0.3, quarantine_after=3, quarantine_seconds=120,
+                 max_quarantine_seconds=1800, default_latency=1.0, rng=None):
+        self.proxies = [p if isinstance(p, Proxy) else Proxy(p) for p in proxies]
+        if not self.proxies:
+            raise ValueError("ProxyPool needs at least one proxy")
+        self.alpha = alpha
+        self.quarantine_after = quarantine_after
+        self.quarantine_seconds = quarantine_seconds
+        self.max_quarantine_seconds = max_quarantine_seconds
+        # Assumed latency for proxies without successful requests yet
+        self.default_latency = default_latency
+        self.rng = rng or random.Random()
+        self._pins = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, var='SCRAPER_PROXIES', **kwargs):
+        """Pool from a comma-separated list of proxy URLs in the environment, or None if unset"""
+        value = os.getenv(var, '').strip()
+        if not value:
+            return None
+        return cls([url.strip() for url in value.split(',') if url.strip()], **kwargs)
+
+    def weight(self, proxy):
+        latency = proxy.latency if proxy.latency is not None else self.default_latency
+        # Keep a floor so a proxy that recovered from failures still gets traffic to prove it
+        return max(proxy.success_rate, 0.05) / max(latency, 0.01)
+
+    def acquire(self, session=None):
+        """Pick a proxy; a session keeps its pinned proxy while that proxy is healthy"""
+        now = time.time()
+        with self._lock:
+            if session is not None:
+                pinned = self._pins.get(session)
+                if pinned is not None and not pinned.is_quarantined(now):
+                    return pinned
+
+            healthy = [p for p in self.proxies if not p.is_quarantined(now)]
+            if healthy:
+                proxy = self.rng.choices(healthy, weights=[self.weight(p) for p in healthy])[0]
+            else:
+                # Everything is quarantined: use the proxy that comes back soonest
+                proxy = min(self.proxies, key=lambda p: p.quarantined_until)
+
+            if session is not None:
+                if session in self._pins and self._pins[session] is not proxy:
+                    logger.info("Re-pinning session to proxy %s", proxy.server)
+                self._pins[session] = proxy
+            return proxy
+
+    def report(self, proxy, success, latency=None):
+        """Record the outcome of a request made through a proxy"""
+        if proxy is None:
+            return
+        with self._lock:
+            proxy.requests += 1
+            proxy.success_rate += self.alpha * ((1.0 if success else 0.0) - proxy.success_rate)
+            if success:
+                proxy.consecutive_failures = 0
+                if proxy.quarantines and not proxy.is_quarantined():
+                    proxy.quarantines = max(0, proxy.quarantines - 1)
+                if latency is not None:
+                    proxy.latency = latency if proxy.latency is None else proxy.latency + self.alpha * (latency - proxy.latency)
+                return
+
+            proxy.failures += 1
+            proxy.consecutive_failures += 1
+            if proxy.consecutive_failures >= self.quarantine_after:
+                cooldown = min(self.quarantine_seconds * 2 ** proxy.quarantines, self.max_quarantine_seconds)
+                proxy.quarantined_until = time.time() + cooldown
+                proxy.quarantines += 1
+                proxy.consecutive_failures = 0
+                logger.warning("Quarantining proxy %s for %ds after repeated failures", proxy.server, cooldown)
+
+    def check(self, proxy, url='https://web.facebook.com/', timeout=10):
+        """Probe a proxy with a plain HTTP request and record the outcome; returns success"""
+        import requests
+        started = time.monotonic()
+        try:
+            response = requests.head(url, proxies=proxy.to_requests(), timeout=timeout, allow_redirects=False)
+            success = response.status_code < 500
+        except requests.RequestException:
+            success = False
+        self.report(proxy, success, time.monotonic() - started if success else None)
+        return success
+
+    def stats(self):
+        with self._lock:
+            return [p.stats() for p in self.proxies]
@@ -0,0 +1,229 @@
+"""ReelRecord: one typed, compact record type for every scraping tier.
+
+All tiers fill the same schema (``FIELDS``); fields a tier cannot produce
+stay None. Records use ``__slots__``, so a bulk run holds one small object
+per reel instead of a dict with dozens of repeated keys. They still behave
+as read-only mappings (``record['likes']``, ``record.get('views')``,
+``dict(record)``), so existing consumers keep working.
+
+Serializers:
+
+- ``to_json()``: compact JSON (no whitespace)
+- ``write_ndjson()`` / ``read_ndjson()``: one compact JSON object per line
+- ``write_binary()`` / ``read_binary()``: length-prefixed binary records
+  behind a header that names the schema fields, so files stay readable after
+  the schema grows
+"""
+import collections.abc
+import json
+import struct
+
+# Stable field order shared by all tiers, serializers and the binary format
+FIELDS = (
+    'url', 'post_id', 'shortcode', 'content_id', 'product_type',
+    'user_posted', 'user_profile_url', 'description', 'hashtags', 'date_posted',
+    'num_comments', 'shares', 'likes', 'views', 'video_play_count', 'views_source',
+    'top_comments',
+    'video_url', 'thumbnail', 'length', 'video_width', 'video_height', 'video_bitrate', 'video_size',
+    'audio_url', 'coauthor_producers', 'tagged_users',
+    'posts_count', 'followers', 'following', 'is_paid_partnership', 'is_verified',
+    'snapshot_timestamp',
+)
+_FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+BINARY_MAGIC = b'REELREC1'
+
+# Binary value tags
+_NONE, _INT, _FLOAT, _STR, _FALSE, _TRUE, _JSON = range(7)
+_INT_STRUCT = struct.Struct('<q')
+_FLOAT_STRUCT = struct.Struct('<d')
+_LEN_STRUCT = struct.Struct('<I')
+
+
+class ReelRecord(collections.abc.Mapping):
+    """Scrape result for one reel with a fixed schema; a projection limits which fields it exposes"""
+
+    __slots__ = FIELDS + ('_fields',)
+
+    def __init__(self, fields=None, **values):
+        for name in FIELDS:
+            setattr(self, name, values.pop(name, None))
+        if values:
+            raise TypeError(f"Unknown ReelRecord fields: {', '.join(sorted(values))}")
+        # Exposed field names in schema order, or None for all of them
+        self._fields = None
+        if fields is not None:
+            self.project(fields)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Record from a reel_data dict (unknown keys are ignored)"""
+        return cls(**{k: v for k, v in data.items() if k in _FIELD_INDEX})
+
+    def project(self, fields, keep=()):
+        """Expose only the given fields (plus ``keep``); None exposes everything. Returns self"""
+        if fields is None:
+            self._fields = None
+        else:
+            wanted = set(fields) | set(keep)
+            self._fields = tuple(name for name in FIELDS if name in wanted)
+        return self
+
+    @property
+    def fields(self):
+        return FIELDS if self._fields is None else self._fields
+
+    @property
+    def projected(self):
+        """Whether a projection hides some schema fields"""
+        return len(self.fields) < len(FIELDS)
+
+    # Mapping interface
+    def __getitem__(self, key):
+        if key not in _FIELD_INDEX or (self._fields is not None and key not in self._fields):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in _FIELD_INDEX:
+            raise KeyError(key)
+        setattr(self, key, value)
+        if self._fields is not None and key not in self._fields:
+            self.project(self._fields + (key,))
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __repr__(self):
+        return f"ReelRecord(post_id={self.post_id!r}, url={self.url!r})"
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in FIELDS), self._fields
+
+    def __setstate__(self, state):
+        values, self._fields = state
+        for name, value in zip(FIELDS, values):
+            setattr(self, name, value)
+
+    # Serializers
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.fields}
+
+    def to_json(self):
+        """Compact JSON object"""
+        return json.dumps(self.to_dict(), separators=(',', ':'), ensure_ascii=False)
+
+    def to_bytes(self):
+        """Binary body: exposed-field bitmap, then one tagged value per exposed field"""
+        mask = 0
+        parts = []
+        for name in self.fields:
+            mask |= 1 << _FIELD_INDEX[name]
+            parts.append(_encode_value(getattr(self, name)))
+        return mask.to_bytes(8, 'little') + b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data, field_names=FIELDS):
+        """Record from to_bytes output; field_names is the schema the data was written with"""
+        mask = int.from_bytes(data[:8], 'little')
+        offset = 8
+        values = {}
+        present = []
+        for i, name in enumerate(field_names):
+            if not mask >> i & 1:
+                continue
+            value, offset = _decode_value(data, offset)
+            if name in _FIELD_INDEX:
+                values[name] = value
+                present.append(name)
+        record = cls(**values)
+        if len(present) < len(FIELDS):
+            record.project(present)
+        return record
+
+
+def _encode_value(value):
+    if value is None:
+        return bytes((_NONE,))
+    if value is True or value is False:
+        return bytes((_TRUE if value else _FALSE,))
+    if isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+        return bytes((_INT,)) + _INT_STRUCT.pack(value)
+    if isinstance(value, float):
+        return bytes((_FLOAT,)) + _FLOAT_STRUCT.pack(value)
+    if isinstance(value, str):
+        tag, raw = _STR, value.encode('utf-8')
+    else:
+        tag, raw = _JSON, json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return bytes((tag,)) + _LEN_STRUCT.pack(len(raw)) + raw
+
+
+def _decode_value(data, offset):
+    tag = data[offset]
+    offset += 1
+    if tag == _NONE:
+        return None, offset
+    if tag in (_TRUE, _FALSE):
+        return tag == _TRUE, offset
+    if tag == _INT:
+        return _INT_STRUCT.unpack_from(data, offset)[0], offset + 8
+    if tag == _FLOAT:
+        return _FLOAT_STRUCT.unpack_from(data, offset)[0], offset + 8
+    length = _LEN_STRUCT.unpack_from(data, offset)[0]
+    offset += 4
+    raw = bytes(data[offset:offset + length]).decode('utf-8')
+    return (raw if tag == _STR else json.loads(raw)), offset + length
+
+
+def json_default(value):
+    """``default=`` hook for json.dumps so records nest inside other JSON documents"""
+    if isinstance(value, ReelRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def write_ndjson(records, fp):
+    """Write records to a text file as NDJSON; returns the number written"""
+    count = 0
+    for record in records:
+        fp.write(record.to_json())
+        fp.write('\n')
+        count += 1
+    return count
+
+
+def read_ndjson(fp):
+    """Yield ReelRecords from an NDJSON text file"""
+    for line in fp:
+        if line.strip():
+            data = json.loads(line)
+            yield ReelRecord.from_dict(data).project(data.keys())
+
+
+def write_binary(records, fp):
+    """Write records to a binary file (header with the schema, then length-prefixed records)"""
+    names = '\n'.join(FIELDS).encode('utf-8')
+    fp.write(BINARY_MAGIC + _LEN_STRUCT.pack(len(names)) + names)
+    count = 0
+    for record in records:
+        body = record.to_bytes()
+        fp.write(_LEN_STRUCT.pack(len(body)) + body)
+        count += 1
+    return count
+
+
+def read_binary(fp):
+    """Yield ReelRecords from a file written by write_binary"""
+    if fp.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("Not a ReelRecord binary file")
+    length = _LEN_STRUCT.unpack(fp.read(4))[0]
+    field_names = fp.read(length).decode('utf-8').split('\n')
+    while True:
+        header = fp.read(4)
+        if len(header) < 4:
+            return
+        body = fp.read(_LEN_STRUCT.unpack(header)[0])
+        yield ReelRecord.from_bytes(body, field_names)
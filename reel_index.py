@@ -0,0 +1,210 @@
+"""On-disk inverted index of scraped reels.
+
+Every successful scrape is upserted into an SQLite database: one row per reel
+(creator, post time, counters and the full record as JSON) plus one row per
+(hashtag, reel) pair. Queries by hashtag, creator and post time with sorting by
+a counter are answered from the indexes without touching the scraper.
+
+Updates are incremental: a partial result (e.g. a field projection) only
+overwrites the fields it carries, and a reel's hashtags are replaced only when
+the result includes them.
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+
+from records import json_default
+
+logger = logging.getLogger(__name__)
+
+SORT_KEYS = ('likes', 'views', 'num_comments', 'shares', 'posted_at', 'scraped_at')
+
+# Indexed columns besides post_id, in table order
+COLUMNS = ('url', 'creator', 'user_posted', 'date_posted', 'posted_at',
+           'num_comments', 'shares', 'likes', 'views', 'scraped_at', 'data')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS reels (
+    post_id TEXT PRIMARY KEY,
+    url TEXT,
+    creator TEXT,
+    user_posted TEXT,
+    date_posted TEXT,
+    posted_at REAL,
+    num_comments INTEGER,
+    shares INTEGER,
+    likes INTEGER,
+    views INTEGER,
+    scraped_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reel_hashtags (
+    hashtag TEXT NOT NULL,
+    post_id TEXT NOT NULL,
+    PRIMARY KEY (hashtag, post_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS reels_creator ON reels (creator, posted_at);
+CREATE INDEX IF NOT EXISTS reels_posted_at ON reels (posted_at);
+CREATE INDEX IF NOT EXISTS reels_likes ON reels (likes);
+CREATE INDEX IF NOT EXISTS reels_views ON reels (views);
+CREATE INDEX IF NOT EXISTS reel_hashtags_post ON reel_hashtags (post_id);
+'''
+
+RELATIVE_TIME = re.compile(
+    r'^(\d+)\s*(s|sec|secs|second|seconds|m|min|mins|minute|minutes|h|hr|hrs|hour|hours|'
+    r'd|day|days|w|wk|wks|week|weeks|y|yr|yrs|year|years)(?:\s+ago)?$', re.IGNORECASE)
+RELATIVE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400, 'y': 365 * 86400}
+ABSOLUTE_FORMATS = ('%B %d, %Y', '%d %B %Y', '%B %d', '%d %B', '%Y-%m-%d', '%Y-%m-%dT%H:%M:%S')
+
+
+def normalize_hashtag(tag):
+    """'#Cats' -> 'cats'"""
+    return tag.strip().lstrip('#').lower()
+
+
+def creator_key(value):
+    """Stable creator key from a profile URL or a bare username/ID ('profile.php?id=N' -> 'N')"""
+    if not value:
+        return None
+    value = value.strip()
+    if '/' not in value and '.' not in value:
+        return value.lstrip('@').lower()
+    parsed = urlparse(value if '://' in value else f"https://{value}")
+    segments = [s for s in parsed.path.split('/') if s]
+    if not segments:
+        return None
+    if segments[0] == 'profile.php':
+        return parse_qs(parsed.query).get('id', [None])[0]
+    if segments[0] == 'people' and len(segments) >= 3:
+        return segments[2]
+    return segments[0].lower()
+
+
+def posted_timestamp(text, now=None):
+    """Unix time for a displayed post date ('3d', '5 hours ago', 'March 5, 2024', 'March 5 at 3:00 PM'), or None"""
+    if not text:
+        return None
+    now = time.time() if now is None else now
+    text = text.strip()
+    match = RELATIVE_TIME.match(text)
+    if match:
+        unit = match.group(2).lower()
+        # 'm' is minutes; months are shown as dates
+        return now - int(match.group(1)) * RELATIVE_UNITS[unit[0]]
+    text = re.split(r'\s+at\s+', text)[0]
+    for fmt in ABSOLUTE_FORMATS:
+        try:
+            posted = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if '%Y' not in fmt:
+            # Dates without a year are from the last twelve months
+            current = datetime.fromtimestamp(now)
+            posted = posted.replace(year=current.year)
+            if posted > current:
+                posted = posted.replace(year=current.year - 1)
+        return posted.timestamp()
+    return None
+
+
+class ReelIndex:
+    """SQLite index of scraped reels by hashtag, creator and post time"""
+
+    def __init__(self, path='reel_index.sqlite'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(SCHEMA)
+
+    def add(self, reel_data, scraped_at=None):
+        """Upsert one scrape result (ReelRecord or dict); returns False when it has no post_id"""
+        reel_data = dict(reel_data)
+        post_id = reel_data.get('post_id')
+        if not post_id:
+            logger.debug("Not indexing a result without post_id")
+            return False
+        scraped_at = time.time() if scraped_at is None else scraped_at
+
+        with self._lock, self._db:
+            row = self._db.execute('SELECT data, posted_at FROM reels WHERE post_id = ?', (post_id,)).fetchone()
+            merged = json.loads(row['data']) if row else {}
+            merged.update((k, v) for k, v in reel_data.items() if v is not None)
+            # Relative dates ('3d') drift, so keep the post time computed at the first sighting
+            posted_at = row['posted_at'] if row and row['posted_at'] is not None else posted_timestamp(
+                merged.get('date_posted'), scraped_at)
+            values = {
+                'url': merged.get('url'),
+                'creator': creator_key(merged.get('user_profile_url')),
+                'user_posted': merged.get('user_posted'),
+                'date_posted': merged.get('date_posted'),
+                'posted_at': posted_at,
+                'num_comments': merged.get('num_comments'),
+                'shares': merged.get('shares'),
+                'likes': merged.get('likes'),
+                'views': merged.get('views'),
+                'scraped_at': scraped_at,
+                'data': json.dumps(merged, default=json_default, ensure_ascii=False),
+            }
+            self._db.execute(
+                f"INSERT OR REPLACE INTO reels (post_id, {', '.join(COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' for _ in COLUMNS)})",
+                (post_id, *(values[c] for c in COLUMNS)))
+            if reel_data.get('hashtags') is not None:
+                self._db.execute('DELETE FROM reel_hashtags WHERE post_id = ?', (post_id,))
+                tags = {normalize_hashtag(t) for t in reel_data['hashtags'] if normalize_hashtag(t)}
+                self._db.executemany('INSERT INTO reel_hashtags (hashtag, post_id) VALUES (?, ?)',
+                                     [(tag, post_id) for tag in tags])
+        return True
+
+    def query(self, hashtag=None, creator=None, since=None, until=None, sort='likes', descending=True,
+              limit=50, offset=0):
+        """Indexed reels matching all given filters, as dicts with the stored record plus 'scraped_at'"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+        clauses, params = [], []
+        if hashtag:
+            clauses.append('post_id IN (SELECT post_id FROM reel_hashtags WHERE hashtag = ?)')
+            params.append(normalize_hashtag(hashtag))
+        if creator:
+            clauses.append('creator = ?')
+            params.append(creator_key(creator))
+        if since is not None:
+            clauses.append('posted_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('posted_at < ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        # Reels without the sort value go last either way
+        order = f"{sort} IS NULL, {sort} {'DESC' if descending else 'ASC'}, post_id"
+        sql = f"SELECT data, scraped_at FROM reels {where} ORDER BY {order} LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._db.execute(sql, (*params, int(limit), int(offset))).fetchall()
+        return [dict(json.loads(row['data']), scraped_at=row['scraped_at']) for row in rows]
+
+    def hashtags(self, limit=50):
+        """Most common hashtags as [(hashtag, reel count)]"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT hashtag, COUNT(*) AS n FROM reel_hashtags GROUP BY hashtag ORDER BY n DESC, hashtag LIMIT ?',
+                (int(limit),)).fetchall()
+        return [(row['hashtag'], row['n']) for row in rows]
+
+    def stats(self):
+        with self._lock:
+            reels = self._db.execute('SELECT COUNT(*) FROM reels').fetchone()[0]
+            creators = self._db.execute('SELECT COUNT(DISTINCT creator) FROM reels').fetchone()[0]
+            hashtags = self._db.execute('SELECT COUNT(DISTINCT hashtag) FROM reel_hashtags').fetchone()[0]
+        return {'reels': reels, 'creators': creators, 'hashtags': hashtags}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
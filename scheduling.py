@@ -0,0 +1,250 @@
+"""Per-client fair scheduling and quotas for scrape requests.
+
+Every scrape request takes one of ``capacity`` slots; a scrape abandoned by
+its request after a timeout keeps using capacity until its thread finishes.
+When slots are short,
+waiting requests are dispatched by start-time fair queuing: each client's
+share follows its weight times its priority-class weight, so a bulk backfill
+cannot starve interactive clients (and still progresses when they are idle).
+
+Per client, a token bucket limits the request rate, ``max_concurrent``
+limits requests in flight, and ``max_queued`` limits waiting requests.
+Requests over a limit are rejected with a retry-after hint instead of
+piling up.
+"""
+import contextlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of each priority class
+PRIORITY_WEIGHTS = {'interactive': 8.0, 'bulk': 1.0}
+
+
+class QuotaExceeded(Exception):
+    """Client is over a rate, concurrency or queue limit (HTTP 429)"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueTimeout(Exception):
+    """Request waited too long for a slot (HTTP 503)"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ClientPolicy:
+    """Scheduling weight and quotas for one client"""
+
+    def __init__(self, name, weight=1.0, priority='interactive', max_concurrent=4, max_queued=16,
+                 rate=None, burst=None):
+        if priority not in PRIORITY_WEIGHTS:
+            raise ValueError(f"Unknown priority class {priority!r}")
+        self.name = name
+        self.weight = float(weight)
+        self.priority = priority
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        # Requests per second (None for no rate limit) and bucket size
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, math.ceil(rate or 1))
+
+    @classmethod
+    def from_dict(cls, name, data):
+        return cls(name=data.get('name', name), **{k: v for k, v in data.items() if k != 'name'})
+
+
+def load_policies(value):
+    """{api_key: ClientPolicy} from JSON text or a path to a JSON file; the '*' entry is the default policy"""
+    if not value:
+        return {}
+    if os.path.exists(value):
+        with open(value, 'r') as f:
+            value = f.read()
+    data = json.loads(value)
+    policies = {key: ClientPolicy.from_dict(key if key != '*' else 'anonymous', entry) for key, entry in data.items()}
+    names = [policy.name for policy in policies.values()]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate client names in policies: {', '.join(duplicates)}")
+    return policies
+
+
+class _Client:
+    def __init__(self, policy):
+        self.policy = policy
+        self.tokens = float(policy.burst)
+        self.refilled_at = time.monotonic()
+        self.in_flight = 0
+        self.queued = 0
+        self.finish_tag = 0.0
+        self.completed = 0
+        self.rejected = 0
+        self.service_time = None  # EWMA of slot hold time, seconds
+
+
+class _Ticket:
+    __slots__ = ('client', 'start_tag', 'finish_tag', 'granted', 'seq')
+
+    def __init__(self, client, start_tag, finish_tag, seq):
+        self.client = client
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.granted = False
+        self.seq = seq
+
+
+class FairScheduler:
+    """Weighted fair queuing over a fixed number of slots, with per-client quotas"""
+
+    def __init__(self, capacity=8, policies=None, default_policy=None, queue_timeout=60):
+        self.capacity = capacity
+        self.policies = dict(policies or {})
+        self.default_policy = default_policy or self.policies.pop('*', None) or ClientPolicy(
+            'anonymous', max_concurrent=capacity, max_queued=capacity * 4)
+        self.queue_timeout = queue_timeout
+        self._clients = {}
+        self._waiting = []
+        self._in_service = 0
+        # Scrapes abandoned by their request (e.g. after a timeout) that are still running
+        self._abandoned = 0
+        self._virtual_time = 0.0
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    def policy_for(self, api_key):
+        """Policy for an API key; unknown or missing keys get the default policy"""
+        return self.policies.get(api_key) if api_key else None
+
+    def _client(self, policy):
+        # Keyed by the policy itself: two policies sharing a name must not share (or reset) counters
+        client = self._clients.get(policy)
+        if client is None:
+            client = self._clients[policy] = _Client(policy)
+        return client
+
+    def _take_token(self, client, now):
+        policy = client.policy
+        if policy.rate is None:
+            return 0.0
+        client.tokens = min(policy.burst, client.tokens + max(0.0, now - client.refilled_at) * policy.rate)
+        client.refilled_at = max(now, client.refilled_at)
+        if client.tokens >= 1:
+            client.tokens -= 1
+            return 0.0
+        return (1 - client.tokens) / policy.rate
+
+    def _estimated_wait(self, client):
+        service = client.service_time or 5.0
+        return service * (client.queued + 1) / max(1, client.policy.max_concurrent)
+
+    def _dispatch(self):
+        """Grant free slots to the eligible waiting tickets with the smallest start tags"""
+        while self._in_service + self._abandoned < self.capacity:
+            eligible = [t for t in self._waiting if t.client.in_flight < t.client.policy.max_concurrent]
+            if not eligible:
+                return
+            ticket = min(eligible, key=lambda t: (t.start_tag, t.seq))
+            self._waiting.remove(ticket)
+            ticket.granted = True
+            ticket.client.queued -= 1
+            ticket.client.in_flight += 1
+            self._in_service += 1
+            self._virtual_time = ticket.start_tag
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, policy=None, priority=None, cost=1.0):
+        """Hold a scrape slot for the duration of the block.
+
+        Raises QuotaExceeded when the client is over its rate or queue limit and
+        QueueTimeout when no slot frees up within queue_timeout. ``priority``
+        can lower (never raise) the client's priority class for this request.
+        """
+        policy = policy or self.default_policy
+        priority = policy.priority if priority not in PRIORITY_WEIGHTS else priority
+        if PRIORITY_WEIGHTS[priority] > PRIORITY_WEIGHTS[policy.priority]:
+            priority = policy.priority
+        weight = policy.weight * PRIORITY_WEIGHTS[priority]
+
+        with self._cond:
+            now = time.monotonic()
+            client = self._client(policy)
+            if client.queued >= policy.max_queued:
+                client.rejected += 1
+                raise QuotaExceeded(f"Too many queued requests for client {policy.name}", self._estimated_wait(client))
+            retry_after = self._take_token(client, now)
+            if retry_after:
+                client.rejected += 1
+                raise QuotaExceeded(f"Rate limit exceeded for client {policy.name}", retry_after)
+
+            start_tag = max(self._virtual_time, client.finish_tag)
+            client.finish_tag = start_tag + cost / weight
+            self._seq += 1
+            ticket = _Ticket(client, start_tag, client.finish_tag, self._seq)
+            client.queued += 1
+            self._waiting.append(ticket)
+            self._dispatch()
+
+            deadline = now + self.queue_timeout
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    client.queued -= 1
+                    # Give back the virtual time this request reserved
+                    client.finish_tag = max(self._virtual_time, client.finish_tag - cost / weight)
+                    raise QueueTimeout("Timed out waiting for a scrape slot", self._estimated_wait(client))
+                self._cond.wait(remaining)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._cond:
+                client.in_flight -= 1
+                client.completed += 1
+                client.service_time = elapsed if client.service_time is None else client.service_time + 0.2 * (elapsed - client.service_time)
+                self._in_service -= 1
+                self._dispatch()
+
+    def hold_until_done(self, future):
+        """Count a scrape that outlives its slot (abandoned after a timeout) against capacity until it finishes"""
+        with self._cond:
+            self._abandoned += 1
+
+        def release(_):
+            with self._cond:
+                self._abandoned -= 1
+                self._dispatch()
+        future.add_done_callback(release)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'capacity': self.capacity,
+                'in_service': self._in_service,
+                'abandoned': self._abandoned,
+                'waiting': len(self._waiting),
+                'clients': {
+                    c.policy.name: {
+                        'priority': c.policy.priority,
+                        'weight': c.policy.weight,
+                        'in_flight': c.in_flight,
+                        'queued': c.queued,
+                        'completed': c.completed,
+                        'rejected': c.rejected,
+                    }
+                    for c in self._clients.values()
+                },
+            }
@@ -11,22 +11,490 @@ from urllib3.exceptions import TimeoutError as UrllibTimeoutError
 from requests.exceptions import RequestException
 import backoff
 import asyncio
+import concurrent.futures
 import os
 import tempfile
 import subprocess
 import sys
+import textwrap
+import threading
+import functools
+import atexit
 from dotenv import load_dotenv
 import pickle
 from pathlib import Path
+from counts import normalize_count, js_normalizer
+from snapshots import SnapshotStore, ResponseRecorder
+from comments import CommentHarvester
+from profile_crawl import ProfileReelCrawler, reels_tab_url
+from media import MediaProber, MediaRequestWatcher
+from urls import UrlResolver, canonical_url, is_short_link
+from structured_logging import reel_id_var
+from records import ReelRecord
+from profiles import CacheStats, PersistentBrowser
+from selector_stats import SelectorRegistry
+from browser_watchdog import owner_arg
+
+# Load .env once, so credentials (and the proxy session derived from them) are the same before and after login
+load_dotenv()
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor'
+]
+
+# Minimal settings for speed (quick_scrape)
+QUICK_BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-web-security'
+]
+
+# In-page extraction snippets for get_reel_data_public, keyed by stage; each one fills keys on `result`
+PUBLIC_STAGE_JS = {
+    'engagement': '''
+    // Find all spans with numbers
+    const allSpans = Array.from(document.querySelectorAll('span'));
+    const numberSpans = allSpans.filter(span => normalizeCount(span.textContent) !== null);
+
+    // Extract engagement numbers using a smarter approach
+    // Method 1: Look for numbers near engagement buttons
+    const engagementButtons = document.querySelectorAll('[aria-label="Comment"], [aria-label="Share"], [aria-label="Like"]');
+
+    engagementButtons.forEach((button, i) => {
+        const ariaLabel = button.getAttribute('aria-label');
+
+        // Look for numbers in the same container or nearby
+        const container = button.closest('div');
+        if (container) {
+            // Look in the same container first
+            const containerSpans = container.querySelectorAll('span');
+
+            for (const span of containerSpans) {
+                const number = normalizeCount(span.textContent);
+                if (number !== null) {
+                    if (ariaLabel === 'Comment') {
+                        result.comments = number;
+                    } else if (ariaLabel === 'Share') {
+                        result.shares = number;
+                    } else if (ariaLabel === 'Like') {
+                        result.likes = number;
+                    }
+                    break;
+                }
+            }
+
+            // If not found in container, look in parent containers
+            if (!result.comments && ariaLabel === 'Comment' || 
+                !result.shares && ariaLabel === 'Share' || 
+                !result.likes && ariaLabel === 'Like') {
+
+                let currentParent = container.parentElement;
+                let depth = 0;
+                while (currentParent && depth < 3) {
+                    const parentSpans = currentParent.querySelectorAll('span');
+
+                    for (const span of parentSpans) {
+                        const number = normalizeCount(span.textContent);
+                        if (number !== null) {
+                            if (ariaLabel === 'Comment' && !result.comments) {
+                                result.comments = number;
+                            } else if (ariaLabel === 'Share' && !result.shares) {
+                                result.shares = number;
+                            } else if (ariaLabel === 'Like' && !result.likes) {
+                                result.likes = number;
+                            }
+                            break;
+                        }
+                    }
+
+                    if ((result.comments && ariaLabel === 'Comment') || 
+                        (result.shares && ariaLabel === 'Share') || 
+                        (result.likes && ariaLabel === 'Like')) {
+                        break;
+                    }
+
+                    currentParent = currentParent.parentElement;
+                    depth++;
+                }
+            }
+        }
+    });
+
+    // Method 2: If we still don't have all numbers, use the known numbers we found
+    if (!result.comments || !result.shares || !result.likes) {
+        const knownNumbers = numberSpans.map(span => {
+            const text = span.textContent.trim();
+            return { text, number: normalizeCount(text) };
+        });
+
+        // Assign numbers based on typical patterns
+        // Usually: likes (largest), comments (medium), shares (smallest)
+        if (knownNumbers.length >= 3) {
+            const sortedNumbers = knownNumbers.sort((a, b) => b.number - a.number);
+
+            if (!result.likes) {
+                result.likes = sortedNumbers[0].number;
+            }
+            if (!result.comments) {
+                result.comments = sortedNumbers[1].number;
+            }
+            if (!result.shares) {
+                result.shares = sortedNumbers[2].number;
+            }
+        } else if (knownNumbers.length >= 2) {
+            const sortedNumbers = knownNumbers.sort((a, b) => b.number - a.number);
+            if (!result.likes) {
+                result.likes = sortedNumbers[0].number;
+            }
+            if (!result.comments) {
+                result.comments = sortedNumbers[1].number;
+            }
+        } else if (knownNumbers.length >= 1) {
+            if (!result.likes) {
+                result.likes = knownNumbers[0].number;
+            }
+        }
+    }
+''',
+    'user': '''
+    // Extract user profile link
+    const el = pickFirst('user', el => el.href);
+    if (el) {
+        result.user_profile_url = el.href;
+        result.user_name = el.textContent.trim();
+    }
+''',
+    'description': '''
+    // Extract description
+    const descEl = pickFirst('description', el => el.textContent.trim());
+    if (descEl) {
+        result.description = descEl.textContent.trim();
+    }
+''',
+    'video': '''
+    // Extract video URL
+    const video = document.querySelector('video');
+    if (video && video.src) {
+        result.video_url = video.src;
+    }
+    if (video && video.poster) {
+        result.thumbnail = video.poster;
+    }
+''',
+}
+
+# In-page extraction snippets for quick_scrape, keyed by stage
+QUICK_STAGE_JS = {
+    'video': '''
+    // Basic video URL extraction
+    const video = document.querySelector('video');
+    if (video && video.src) {
+        result.video_url = video.src;
+    }
+    if (video && video.poster) {
+        result.thumbnail = video.poster;
+    }
+''',
+    'description': '''
+    // Basic description
+    const messageEl = pickFirst('description', el => el.textContent.trim());
+    if (messageEl) {
+        result.description = messageEl.textContent.trim();
+    }
+''',
+    'user': '''
+    // Basic user info
+    const userEl = pickFirst('quick_user', el => el.href);
+    if (userEl) {
+        result.user_posted = userEl.textContent.trim();
+        result.user_profile_url = userEl.href;
+    }
+''',
+    'counts': '''
+    // Basic engagement numbers
+    const spans = Array.from(document.querySelectorAll('span'));
+    const numbers = spans
+        .map(span => normalizeCount(span.textContent))
+        .filter(number => number !== null);
+
+    if (numbers.length >= 1) result.views = numbers[0];
+    if (numbers.length >= 2) result.num_comments = numbers[1];
+''',
+    'date': '''
+    // Basic date
+    const timeEl = pickFirst('date', el => el.textContent.trim());
+    if (timeEl) {
+        result.date_posted = timeEl.textContent.trim();
+    }
+''',
+}
+
+# normalizeCount(text) for the page, generated from the same suffix table as counts.normalize_count
+COUNT_NORMALIZER_JS = js_normalizer()
+
+# Candidate selectors per strategy group used by pickFirst(), in their hand-written order.
+# The SelectorRegistry reorders them (and drops dead ones) from observed hit rates and query costs.
+SELECTOR_STRATEGIES = {
+    'user': (
+        'a[href*="/profile.php"]',
+        'a[href*="/people/"]',
+        'h3 a[href*="/"]',
+        '[data-testid="post_actor_link"]',
+    ),
+    'description': (
+        '[data-testid="post_message"]',
+        '[data-ad-preview="message"]',
+        '.userContent',
+    ),
+    'quick_user': (
+        'a[role="link"][tabindex="0"]',
+        'h3 a',
+        '[data-testid="post_actor_link"]',
+    ),
+    'date': (
+        'time',
+        '[data-testid="post_timestamp"]',
+        '.timestamp',
+    ),
+}
+
+# pickFirst(group, accept): first element matched by the group's selectors (in SELECTORS order) that
+# accept() takes; records [selector, hit, ms] for every selector tried under result._selectors
+PICK_FIRST_JS = '''
+const selectorStats = {};
+function pickFirst(group, accept) {
+    const tries = selectorStats[group] = selectorStats[group] || [];
+    for (const selector of SELECTORS[group] || []) {
+        const started = performance.now();
+        let el = null;
+        try {
+            el = document.querySelector(selector);
+        } catch (e) {}
+        const hit = !!(el && accept(el));
+        tries.push([selector, hit ? 1 : 0, performance.now() - started]);
+        if (hit) return el;
+    }
+    return null;
+}
+'''
+
+# Output field -> extraction stage that produces it (None: needs no in-page work)
+PUBLIC_FIELD_STAGES = {
+    'url': None,
+    'user_posted': 'user',
+    'description': 'description',
+    'hashtags': 'description',
+    'num_comments': 'engagement',
+    'shares': 'engagement',
+    'likes': 'engagement',
+    'views': None,
+    'video_url': 'video',
+    'thumbnail': 'video',
+    'length': 'media',
+    'video_width': 'media',
+    'video_height': 'media',
+    'video_bitrate': 'media',
+    'video_size': 'media',
+    'user_profile_url': 'user',
+    'post_id': None,
+    'views_source': None,
+    'top_comments': 'comments',
+}
+
+QUICK_FIELD_STAGES = {
+    'url': None,
+    'user_posted': 'user',
+    'description': 'description',
+    'hashtags': 'description',
+    'num_comments': 'counts',
+    'date_posted': 'date',
+    'likes': 'counts',
+    'views': 'counts',
+    'video_play_count': 'counts',
+    'top_comments': 'comments',
+    'post_id': None,
+    'thumbnail': 'video',
+    'shortcode': None,
+    'content_id': None,
+    'product_type': None,
+    'coauthor_producers': None,
+    'tagged_users': None,
+    'length': 'media',
+    'video_width': 'media',
+    'video_height': 'media',
+    'video_bitrate': 'media',
+    'video_size': 'media',
+    'video_url': 'video',
+    'audio_url': None,
+    'posts_count': None,
+    'followers': None,
+    'following': None,
+    'user_profile_url': 'user',
+    'is_paid_partnership': None,
+    'is_verified': None,
+    'views_source': None,
+}
+
+# Stages that only run when one of their fields is requested explicitly
+OPT_IN_STAGES = {'comments'}
+
+# top_comments harvesting limits when it is requested as a field
+TOP_COMMENTS_LIMIT = 10
+TOP_COMMENTS_TIME_BUDGET = 10
+
+# Stages that need another stage's output ('media' probes the URL found by 'video')
+STAGE_DEPENDENCIES = {'media': ('video',)}
+
+# Media probing: at most this many candidate URLs per reel, waiting up to this many seconds for all of them
+MEDIA_PROBE_CANDIDATES = 4
+MEDIA_PROBE_TIMEOUT = 10
+
+# Fields every projected result keeps so it can be matched back to its reel
+IDENTITY_FIELDS = ('url', 'post_id')
+
+# Keys each stage sets on the in-page `result` object once it has found its data
+STAGE_RESULT_KEYS = {
+    'engagement': ('comments', 'shares', 'likes'),
+    'user': ('user_profile_url',),
+    'description': ('description',),
+    'video': ('video_url',),
+    'counts': ('views', 'num_comments'),
+    'date': ('date_posted',),
+}
+
+
+def parse_fields(fields):
+    """Normalize a fields selection (list or comma-separated string) to a set, or None for all fields"""
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    selected = {str(f).strip() for f in fields if str(f).strip()}
+    if not selected:
+        return None
+    known = set(PUBLIC_FIELD_STAGES) | set(QUICK_FIELD_STAGES)
+    unknown = selected - known
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return selected
+
+
+def stages_for(fields, field_stages):
+    """Extraction stages needed to produce the selected fields (all stages when fields is None)"""
+    if fields is None:
+        stages = {stage for stage in field_stages.values() if stage and stage not in OPT_IN_STAGES}
+    else:
+        stages = {field_stages[f] for f in fields if field_stages.get(f)}
+    for stage in list(stages):
+        stages.update(STAGE_DEPENDENCIES.get(stage, ()))
+    return stages
+
+
+def build_extraction_script(stage_js, stages, selectors=None):
+    """Compose the page.evaluate script from the snippets of the selected stages, in declaration order
+
+    ``selectors`` ({group: [selector, ...]}, e.g. from SelectorRegistry.ordered()) sets the order
+    pickFirst() tries each group's selectors in; the default is SELECTOR_STRATEGIES.
+    """
+    selectors = selectors if selectors is not None else {g: list(s) for g, s in SELECTOR_STRATEGIES.items()}
+    parts = ["    {" + textwrap.indent(stage_js[name], '    ') + "    }" for name in stage_js if name in stages]
+    return ("() => {\n" + textwrap.indent(COUNT_NORMALIZER_JS, '    ') +
+            f"    const SELECTORS = {json.dumps(selectors)};\n" + textwrap.indent(PICK_FIRST_JS, '    ') +
+            "    const result = {};\n" + "\n".join(parts) +
+            "\n    result._selectors = selectorStats;\n    return result;\n}")
+
+
+_shared_media_prober = None
+_shared_media_prober_lock = threading.Lock()
+
+
+def shared_media_prober():
+    """Process-wide MediaProber, so its connection pool and cache outlive individual scrapers"""
+    global _shared_media_prober
+    with _shared_media_prober_lock:
+        if _shared_media_prober is None:
+            _shared_media_prober = MediaProber()
+        return _shared_media_prober
+
+
+_shared_selector_registry = None
+_shared_selector_registry_lock = threading.Lock()
+
+
+def shared_selector_registry():
+    """Process-wide SelectorRegistry, persisted to SELECTOR_STATS_PATH (in memory only when empty)"""
+    global _shared_selector_registry
+    with _shared_selector_registry_lock:
+        if _shared_selector_registry is None:
+            _shared_selector_registry = SelectorRegistry(
+                SELECTOR_STRATEGIES, path=os.getenv('SELECTOR_STATS_PATH', 'selector_stats.sqlite') or None)
+            atexit.register(_shared_selector_registry.flush)
+        return _shared_selector_registry
+
+
+_shared_url_resolver = None
+_shared_url_resolver_lock = threading.Lock()
+
+
+def shared_url_resolver():
+    """Process-wide UrlResolver backed by the URL_CACHE_PATH SQLite cache"""
+    global _shared_url_resolver
+    with _shared_url_resolver_lock:
+        if _shared_url_resolver is None:
+            _shared_url_resolver = UrlResolver(os.getenv('URL_CACHE_PATH', 'url_cache.sqlite'))
+        return _shared_url_resolver
+
+
+def emits_result(method):
+    """Pass the result a public entry method accepted (a non-empty one) to the scraper's output sinks"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        if result and self.sinks is not None:
+            try:
+                self.sinks.put(result)
+            except Exception as e:
+                self.logger.warning("Failed to queue result for output sinks: %s", e)
+        return result
+    return wrapper
+
 
 class FacebookReelScraper:
-    def __init__(self, use_cookies=True, auto_login=True):
+    def __init__(self, use_cookies=True, auto_login=True, snapshot_dir=None, proxy_pool=None, proxy_scope='browser',
+                 latency_tracker=None, media_prober=None, url_resolver=None,
+                 profile_pool=None, warmup='cold', sinks=None, selector_registry=None):
         self.setup_logger()
         self.logger.info("Initializing Facebook Reel Scraper")
         self.use_cookies = use_cookies
         self.auto_login = auto_login
         self.video_global = None
         self.login_attempted = False  # Track if login has been attempted
+        self.snapshot_dir = snapshot_dir or os.getenv('SNAPSHOT_DIR', 'snapshots')
+        self._snapshot_store = None
+        # Proxies are picked per browser launch ('browser') or per browser context ('context')
+        if proxy_scope not in ('browser', 'context'):
+            raise ValueError(f"proxy_scope must be 'browser' or 'context', got {proxy_scope!r}")
+        self.proxy_pool = proxy_pool
+        self.proxy_scope = proxy_scope
+        # Optional tiers.LatencyTracker: page-step timeouts follow observed latency instead of fixed values
+        self.latency_tracker = latency_tracker
+        self._media_prober = media_prober
+        self._url_resolver = url_resolver
+        self._selector_registry = selector_registry
+        # Optional profiles.ProfilePool: browsers run on persistent profiles with a warm disk cache;
+        # warmup ('never', 'cold', 'always') loads the facebook.com origin before the reel page
+        self.profile_pool = profile_pool
+        self.warmup = warmup
+        # Optional sinks.Sink / SinkGroup that receives the results of get_reel_data and quick_scrape
+        # (batched, off-thread). Callers that run those methods with timeouts and abandon them emit
+        # accepted results themselves instead (see main.py).
+        self.sinks = sinks
         
         if use_cookies:
             self.cookies = self.load_cookies('facebook_cookies.json')
@@ -39,26 +507,95 @@ class FacebookReelScraper:
             self.cookies = {}
 
     def setup_logger(self):
-        """Setup logger with timestamp and formatting"""
+        """Get the scraper logger; handlers are set up by the application (see structured_logging.py)"""
         self.logger = logging.getLogger('FacebookReelScraper')
         
-        # Only add handler if it doesn't already exist
-        if not self.logger.handlers:
-            self.logger.setLevel(logging.INFO)
-            
-            # Create console handler with formatting
-            ch = logging.StreamHandler()
-            ch.setLevel(logging.INFO)
-            formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-            ch.setFormatter(formatter)
-            
-            # Add handler to logger
-            self.logger.addHandler(ch)
-        
+    def proxy_session(self):
+        """Session key that pins authenticated traffic to one proxy (None for anonymous scraping)
+
+        Always the configured account, never a cookie value: the key must be the same for the
+        auto-login during __init__ (before any cookies exist) and for the scrapes that follow.
+        """
+        if not self.use_cookies:
+            return None
+        return f"account:{os.getenv('FACEBOOK_EMAIL') or 'default'}"
+
+    def launch_browser(self, p, args=None):
+        """Launch headless Chromium; returns (browser, proxy) where proxy is the pool entry used, if any"""
+        options = {'headless': True, 'args': list(args or BROWSER_ARGS) + [owner_arg()]}
+        proxy = None
+        profile = self.profile_pool.acquire('auth' if self.use_cookies else 'public') if self.profile_pool else None
+        if self.proxy_pool:
+            if self.proxy_scope == 'browser':
+                proxy = self.proxy_pool.acquire(self.proxy_session())
+                options['proxy'] = proxy.to_playwright()
+            elif profile is None:
+                # Chromium only applies per-context proxies when the browser was launched with a proxy
+                options['proxy'] = {'server': 'http://per-context'}
+        if profile is not None:
+            # Persistent mode: the "browser" opens its single context on a profile with a warm HTTP cache
+            options['args'] += self.profile_pool.launch_args(profile)
+            warmup = self.warmup == 'always' or (self.warmup == 'cold' and profile.cold)
+            return PersistentBrowser(p.chromium, profile, options, warmup=warmup), proxy
+        return p.chromium.launch(**options), proxy
+
+    def new_context(self, browser, proxy=None, **options):
+        """Create a browser context; returns (context, proxy) with the proxy traffic goes through"""
+        if self.proxy_pool and self.proxy_scope == 'context':
+            proxy = self.proxy_pool.acquire(self.proxy_session())
+            options['proxy'] = proxy.to_playwright()
+        return browser.new_context(user_agent=USER_AGENT, **options), proxy
+
+    def step_timeout(self, step, default_ms):
+        """Timeout in ms for a page step: p99-derived with a latency tracker (within 1/4x..2x default), else default"""
+        if not self.latency_tracker:
+            return default_ms
+        seconds = self.latency_tracker.timeout(step, default_ms / 1000, floor=default_ms / 4000, ceiling=default_ms / 500)
+        return int(seconds * 1000)
+
+    def record_step(self, step, started):
+        """Record how long a successful page step took"""
+        if self.latency_tracker:
+            self.latency_tracker.record(step, time.monotonic() - started)
+
+    def watch_cache(self, context, page):
+        """Start counting disk-cache hits for a page in persistent-profile mode (None otherwise)"""
+        if not self.profile_pool:
+            return None
+        try:
+            return CacheStats(context, page)
+        except Exception as e:
+            self.logger.warning("Cache statistics unavailable: %s", e)
+            return None
+
+    def report_cache(self, cache_stats):
+        """Log a scrape's cache-hit bytes and add them to the profile pool totals"""
+        if cache_stats is None:
+            return
+        summary = cache_stats.summary()
+        self.profile_pool.record(summary)
+        self.logger.info("Cache: %d/%d responses from disk cache, %d bytes cached, %d bytes over the network",
+                         summary['cache_hits'], summary['responses'], summary['cache_hit_bytes'], summary['network_bytes'])
+
+    def navigate(self, page, url, proxy=None, timeout=20000):
+        """page.goto that records the outcome and latency against the proxy used"""
+        timeout = self.step_timeout('goto', timeout)
+        started = time.monotonic()
+        try:
+            response = page.goto(url, wait_until='domcontentloaded', timeout=timeout)
+        except Exception:
+            if self.proxy_pool:
+                self.proxy_pool.report(proxy, False)
+            raise
+        if self.proxy_pool:
+            self.proxy_pool.report(proxy, True, time.monotonic() - started)
+        self.record_step('goto', started)
+        return response
+
     def load_cookies(self, path):
         """Load cookies from file, convert to dict if needed."""
         if not os.path.exists(path):
-            self.logger.error(f"Cookie file {path} not found.")
+            self.logger.error("Cookie file %s not found.", path)
             return {}
         with open(path, 'r') as f:
             cookies = json.load(f)
@@ -76,9 +613,6 @@ class FacebookReelScraper:
         """Login to Facebook and save cookies for future use"""
         self.logger.info("Starting automatic Facebook login...")
         
-        # Load environment variables
-        load_dotenv()
-        
         # Get credentials from environment variables
         email = os.getenv('FACEBOOK_EMAIL')
         password = os.getenv('FACEBOOK_PASSWORD')
@@ -87,31 +621,20 @@ class FacebookReelScraper:
             self.logger.error("Facebook credentials not found in environment variables (FACEBOOK_EMAIL, FACEBOOK_PASSWORD)")
             return {}
         
-        self.logger.info(f"Attempting login with email: {email}")
+        self.logger.info("Attempting login with email: %s", email)
         
         try:
             # Use direct Playwright approach instead of subprocess
             with sync_playwright() as p:
-                browser = p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-blink-features=AutomationControlled',
-                        '--disable-dev-shm-usage',
-                        '--disable-web-security',
-                        '--disable-features=VizDisplayCompositor'
-                    ]
-                )
-                
-                context = browser.new_context(
-                    user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                )
+                browser, proxy = self.launch_browser(p)
+                
+                context, proxy = self.new_context(browser, proxy)
                 
                 page = context.new_page()
                 
                 # Navigate to Facebook login page
                 self.logger.info("Navigating to Facebook login page...")
-                page.goto("https://web.facebook.com/login", wait_until='domcontentloaded', timeout=30000)
+                self.navigate(page, "https://web.facebook.com/login", proxy, timeout=30000)
                 page.wait_for_timeout(3000)
                 
                 # Fill in email
@@ -134,7 +657,7 @@ class FacebookReelScraper:
                 
                 # Check if login was successful
                 current_url = page.url
-                self.logger.info(f"Current URL after login: {current_url}")
+                self.logger.info("Current URL after login: %s", current_url)
                 
                 if "login" not in current_url and "checkpoint" not in current_url:
                     self.logger.info("Login successful!")
@@ -147,16 +670,35 @@ class FacebookReelScraper:
                     with open('facebook_cookies.json', 'w') as f:
                         json.dump(cookies_dict, f, indent=2)
                     
-                    self.logger.info(f"Saved {len(cookies_dict)} cookies to file")
+                    self.logger.info("Saved %s cookies to file", len(cookies_dict))
                     return cookies_dict
                 else:
                     self.logger.error("Login failed - still on login page or checkpoint")
                     return {}
                     
         except Exception as e:
-            self.logger.error(f"Failed to login to Facebook: {str(e)}")
+            self.logger.error("Failed to login to Facebook: %s", e)
             return {}
 
+    def warm_up(self):
+        """Launch a browser for each launch profile and render a blank page; returns True if Chromium works"""
+        try:
+            with sync_playwright() as p:
+                for args in (BROWSER_ARGS, QUICK_BROWSER_ARGS):
+                    browser, proxy = self.launch_browser(p, args)
+                    try:
+                        context, proxy = self.new_context(browser, proxy)
+                        page = context.new_page()
+                        page.goto('about:blank')
+                        page.evaluate('() => document.readyState')
+                    finally:
+                        browser.close()
+            self.logger.info("Browser warmup complete")
+            return True
+        except Exception as e:
+            self.logger.error("Browser warmup failed: %s", e)
+            return False
+
     def validate_cookies(self):
         """Validate if current cookies are still valid, refresh if needed"""
         if not self.cookies:
@@ -168,19 +710,8 @@ class FacebookReelScraper:
         try:
             # Use direct Playwright approach instead of subprocess
             with sync_playwright() as p:
-                browser = p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-blink-features=AutomationControlled',
-                        '--disable-dev-shm-usage',
-                        '--disable-web-security',
-                        '--disable-features=VizDisplayCompositor'
-                    ]
-                )
-                context = browser.new_context(
-                    user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                )
+                browser, proxy = self.launch_browser(p)
+                context, proxy = self.new_context(browser, proxy)
                 
                 # Add cookies to context
                 cookies_list = []
@@ -198,12 +729,12 @@ class FacebookReelScraper:
                 
                 # Navigate to Facebook to check if logged in
                 self.logger.info("Validating cookies by navigating to Facebook...")
-                page.goto("https://web.facebook.com", wait_until='domcontentloaded', timeout=20000)
+                self.navigate(page, "https://web.facebook.com", proxy, timeout=20000)
                 page.wait_for_timeout(3000)
                 
                 # Check if we're logged in by looking for logout button or profile elements
                 current_url = page.url
-                self.logger.info(f"Current URL: {current_url}")
+                self.logger.info("Current URL: %s", current_url)
                 
                 # Check for elements that indicate we're logged in
                 logged_in = False
@@ -235,7 +766,7 @@ class FacebookReelScraper:
                     with open('facebook_cookies.json', 'w') as f:
                         json.dump(fresh_cookies_dict, f, indent=2)
                     
-                    self.logger.info(f"Updated with {len(fresh_cookies_dict)} fresh cookies")
+                    self.logger.info("Updated with %s fresh cookies", len(fresh_cookies_dict))
                     self.cookies = fresh_cookies_dict
                     return fresh_cookies_dict
                 else:
@@ -243,34 +774,106 @@ class FacebookReelScraper:
                     return self.login_and_save_cookies()
                     
         except Exception as e:
-            self.logger.error(f"Failed to validate cookies: {str(e)}")
+            self.logger.error("Failed to validate cookies: %s", e)
             return self.login_and_save_cookies()
 
+    @property
+    def selector_registry(self):
+        if self._selector_registry is None:
+            self._selector_registry = shared_selector_registry()
+        return self._selector_registry
+
+    @property
+    def url_resolver(self):
+        if self._url_resolver is None:
+            self._url_resolver = shared_url_resolver()
+        return self._url_resolver
+
     def extract_reel_id(self, url):
-        """Extract reel ID from URL"""
+        """Extract reel ID from any known reel URL form, resolving short links over HTTP (see urls.py)"""
         try:
-            # Try to extract ID from URL
-            match = re.search(r'/(\d+)/?', url)
-            if match:
-                return match.group(1)
-            return None
+            proxies = None
+            if self.proxy_pool and is_short_link(url):
+                # Redirect hops leave through the pool like the page loads (the account's pinned proxy when logged in)
+                proxies = self.proxy_pool.acquire(self.proxy_session()).to_requests()
+            return self.url_resolver.resolve(url, proxies=proxies)
         except Exception as e:
-            self.logger.error(f"Failed to extract reel ID: {str(e)}")
+            self.logger.error("Failed to extract reel ID: %s", e)
             return None
 
-    def get_reel_data(self, url):
+    def page_url(self, url, reel_id):
+        """URL to navigate to: the canonical reel URL for resolved short links, so the browser skips the redirects"""
+        if reel_id and is_short_link(url):
+            return canonical_url(reel_id)
+        return url
+
+    @emits_result
+    def get_reel_data(self, url, fields=None, snapshot=False):
         """Main method - uses authenticated scraping if cookies available, otherwise public scraping"""
         if self.use_cookies and self.cookies:
             self.logger.info("Using authenticated scraping")
-            return self.get_reel_data_authenticated(url)
+            return self.get_reel_data_authenticated(url, fields=fields, snapshot=snapshot)
         else:
             self.logger.info("Using public scraping (no authentication)")
-            return self.get_reel_data_public(url)
+            return self.get_reel_data_public(url, fields=fields, snapshot=snapshot)
 
-    def get_reel_data_public(self, url):
-        """Scrape Facebook Reel following the exact flow: reel page -> user profile -> views"""
-        self.logger.info(f"Scraping public reel: {url}")
+    @property
+    def snapshot_store(self):
+        if self._snapshot_store is None:
+            self._snapshot_store = SnapshotStore(self.snapshot_dir)
+        return self._snapshot_store
+
+    def save_snapshot(self, page, recorder, reel_id, url, mode):
+        """Store the rendered DOM and captured JSON responses of a page for offline re-extraction"""
+        try:
+            path = self.snapshot_store.save(reel_id, url, mode, page.content(), recorder.collect())
+            self.logger.info("Saved page snapshot to %s", path)
+        except Exception as e:
+            self.logger.warning("Failed to save page snapshot: %s", e)
+
+    def project(self, reel_data, fields):
+        """Expose only the requested fields (plus identity fields) of a ReelRecord"""
+        return reel_data.project(fields, keep=IDENTITY_FIELDS)
+
+    def extraction_script(self, stage_js, stages):
+        """Extraction script with selector strategies in the order the registry currently ranks them"""
+        return build_extraction_script(stage_js, stages, self.selector_registry.ordered())
+
+    def evaluate(self, page, script):
+        """Run an extraction script and feed its selector observations to the registry"""
+        data = page.evaluate(script)
+        try:
+            self.selector_registry.record(data.pop('_selectors', None))
+        except Exception as e:
+            self.logger.debug("Failed to record selector statistics: %s", e)
+        return data
+
+    def evaluate_until_filled(self, page, script, stages, budget_ms, interval_ms=250):
+        """Re-run the extraction script until every stage has produced its keys or the budget is spent"""
+        wanted = [key for stage in stages for key in STAGE_RESULT_KEYS.get(stage, ())]
+        deadline = time.monotonic() + budget_ms / 1000
+        while True:
+            data = self.evaluate(page, script)
+            if all(data.get(key) for key in wanted) or time.monotonic() >= deadline:
+                return data
+            page.wait_for_timeout(interval_ms)
+
+    def get_reel_data_public(self, url, fields=None, snapshot=False):
+        """Scrape Facebook Reel following the exact flow: reel page -> user profile -> views
+
+        ``fields`` limits the result to the given output fields; only the
+        extraction stages that produce them are run. With ``snapshot`` the
+        rendered page is stored for offline re-extraction (see snapshots.py).
+        """
+        self.logger.info("Scraping public reel: %s", url)
         reel_id = self.extract_reel_id(url)
+        reel_id_var.set(reel_id)
+        fields = parse_fields(fields)
+        stages = stages_for(fields, PUBLIC_FIELD_STAGES)
+        script = self.extraction_script(PUBLIC_STAGE_JS, stages)
+        if not stages and not snapshot:
+            # Nothing requested needs the page
+            return self.build_public_reel_data(url, reel_id, {}, stages, fields)
         
         browser = None
         context = None
@@ -279,250 +882,80 @@ class FacebookReelScraper:
         try:
             with sync_playwright() as p:
                 # Step 1: Navigate to the reel page and extract basic data
-                self.logger.info("=" * 50)
-                self.logger.info("STEP 1: EXTRACTING BASIC DATA FROM REEL PAGE")
-                self.logger.info("=" * 50)
-                
-                browser = p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-blink-features=AutomationControlled',
-                        '--disable-dev-shm-usage',
-                        '--disable-web-security',
-                        '--disable-features=VizDisplayCompositor'
-                    ]
-                )
-                
-                context = browser.new_context(
-                    user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    viewport={'width': 1920, 'height': 1080}
-                )
+                self.logger.debug("Step 1: extracting basic data from reel page")
+                
+                browser, proxy = self.launch_browser(p)
+                
+                context, proxy = self.new_context(browser, proxy, viewport={'width': 1920, 'height': 1080})
                 
                 page = context.new_page()
                 page.set_default_timeout(20000)  # Reduced timeout to 20 seconds
+                recorder = ResponseRecorder(page) if snapshot else None
+                media_watcher = MediaRequestWatcher(page) if 'media' in stages else None
+                cache_stats = self.watch_cache(context, page)
                 
                 # Navigate to reel page with timeout
-                self.logger.info(f"Navigating to reel page: {url}")
+                self.logger.info("Navigating to reel page: %s", url)
                 try:
-                    page.goto(url, wait_until='domcontentloaded', timeout=20000)
-                    page.wait_for_timeout(3000)  # Reduced wait time
+                    self.navigate(page, self.page_url(url, reel_id), proxy, timeout=20000)
+                    if 'engagement' in stages:
+                        page.wait_for_timeout(3000)  # Reduced wait time
                     self.logger.info("Successfully loaded reel page")
                 except Exception as e:
-                    self.logger.error(f"Failed to load reel page: {str(e)}")
+                    self.logger.error("Failed to load reel page: %s", e)
                     return None
                 
-                # Wait for engagement elements to load with shorter timeout
-                self.logger.info("Waiting for engagement elements to load...")
-                try:
-                    # Wait for either comments or shares to appear
-                    page.wait_for_selector('[aria-label="Comment"], [aria-label="Share"], [aria-label="Like"]', timeout=5000)
-                    self.logger.info("Engagement elements found")
-                except:
-                    self.logger.warning("Engagement elements not found, continuing anyway")
+                # Engagement counts render late, so only wait for them when they were asked for
+                if 'engagement' in stages:
+                    self.logger.info("Waiting for engagement elements to load...")
+                    try:
+                        # Wait for either comments or shares to appear
+                        started = time.monotonic()
+                        page.wait_for_selector('[aria-label="Comment"], [aria-label="Share"], [aria-label="Like"]',
+                                               timeout=self.step_timeout('engagement', 5000))
+                        self.record_step('engagement', started)
+                        self.logger.info("Engagement elements found")
+                    except:
+                        self.logger.warning("Engagement elements not found, continuing anyway")
                 
                 # Check what elements are actually on the page
-                self.logger.info("Extracting data from reel page...")
+                self.logger.info("Extracting data from reel page (stages: %s)...", ', '.join(sorted(stages)) or 'none')
                 try:
-                    basic_data = page.evaluate('''() => {
-                        const result = {};
-                        
-                        // Find all spans with numbers
-                        const allSpans = Array.from(document.querySelectorAll('span'));
-                        const numberSpans = allSpans.filter(span => {
-                            const text = span.textContent.trim();
-                            return text.match(/^\\d+(\\.\\d+)?[KMkm]?$/);
-                        });
-                        
-                        // Extract engagement numbers using a smarter approach
-                        // Method 1: Look for numbers near engagement buttons
-                        const engagementButtons = document.querySelectorAll('[aria-label="Comment"], [aria-label="Share"], [aria-label="Like"]');
-                        
-                        engagementButtons.forEach((button, i) => {
-                            const ariaLabel = button.getAttribute('aria-label');
-                            
-                            // Look for numbers in the same container or nearby
-                            const container = button.closest('div');
-                            if (container) {
-                                // Look in the same container first
-                                const containerSpans = container.querySelectorAll('span');
-                                
-                                for (const span of containerSpans) {
-                                    const text = span.textContent.trim();
-                                    if (text.match(/^\\d+(\\.\\d+)?[KMkm]?$/)) {
-                                        let number = text;
-                                        if (text.toLowerCase().includes('k')) {
-                                            number = parseFloat(text.replace(/[KMkm]/g, '')) * 1000;
-                                        } else if (text.toLowerCase().includes('m')) {
-                                            number = parseFloat(text.replace(/[KMkm]/g, '')) * 1000000;
-                                        } else {
-                                            number = parseInt(text);
-                                        }
-                                        
-                                        if (ariaLabel === 'Comment') {
-                                            result.comments = number;
-                                        } else if (ariaLabel === 'Share') {
-                                            result.shares = number;
-                                        } else if (ariaLabel === 'Like') {
-                                            result.likes = number;
-                                        }
-                                        break;
-                                    }
-                                }
-                                
-                                // If not found in container, look in parent containers
-                                if (!result.comments && ariaLabel === 'Comment' || 
-                                    !result.shares && ariaLabel === 'Share' || 
-                                    !result.likes && ariaLabel === 'Like') {
-                                    
-                                    let currentParent = container.parentElement;
-                                    let depth = 0;
-                                    while (currentParent && depth < 3) {
-                                        const parentSpans = currentParent.querySelectorAll('span');
-                                        
-                                        for (const span of parentSpans) {
-                                            const text = span.textContent.trim();
-                                            if (text.match(/^\\d+(\\.\\d+)?[KMkm]?$/)) {
-                                                let number = text;
-                                                if (text.toLowerCase().includes('k')) {
-                                                    number = parseFloat(text.replace(/[KMkm]/g, '')) * 1000;
-                                                } else if (text.toLowerCase().includes('m')) {
-                                                    number = parseFloat(text.replace(/[KMkm]/g, '')) * 1000000;
-                                                } else {
-                                                    number = parseInt(text);
-                                                }
-                                                
-                                                if (ariaLabel === 'Comment' && !result.comments) {
-                                                    result.comments = number;
-                                                } else if (ariaLabel === 'Share' && !result.shares) {
-                                                    result.shares = number;
-                                                } else if (ariaLabel === 'Like' && !result.likes) {
-                                                    result.likes = number;
-                                                }
-                                                break;
-                                            }
-                                        }
-                                        
-                                        if ((result.comments && ariaLabel === 'Comment') || 
-                                            (result.shares && ariaLabel === 'Share') || 
-                                            (result.likes && ariaLabel === 'Like')) {
-                                            break;
-                                        }
-                                        
-                                        currentParent = currentParent.parentElement;
-                                        depth++;
-                                    }
-                                }
-                            }
-                        });
-                        
-                        // Method 2: If we still don't have all numbers, use the known numbers we found
-                        if (!result.comments || !result.shares || !result.likes) {
-                            const knownNumbers = numberSpans.map(span => {
-                                const text = span.textContent.trim();
-                                let number = text;
-                                if (text.toLowerCase().includes('k')) {
-                                    number = parseFloat(text.replace(/[KMkm]/g, '')) * 1000;
-                                } else if (text.toLowerCase().includes('m')) {
-                                    number = parseFloat(text.replace(/[KMkm]/g, '')) * 1000000;
-                                } else {
-                                    number = parseInt(text);
-                                }
-                                return { text, number };
-                            });
-                            
-                            // Assign numbers based on typical patterns
-                            // Usually: likes (largest), comments (medium), shares (smallest)
-                            if (knownNumbers.length >= 3) {
-                                const sortedNumbers = knownNumbers.sort((a, b) => b.number - a.number);
-                                
-                                if (!result.likes) {
-                                    result.likes = sortedNumbers[0].number;
-                                }
-                                if (!result.comments) {
-                                    result.comments = sortedNumbers[1].number;
-                                }
-                                if (!result.shares) {
-                                    result.shares = sortedNumbers[2].number;
-                                }
-                            } else if (knownNumbers.length >= 2) {
-                                const sortedNumbers = knownNumbers.sort((a, b) => b.number - a.number);
-                                if (!result.likes) {
-                                    result.likes = sortedNumbers[0].number;
-                                }
-                                if (!result.comments) {
-                                    result.comments = sortedNumbers[1].number;
-                                }
-                            } else if (knownNumbers.length >= 1) {
-                                if (!result.likes) {
-                                    result.likes = knownNumbers[0].number;
-                                }
-                            }
-                        }
-                        
-                        // Extract user profile link
-                        const userSelectors = [
-                            'a[href*="/profile.php"]',
-                            'a[href*="/people/"]',
-                            'h3 a[href*="/"]',
-                            '[data-testid="post_actor_link"]'
-                        ];
-                        
-                        for (const selector of userSelectors) {
-                            const el = document.querySelector(selector);
-                            if (el && el.href) {
-                                result.user_profile_url = el.href;
-                                result.user_name = el.textContent.trim();
-                                break;
-                            }
-                        }
-                        
-                        // Extract description
-                        const descEl = document.querySelector('[data-testid="post_message"], [data-ad-preview="message"], .userContent');
-                        if (descEl) {
-                            result.description = descEl.textContent.trim();
-                        }
-                        
-                        // Extract video URL
-                        const video = document.querySelector('video');
-                        if (video && video.src) {
-                            result.video_url = video.src;
-                        }
-                        
-                        return result;
-                    }''')
+                    if 'engagement' in stages or not stages:
+                        basic_data = self.evaluate(page, script)
+                    else:
+                        # Without counts to settle, return as soon as the requested fields are present
+                        basic_data = self.evaluate_until_filled(page, script, stages, budget_ms=3000)
                     
-                    self.logger.info(f"Data extracted - Comments: {basic_data.get('comments', 'N/A')}, Shares: {basic_data.get('shares', 'N/A')}, Likes: {basic_data.get('likes', 'N/A')}")
+                    self.logger.debug("Data extracted - Comments: %s, Shares: %s, Likes: %s",
+                                      basic_data.get('comments'), basic_data.get('shares'), basic_data.get('likes'))
                     
                 except Exception as e:
-                    self.logger.error(f"Failed to extract basic data: {str(e)}")
+                    self.logger.error("Failed to extract basic data: %s", e)
                     return None
                 
-                # Build basic result without views (simplified for now)
-                reel_data = {
-                    'url': url,
-                    'user_posted': basic_data.get('user_name', ''),
-                    'description': basic_data.get('description', ''),
-                    'hashtags': self.extract_hashtags(basic_data.get('description', '')),
-                    'num_comments': basic_data.get('comments'),
-                    'shares': basic_data.get('shares'),
-                    'likes': basic_data.get('likes'),
-                    'views': None,
-                    'video_url': basic_data.get('video_url', ''),
-                    'user_profile_url': basic_data.get('user_profile_url'),
-                    'post_id': reel_id,
-                    'views_source': 'public_scrape'
-                }
+                # Probe in the background while comments and the snapshot are collected
+                media_probes = self.start_media_probe(basic_data, media_watcher, proxy) if 'media' in stages else []
                 
-                self.logger.info("=" * 50)
-                self.logger.info("SCRAPING COMPLETED")
-                self.logger.info(f"Comments: {reel_data.get('num_comments')}, Shares: {reel_data.get('shares')}, Likes: {reel_data.get('likes')}")
-                self.logger.info("=" * 50)
+                if 'comments' in stages:
+                    basic_data['top_comments'] = self.collect_top_comments(page)
                 
+                if snapshot:
+                    self.save_snapshot(page, recorder, reel_id, url, 'public')
+                
+                if 'media' in stages:
+                    basic_data['media'] = self.media_metadata(media_probes)
+                
+                reel_data = self.build_public_reel_data(url, reel_id, basic_data, stages, fields)
+                
+                self.logger.info("Scraping completed - Comments: %s, Shares: %s, Likes: %s",
+                                 reel_data.get('num_comments'), reel_data.get('shares'), reel_data.get('likes'))
+                
+                self.report_cache(cache_stats)
                 return reel_data
                 
         except Exception as e:
-            self.logger.error(f"Public scraping failed: {str(e)}")
+            self.logger.error("Public scraping failed: %s", e)
             return None
         finally:
             # Ensure proper cleanup
@@ -542,166 +975,293 @@ class FacebookReelScraper:
             except:
                 pass
 
-    def get_reel_data_authenticated(self, url):
+    @staticmethod
+    def media_fields(media):
+        """length (seconds) and video_* fields from a media probe result, None where unknown"""
+        media = media or {}
+        duration = media.get('duration')
+        return {
+            'length': round(duration, 3) if duration else None,
+            'video_width': media.get('width'),
+            'video_height': media.get('height'),
+            'video_bitrate': media.get('bitrate'),
+            'video_size': media.get('size'),
+        }
+
+    def build_public_reel_data(self, url, reel_id, data, stages, fields):
+        """Build the public-tier ReelRecord from the extraction script's result"""
+        # Build basic result without views (simplified for now)
+        reel_data = ReelRecord(
+            url=url,
+            user_posted=data.get('user_name', ''),
+            description=data.get('description', ''),
+            hashtags=self.extract_hashtags(data.get('description', '')) if 'description' in stages else [],
+            num_comments=data.get('comments'),
+            shares=data.get('shares'),
+            likes=data.get('likes'),
+            views=data.get('views'),
+            video_url=data.get('video_url', ''),
+            thumbnail=data.get('thumbnail', ''),
+            **self.media_fields(data.get('media')),
+            user_profile_url=data.get('user_profile_url'),
+            post_id=reel_id,
+            views_source='public_scrape',
+            top_comments=data.get('top_comments', [])
+        )
+        return self.project(reel_data, fields)
+
+    @property
+    def media_prober(self):
+        if self._media_prober is None:
+            self._media_prober = shared_media_prober()
+        return self._media_prober
+
+    def start_media_probe(self, data, watcher=None, proxy=None):
+        """Start probing the reel's media files in the background; returns the probe futures
+
+        Candidates are the <video> src (when it is a plain URL rather than a
+        blob: stream) and the MP4 files the player requested. The range reads
+        go through the scrape's proxy, like the page itself.
+        """
+        candidates = [data.get('video_url')] + (watcher.urls if watcher else [])
+        urls = [u for u in dict.fromkeys(candidates) if u and u.startswith(('http://', 'https://'))]
+        proxies = proxy.to_requests() if proxy is not None else None
+        return [self.media_prober.submit(u, proxies=proxies) for u in urls[:MEDIA_PROBE_CANDIDATES]]
+
+    def media_metadata(self, probes, timeout=MEDIA_PROBE_TIMEOUT):
+        """Best result of start_media_probe: the highest-resolution stream, so audio-only files lose
+
+        Waits at most ``timeout`` seconds in total; probes still running then are ignored.
+        """
+        best = None
+        done, not_done = concurrent.futures.wait(probes, timeout=timeout)
+        if not_done:
+            self.logger.warning("%d media probe(s) did not finish within %ss", len(not_done), timeout)
+        for probe in probes:
+            if probe not in done:
+                continue
+            try:
+                info = probe.result()
+            except Exception as e:
+                self.logger.warning("Media probe failed: %s", e)
+                continue
+            if info and (best is None or (info['width'] or 0) * (info['height'] or 0) > (best['width'] or 0) * (best['height'] or 0)):
+                best = info
+        return best
+
+    def collect_top_comments(self, page, limit=TOP_COMMENTS_LIMIT, time_budget=TOP_COMMENTS_TIME_BUDGET):
+        """Harvest the first comments of an open reel page for the top_comments field"""
+        comments = list(CommentHarvester(page).harvest(limit=limit, time_budget=time_budget))
+        self.logger.info("Collected %s top comments", len(comments))
+        return comments
+
+    def iter_comments(self, url, limit=None, time_budget=60):
+        """Stream a reel's comments as dicts, scrolling/expanding incrementally
+
+        Stops after ``limit`` comments or ``time_budget`` seconds; comments are
+        deduplicated by comment ID with bounded memory.
+        """
+        self.logger.info("Harvesting comments for reel: %s", url)
+        browser = None
+        try:
+            with sync_playwright() as p:
+                browser, proxy = self.launch_browser(p)
+                context, proxy = self.new_context(browser, proxy, viewport={'width': 1920, 'height': 1080})
+                if self.use_cookies and self.cookies:
+                    context.add_cookies([
+                        {'name': name, 'value': value, 'domain': '.facebook.com', 'path': '/'}
+                        for name, value in self.cookies.items()
+                    ])
+                page = context.new_page()
+                page.set_default_timeout(20000)
+                
+                try:
+                    self.navigate(page, self.page_url(url, self.extract_reel_id(url)), proxy, timeout=20000)
+                except Exception as e:
+                    self.logger.error("Failed to load reel page: %s", e)
+                    return
+                
+                count = 0
+                for comment in CommentHarvester(page).harvest(limit=limit, time_budget=time_budget):
+                    count += 1
+                    yield comment
+                self.logger.info("Harvested %s comments", count)
+        except Exception as e:
+            self.logger.error("Comment harvesting failed: %s", e)
+        finally:
+            try:
+                if browser:
+                    browser.close()
+            except:
+                pass
+
+    def crawl_profile(self, profile_url, limit=None, time_budget=120):
+        """Stream the reels of a creator as {'reel_id', 'url', 'views'} dicts
+
+        Walks the profile's reels tab with incremental scrolling; ``views`` is
+        the count shown on the grid tile (None if the tile shows none).
+        """
+        tab_url = reels_tab_url(profile_url)
+        self.logger.info("Crawling reels tab: %s", tab_url)
+        browser = None
+        try:
+            with sync_playwright() as p:
+                browser, proxy = self.launch_browser(p)
+                context, proxy = self.new_context(browser, proxy, viewport={'width': 1920, 'height': 1080})
+                if self.use_cookies and self.cookies:
+                    context.add_cookies([
+                        {'name': name, 'value': value, 'domain': '.facebook.com', 'path': '/'}
+                        for name, value in self.cookies.items()
+                    ])
+                page = context.new_page()
+                page.set_default_timeout(20000)
+                
+                try:
+                    self.navigate(page, tab_url, proxy, timeout=20000)
+                except Exception as e:
+                    self.logger.error("Failed to load reels tab: %s", e)
+                    return
+                
+                count = 0
+                for tile in ProfileReelCrawler(page, COUNT_NORMALIZER_JS).crawl(limit=limit, time_budget=time_budget):
+                    count += 1
+                    yield tile
+                self.logger.info("Found %s reels on profile", count)
+        except Exception as e:
+            self.logger.error("Profile crawl failed: %s", e)
+        finally:
+            try:
+                if browser:
+                    browser.close()
+            except:
+                pass
+
+    def get_reel_data_authenticated(self, url, fields=None, snapshot=False):
         """Scrape Facebook Reel with authentication - simplified version"""
-        self.logger.info(f"Scraping reel with authentication: {url}")
+        self.logger.info("Scraping reel with authentication: %s", url)
         # For now, just use the public method since we have the same logic
-        return self.get_reel_data_public(url)
+        return self.get_reel_data_public(url, fields=fields, snapshot=snapshot)
 
     def extract_number(self, text):
-        """Extract number from text with K/M suffixes"""
-        try:
-            if not text:
-                return 0
-            text = text.lower().strip()
-            text = re.sub(r'[^0-9km.]', '', text)
-            if 'k' in text:
-                number = float(text.replace('k', ''))
-                return int(number * 1000)
-            elif 'm' in text:
-                number = float(text.replace('m', ''))
-                return int(number * 1000000)
-            else:
-                return int(float(text))
-        except Exception:
-            return 0
+        """Extract number from text with localized compact suffixes (K, M, tsd., mil, Mio., ...)"""
+        return normalize_count(text, strict=False) or 0
 
     def extract_hashtags(self, text):
         """Extract hashtags from text"""
-        self.logger.debug(f"Extracting hashtags from text: {text[:100]}...")
+        self.logger.debug("Extracting hashtags from text: %s...", text[:100])
         hashtags = re.findall(r'#\w+', text)
-        self.logger.info(f"Found {len(hashtags)} hashtags")
+        self.logger.debug("Found %s hashtags", len(hashtags))
         return hashtags
 
-    def quick_scrape(self, url):
-        """Quick scrape method that skips complex video links extraction"""
-        self.logger.info(f"Quick scraping reel: {url}")
+    @emits_result
+    def quick_scrape(self, url, fields=None, snapshot=False):
+        """Quick scrape method that skips complex video links extraction
+
+        ``fields`` limits the result to the given output fields; only the
+        extraction stages that produce them are run. With ``snapshot`` the
+        rendered page is stored for offline re-extraction (see snapshots.py).
+        """
+        self.logger.info("Quick scraping reel: %s", url)
         reel_id = self.extract_reel_id(url)
+        reel_id_var.set(reel_id)
+        fields = parse_fields(fields)
+        stages = stages_for(fields, QUICK_FIELD_STAGES)
+        script = self.extraction_script(QUICK_STAGE_JS, stages)
+        if not stages and not snapshot:
+            # Nothing requested needs the page
+            return self.build_quick_reel_data(url, reel_id, {}, stages, fields)
         
         try:
             with sync_playwright() as p:
                 # Launch browser with minimal settings for speed
-                browser = p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-web-security'
-                    ]
-                )
-                
-                context = browser.new_context(
-                    user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    viewport={'width': 1280, 'height': 720}
-                )
+                browser, proxy = self.launch_browser(p, QUICK_BROWSER_ARGS)
+                
+                context, proxy = self.new_context(browser, proxy, viewport={'width': 1280, 'height': 720})
                 
                 page = context.new_page()
                 page.set_default_timeout(15000)  # 15 seconds
+                recorder = ResponseRecorder(page) if snapshot else None
+                media_watcher = MediaRequestWatcher(page) if 'media' in stages else None
+                cache_stats = self.watch_cache(context, page)
                 
                 # Quick navigation
                 self.logger.info("Quick navigation to reel page...")
                 try:
-                    page.goto(url, wait_until='domcontentloaded', timeout=15000)
+                    self.navigate(page, self.page_url(url, reel_id), proxy, timeout=15000)
                     self.logger.info("Page loaded successfully")
                 except Exception as e:
-                    self.logger.error(f"Failed to load page: {str(e)}")
+                    self.logger.error("Failed to load page: %s", e)
                     browser.close()
                     return None
                 
                 # Quick data extraction
                 self.logger.info("Quick data extraction...")
                 try:
-                    data = page.evaluate('''() => {
-                        const result = {};
-                        
-                        // Basic video URL extraction
-                        const video = document.querySelector('video');
-                        if (video && video.src) {
-                            result.video_url = video.src;
-                        }
-                        
-                        // Basic description
-                        const messageEl = document.querySelector('[data-testid="post_message"], [data-ad-preview="message"], .userContent');
-                        if (messageEl) {
-                            result.description = messageEl.textContent.trim();
-                        }
-                        
-                        // Basic user info
-                        const userEl = document.querySelector('a[role="link"][tabindex="0"], h3 a, [data-testid="post_actor_link"]');
-                        if (userEl) {
-                            result.user_posted = userEl.textContent.trim();
-                            result.user_profile_url = userEl.href;
-                        }
-                        
-                        // Basic engagement numbers
-                        const spans = Array.from(document.querySelectorAll('span'));
-                        const numbers = spans
-                            .map(span => span.textContent.trim())
-                            .filter(text => /^\\d+(\\.\\d+)?[KMkm]?$/.test(text))
-                            .map(text => {
-                                const num = parseFloat(text.replace(/[KMkm]/g, ''));
-                                if (text.toLowerCase().includes('k')) return num * 1000;
-                                if (text.toLowerCase().includes('m')) return num * 1000000;
-                                return num;
-                            });
-                        
-                        if (numbers.length >= 1) result.views = numbers[0];
-                        if (numbers.length >= 2) result.num_comments = numbers[1];
-                        
-                        // Basic date
-                        const timeEl = document.querySelector('time, [data-testid="post_timestamp"], .timestamp');
-                        if (timeEl) {
-                            result.date_posted = timeEl.textContent.trim();
-                        }
-                        
-                        return result;
-                    }''')
+                    # A full quick scrape takes whatever is on the page; a projection waits briefly for its fields
+                    data = self.evaluate_until_filled(page, script, stages, budget_ms=0 if fields is None else 3000)
                     
                     self.logger.info("Quick data extraction completed")
                     
                 except Exception as e:
-                    self.logger.error(f"Failed to extract data: {str(e)}")
+                    self.logger.error("Failed to extract data: %s", e)
                     browser.close()
                     return None
                 
-                # Extract hashtags
-                hashtags = self.extract_hashtags(data.get('description', ''))
-                
-                # Build basic reel data (skip complex video links extraction)
-                reel_data = {
-                    'url': url,
-                    'user_posted': data.get('user_posted', ''),
-                    'description': data.get('description', ''),
-                    'hashtags': hashtags,
-                    'num_comments': data.get('num_comments'),
-                    'date_posted': data.get('date_posted'),
-                    'likes': data.get('views'),
-                    'views': data.get('views'),
-                    'video_play_count': data.get('views'),
-                    'top_comments': [],
-                    'post_id': reel_id,
-                    'thumbnail': '',
-                    'shortcode': reel_id,
-                    'content_id': reel_id,
-                    'product_type': 'clips',
-                    'coauthor_producers': [],
-                    'tagged_users': [],
-                    'length': None,
-                    'video_url': data.get('video_url', ''),
-                    'audio_url': '',
-                    'posts_count': None,
-                    'followers': None,
-                    'following': None,
-                    'user_profile_url': data.get('user_profile_url'),
-                    'is_paid_partnership': None,
-                    'is_verified': None,
-                    'views_source': 'quick_scrape'
-                }
+                media_probes = self.start_media_probe(data, media_watcher, proxy) if 'media' in stages else []
+                
+                if 'comments' in stages:
+                    data['top_comments'] = self.collect_top_comments(page)
+                
+                if snapshot:
+                    self.save_snapshot(page, recorder, reel_id, url, 'quick')
+                
+                if 'media' in stages:
+                    data['media'] = self.media_metadata(media_probes)
+                
+                reel_data = self.build_quick_reel_data(url, reel_id, data, stages, fields)
                 
                 browser.close()
                 self.logger.info("Quick scrape completed successfully")
+                self.report_cache(cache_stats)
                 return reel_data
                 
         except Exception as e:
-            self.logger.error(f"Quick scraping failed: {str(e)}")
-            return None 
\ No newline at end of file
+            self.logger.error("Quick scraping failed: %s", e)
+            return None
+
+    def build_quick_reel_data(self, url, reel_id, data, stages, fields):
+        """Build the quick-tier ReelRecord from the extraction script's result"""
+        # Extract hashtags
+        hashtags = self.extract_hashtags(data.get('description', '')) if 'description' in stages else []
+        
+        # Build basic reel data (skip complex video links extraction)
+        reel_data = ReelRecord(
+            url=url,
+            user_posted=data.get('user_posted', ''),
+            description=data.get('description', ''),
+            hashtags=hashtags,
+            num_comments=data.get('num_comments'),
+            date_posted=data.get('date_posted'),
+            likes=data.get('views'),
+            views=data.get('views'),
+            video_play_count=data.get('views'),
+            top_comments=data.get('top_comments', []),
+            post_id=reel_id,
+            thumbnail=data.get('thumbnail', ''),
+            shortcode=reel_id,
+            content_id=reel_id,
+            product_type='clips',
+            coauthor_producers=[],
+            tagged_users=[],
+            **self.media_fields(data.get('media')),
+            video_url=data.get('video_url', ''),
+            audio_url='',
+            posts_count=None,
+            followers=None,
+            following=None,
+            user_profile_url=data.get('user_profile_url'),
+            is_paid_partnership=None,
+            is_verified=None,
+            views_source='quick_scrape'
+        )
+        return self.project(reel_data, fields)
@@ -0,0 +1,196 @@
+"""Self-tuning order of the CSS selector strategies used by in-page extraction.
+
+Each strategy group (e.g. the candidate selectors for the creator link) is a
+list of selectors tried in order until one matches. The extraction script
+reports, for every selector it tried, whether it matched and how long the
+query took. ``SelectorRegistry`` accumulates these observations and orders
+each group by smoothed hit rate, then by mean cost. Selectors that have
+stopped matching (``dead_after`` attempts in a row without a hit) are dropped.
+Every ``explore_every``-th script still tries them last, so a selector that
+starts matching again comes back.
+
+Counters decay (halve) once a selector has ``window`` attempts, so the order
+follows markup changes. The run of misses since the last hit never decays. With a ``path`` the counters are shared through an
+SQLite file: each process adds its deltas on flush and reloads the totals.
+"""
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _Counter:
+    __slots__ = ('attempts', 'hits', 'cost_ms', 'misses')
+
+    def __init__(self, attempts=0.0, hits=0.0, cost_ms=0.0, misses=0.0):
+        self.attempts = attempts
+        self.hits = hits
+        self.cost_ms = cost_ms
+        # Attempts since the last hit
+        self.misses = misses
+
+    def add(self, other):
+        """Append other's (later) observations"""
+        self.attempts += other.attempts
+        self.hits += other.hits
+        self.cost_ms += other.cost_ms
+        # A hit in other ends the current run of misses; other.misses then counts from that hit
+        self.misses = other.misses if other.hits else self.misses + other.misses
+
+    def halve(self):
+        self.attempts /= 2
+        self.hits /= 2
+        self.cost_ms /= 2
+
+    @property
+    def hit_rate(self):
+        # Laplace smoothing: an untried selector starts at 0.5
+        return (self.hits + 1) / (self.attempts + 2)
+
+    @property
+    def mean_ms(self):
+        return self.cost_ms / self.attempts if self.attempts else 0.0
+
+
+class SelectorRegistry:
+    """Hit-rate and cost statistics per selector, and the strategy order derived from them"""
+
+    def __init__(self, strategies, path=None, dead_after=50, explore_every=20, window=1000, slow_ms=5.0,
+                 flush_interval=30):
+        # {group: (selector, ...)} in the default (hand-written) order
+        self.strategies = {group: tuple(selectors) for group, selectors in strategies.items()}
+        self.path = path
+        # A selector that missed this many attempts in a row is dead
+        self.dead_after = dead_after
+        self.explore_every = explore_every
+        self.window = window
+        self.slow_ms = slow_ms
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._totals = {(g, s): _Counter() for g, selectors in self.strategies.items() for s in selectors}
+        self._pending = {}
+        self._scripts = 0
+        self._last_flush = time.monotonic()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            with self._lock, self._db:
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS selector_stats (group_name TEXT NOT NULL, selector TEXT NOT NULL, '
+                    'attempts REAL NOT NULL, hits REAL NOT NULL, cost_ms REAL NOT NULL, '
+                    'misses REAL NOT NULL DEFAULT 0, PRIMARY KEY (group_name, selector))'
+                )
+                if 'misses' not in {row[1] for row in self._db.execute('PRAGMA table_info(selector_stats)')}:
+                    # Files written before misses were tracked: a selector without hits missed every attempt
+                    self._db.execute('ALTER TABLE selector_stats ADD COLUMN misses REAL NOT NULL DEFAULT 0')
+                    self._db.execute('UPDATE selector_stats SET misses = attempts WHERE hits = 0')
+                self._load()
+
+    def _is_dead(self, counter):
+        return counter.misses >= self.dead_after
+
+    def _rank(self, group, selector):
+        counter = self._totals[(group, selector)]
+        return (-counter.hit_rate, counter.mean_ms, self.strategies[group].index(selector))
+
+    def order(self, group, explore=False):
+        """Selectors of a group, best first; dead ones are left out unless exploring (then they go last)"""
+        selectors = sorted(self.strategies[group], key=lambda s: self._rank(group, s))
+        live = [s for s in selectors if not self._is_dead(self._totals[(group, s)])]
+        if explore or not live:
+            return live + [s for s in selectors if s not in live]
+        return live
+
+    def ordered(self):
+        """{group: [selector, ...]} for the next extraction script"""
+        with self._lock:
+            self._scripts += 1
+            explore = self.explore_every and self._scripts % self.explore_every == 0
+            return {group: self.order(group, explore) for group in self.strategies}
+
+    def record(self, observations):
+        """Add one script run's observations: {group: [[selector, hit, ms], ...]}"""
+        if not observations:
+            return
+        with self._lock:
+            for group, tries in observations.items():
+                for selector, hit, ms in tries:
+                    key = (group, selector)
+                    if key not in self._totals:
+                        continue
+                    delta = _Counter(1, 1 if hit else 0, float(ms or 0), 0 if hit else 1)
+                    self._totals[key].add(delta)
+                    if self._db is not None:
+                        self._pending.setdefault(key, _Counter()).add(delta)
+                    elif self._totals[key].attempts >= self.window:
+                        self._totals[key].halve()
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def _load(self):
+        for group, selector, attempts, hits, cost_ms, misses in self._db.execute(
+                'SELECT group_name, selector, attempts, hits, cost_ms, misses FROM selector_stats'):
+            if (group, selector) in self._totals:
+                self._totals[(group, selector)] = _Counter(attempts, hits, cost_ms, misses)
+
+    def flush(self):
+        """Add pending deltas to the shared file, decay it and reload the totals of all processes"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if self._db is None:
+                return
+            pending, self._pending = self._pending, {}
+            try:
+                with self._db:
+                    # Same rule as _Counter.add: a delta with hits restarts the run of misses
+                    self._db.executemany(
+                        'INSERT INTO selector_stats (group_name, selector, attempts, hits, cost_ms, misses) '
+                        'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (group_name, selector) DO UPDATE SET '
+                        'attempts = attempts + excluded.attempts, hits = hits + excluded.hits, '
+                        'cost_ms = cost_ms + excluded.cost_ms, '
+                        'misses = CASE WHEN excluded.hits > 0 THEN excluded.misses ELSE misses + excluded.misses END',
+                        [(g, s, c.attempts, c.hits, c.cost_ms, c.misses) for (g, s), c in pending.items()])
+                    self._db.execute('UPDATE selector_stats SET attempts = attempts / 2, hits = hits / 2, '
+                                     'cost_ms = cost_ms / 2 WHERE attempts >= ?', (self.window,))
+                self._load()
+            except sqlite3.Error as e:
+                logger.warning("Failed to persist selector statistics: %s", e)
+                for key, counter in pending.items():
+                    self._pending.setdefault(key, _Counter()).add(counter)
+
+    def report(self):
+        """Per group, every selector in current order with its statistics and status (active, slow, dead)"""
+        with self._lock:
+            report = {}
+            for group in self.strategies:
+                rows = []
+                for rank, selector in enumerate(self.order(group, explore=True)):
+                    counter = self._totals[(group, selector)]
+                    if self._is_dead(counter):
+                        status = 'dead'
+                    elif counter.attempts and counter.mean_ms >= self.slow_ms:
+                        status = 'slow'
+                    else:
+                        status = 'active'
+                    rows.append({
+                        'selector': selector,
+                        'rank': rank,
+                        'attempts': round(counter.attempts, 1),
+                        'hits': round(counter.hits, 1),
+                        'hit_rate': round(counter.hits / counter.attempts, 3) if counter.attempts else None,
+                        'misses_since_hit': int(counter.misses),
+                        'mean_ms': round(counter.mean_ms, 3),
+                        'status': status,
+                    })
+                report[group] = rows
+            return report
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
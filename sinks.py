@@ -0,0 +1,336 @@
+"""Batched output sinks for scrape results.
+
+A sink receives results with ``put()``, which only enqueues: a background
+writer thread drains a bounded queue and writes a batch once it holds
+``batch_size`` results or ``flush_interval`` seconds after the batch's first
+result. When the queue is full, ``put()`` waits at most ``put_timeout``
+seconds (default: not at all), then drops the result and counts it. A slow
+destination therefore never blocks a scrape worker for long.
+
+- ``SqliteSink``: one transaction per batch
+- ``JsonlSink``: gzip-compressed JSON lines, rotated by size and age
+- ``WebhookSink``: one POST per batch, retried with exponential backoff
+
+Projected results (a ``fields`` selection) are not full records: their rows
+carry the list of fields they hold under ``_fields`` (a ``fields`` column in
+SQLite), so consumers never mistake a missing field for a null one.
+
+``SinkGroup`` fans results out to several sinks; ``sinks_from_env()``
+builds one from SINK_* environment variables.
+"""
+import gzip
+import json
+import logging
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+
+import requests
+
+from records import ReelRecord, json_default
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class Sink:
+    """Base class: bounded queue plus a writer thread that calls write_batch()"""
+
+    name = 'sink'
+
+    def __init__(self, batch_size=100, flush_interval=5.0, max_queue=10000, put_timeout=0.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stats = {'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, result):
+        """Enqueue one result (ReelRecord or dict); returns False if it was dropped because the queue is full"""
+        item = dict(result)
+        if isinstance(result, ReelRecord) and result.projected:
+            item['_fields'] = list(result.fields)
+        try:
+            if self.put_timeout > 0:
+                self._queue.put(item, timeout=self.put_timeout)
+            else:
+                self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._stats['dropped'] += 1
+            logger.warning("%s queue full, dropped a result", self.name)
+            return False
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            # Wake up at least once per flush interval so idle() can run (e.g. age-based rotation)
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._flush(batch)
+                self.close_resources()
+                return
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+                deadline = None
+            elif not batch:
+                deadline = None
+            if item is None:
+                self.idle()
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        try:
+            self.write_batch(batch)
+        except Exception as e:
+            logger.error("%s failed to write %d results: %s", self.name, len(batch), e)
+            with self._lock:
+                self._stats['failed'] += len(batch)
+            return
+        with self._lock:
+            self._stats['written'] += len(batch)
+            self._stats['batches'] += 1
+
+    def write_batch(self, batch):
+        """Persist a list of result dicts (runs in the writer thread)"""
+        raise NotImplementedError
+
+    def idle(self):
+        """Called in the writer thread after a flush interval without results"""
+
+    def close_resources(self):
+        """Release the destination (runs in the writer thread after the last batch)"""
+
+    def close(self, timeout=30):
+        """Flush pending results and stop the writer"""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, queued=self._queue.qsize())
+
+
+class SqliteSink(Sink):
+    """Append results to an SQLite table, one transaction per batch"""
+
+    name = 'sqlite'
+
+    def __init__(self, path='results.sqlite', table='results', **kwargs):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self._db = None
+        super().__init__(**kwargs)
+
+    def _connect(self):
+        # Opened in the writer thread, the only thread that uses it
+        db = sqlite3.connect(self.path)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} '
+            '(id INTEGER PRIMARY KEY, post_id TEXT, url TEXT, scraped_at REAL NOT NULL, data TEXT NOT NULL, '
+            'fields TEXT)')
+        if 'fields' not in {row[1] for row in db.execute(f'PRAGMA table_info({self.table})')}:
+            # Tables created before projected rows were tagged
+            db.execute(f'ALTER TABLE {self.table} ADD COLUMN fields TEXT')
+        db.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_post_id ON {self.table} (post_id)')
+        return db
+
+    def write_batch(self, batch):
+        if self._db is None:
+            self._db = self._connect()
+        now = time.time()
+        rows = []
+        for r in batch:
+            # Full records have NULL fields; projections list the fields they hold
+            fields = r.get('_fields')
+            data = {k: v for k, v in r.items() if k != '_fields'}
+            rows.append((r.get('post_id'), r.get('url'), now, json.dumps(data, default=json_default, ensure_ascii=False),
+                         ','.join(fields) if fields is not None else None))
+        with self._db:
+            self._db.executemany(
+                f'INSERT INTO {self.table} (post_id, url, scraped_at, data, fields) VALUES (?, ?, ?, ?, ?)', rows)
+
+    def close_resources(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class JsonlSink(Sink):
+    """Gzip-compressed JSON lines under a directory, rotated by uncompressed size and file age.
+
+    The file being written ends in ``.part`` and is renamed to ``.jsonl.gz`` on
+    rotation, so readers only ever pick up complete files.
+    """
+
+    name = 'jsonl'
+
+    def __init__(self, directory='results', prefix='reels', max_bytes=64 * 1024 * 1024, max_age=3600, **kwargs):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._file = None
+        self._path = None
+        self._bytes = 0
+        self._opened_at = 0.0
+        self._seq = 0
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(**kwargs)
+
+    def _open(self):
+        self._seq += 1
+        name = f"{self.prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._seq}.jsonl.gz"
+        self._path = os.path.join(self.directory, name)
+        self._file = gzip.open(self._path + '.part', 'wt', encoding='utf-8')
+        self._bytes = 0
+        self._opened_at = time.monotonic()
+
+    def _rotate(self):
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(self._path + '.part', self._path)
+        logger.info("Rotated %s (%d bytes uncompressed)", self._path, self._bytes)
+        self._file = None
+
+    def _expired(self):
+        return self._file is not None and time.monotonic() - self._opened_at >= self.max_age
+
+    def write_batch(self, batch):
+        if self._expired():
+            self._rotate()
+        if self._file is None:
+            self._open()
+        text = ''.join(json.dumps(r, default=json_default, separators=(',', ':'), ensure_ascii=False) + '\n'
+                       for r in batch)
+        self._file.write(text)
+        # Sync-flush the compressor so everything up to this batch survives a crash
+        self._file.flush()
+        self._bytes += len(text)
+        if self._bytes >= self.max_bytes:
+            self._rotate()
+
+    def idle(self):
+        if self._expired():
+            self._rotate()
+
+    def close_resources(self):
+        self._rotate()
+
+
+class WebhookSink(Sink):
+    """POST batches as {"results": [...]} to a URL, retrying 429/5xx and connection errors with backoff"""
+
+    name = 'webhook'
+
+    def __init__(self, url, session=None, headers=None, timeout=10, max_retries=5, backoff=1.0, max_backoff=60,
+                 **kwargs):
+        self.url = url
+        self.session = session or requests.Session()
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        super().__init__(**kwargs)
+
+    def _delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        # Full jitter, so workers that failed together do not retry together
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def write_batch(self, batch):
+        body = json.dumps({'results': batch}, default=json_default, ensure_ascii=False).encode('utf-8')
+        headers = dict(self.headers, **{'Content-Type': 'application/json'})
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = self.session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+                if response.status_code < 400:
+                    return
+                if response.status_code != 429 and response.status_code < 500:
+                    raise RuntimeError(f"Webhook rejected batch: HTTP {response.status_code}")
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error = str(e)
+            if attempt == self.max_retries:
+                raise RuntimeError(f"Webhook failed after {attempt + 1} attempts: {error}")
+            delay = self._delay(attempt, response)
+            logger.warning("Webhook delivery failed (%s), retrying in %.1fs", error, delay)
+            time.sleep(delay)
+
+    def close_resources(self):
+        self.session.close()
+
+
+class SinkGroup:
+    """Fan results out to several sinks"""
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    def put(self, result):
+        for sink in self.sinks:
+            sink.put(result)
+
+    def close(self, timeout=30):
+        for sink in self.sinks:
+            sink.close(timeout)
+
+    def stats(self):
+        return {sink.name: sink.stats() for sink in self.sinks}
+
+
+def sinks_from_env():
+    """SinkGroup from SINK_SQLITE_PATH, SINK_JSONL_DIR and SINK_WEBHOOK_URL, or None if none is set"""
+    options = {
+        'batch_size': int(os.getenv('SINK_BATCH_SIZE', '100')),
+        'flush_interval': float(os.getenv('SINK_FLUSH_INTERVAL', '5')),
+        'max_queue': int(os.getenv('SINK_QUEUE_SIZE', '10000')),
+    }
+    sinks = []
+    if os.getenv('SINK_SQLITE_PATH'):
+        sinks.append(SqliteSink(os.getenv('SINK_SQLITE_PATH'), **options))
+    if os.getenv('SINK_JSONL_DIR'):
+        sinks.append(JsonlSink(
+            os.getenv('SINK_JSONL_DIR'),
+            max_bytes=int(os.getenv('SINK_JSONL_MAX_MB', '64')) * 1024 * 1024,
+            max_age=int(os.getenv('SINK_JSONL_MAX_AGE', '3600')),
+            **options
+        ))
+    if os.getenv('SINK_WEBHOOK_URL'):
+        token = os.getenv('SINK_WEBHOOK_TOKEN')
+        sinks.append(WebhookSink(
+            os.getenv('SINK_WEBHOOK_URL'),
+            headers={'Authorization': f"Bearer {token}"} if token else None,
+            max_retries=int(os.getenv('SINK_WEBHOOK_RETRIES', '5')),
+            **options
+        ))
+    return SinkGroup(sinks) if sinks else None
@@ -0,0 +1,324 @@
+"""Page snapshots and offline re-extraction.
+
+A snapshot is the rendered DOM of a reel page plus the JSON responses the
+page received, stored gzip-compressed under ``<root>/<reel_id>/<timestamp>-<hash>.json.gz``.
+``reextract`` re-runs extraction over stored snapshots in a process pool,
+with no browser and no network, so backfills run at CPU speed:
+
+    python snapshots.py reextract --root snapshots --workers 8 > results.jsonl
+"""
+import argparse
+import concurrent.futures
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from urllib.parse import urljoin
+
+from counts import normalize_count
+
+logger = logging.getLogger(__name__)
+
+# Captured responses are limited so a snapshot stays small
+MAX_RESPONSES = 50
+MAX_RESPONSE_BYTES = 2 * 1024 * 1024
+
+
+class ResponseRecorder:
+    """Collect a page's JSON responses while it loads; bodies are read after extraction"""
+
+    def __init__(self, page):
+        self.responses = []
+        page.on('response', self._on_response)
+
+    def _on_response(self, response):
+        if len(self.responses) >= MAX_RESPONSES:
+            return
+        content_type = response.headers.get('content-type', '')
+        if 'json' in content_type or '/graphql' in response.url:
+            self.responses.append(response)
+
+    def collect(self):
+        """Read the collected response bodies (skipping any that are gone or too large)"""
+        captured = []
+        for response in self.responses:
+            try:
+                body = response.text()
+            except Exception:
+                continue
+            if len(body) > MAX_RESPONSE_BYTES:
+                continue
+            captured.append({'url': response.url, 'status': response.status, 'body': body})
+        return captured
+
+
+class SnapshotStore:
+    """Content-addressed store of compressed page snapshots, keyed by reel ID and timestamp"""
+
+    def __init__(self, root='snapshots'):
+        self.root = str(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def save(self, reel_id, url, mode, html, responses, timestamp=None):
+        """Store a snapshot and return its path"""
+        timestamp = time.time() if timestamp is None else timestamp
+        reel_id = str(reel_id or 'unknown')
+        if not re.fullmatch(r'[0-9A-Za-z_-]+', reel_id):
+            raise ValueError(f"Invalid reel ID for snapshot store: {reel_id!r}")
+        directory = os.path.join(self.root, reel_id)
+        os.makedirs(directory, exist_ok=True)
+        snapshot = {
+            'reel_id': reel_id,
+            'url': url,
+            'mode': mode,
+            'timestamp': timestamp,
+            'html': html,
+            'responses': responses,
+        }
+        raw = json.dumps(snapshot, separators=(',', ':')).encode('utf-8')
+        # The content hash keeps two saves in the same millisecond apart (identical content is stored once)
+        name = f"{int(timestamp * 1000)}-{hashlib.sha256(raw).hexdigest()[:12]}.json.gz"
+        path = os.path.join(directory, name)
+        # Write to a private temporary name first so readers never see a partial snapshot, then
+        # publish it with link(), which fails instead of replacing an existing file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'xb') as f:
+            f.write(gzip.compress(raw, compresslevel=6, mtime=0))
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+        return path
+
+    @staticmethod
+    def load(path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def paths(self, reel_ids=None, latest_only=False):
+        """Snapshot paths, oldest first per reel"""
+        reel_ids = reel_ids or sorted(os.listdir(self.root))
+        for reel_id in reel_ids:
+            directory = os.path.join(self.root, str(reel_id))
+            if not os.path.isdir(directory):
+                continue
+            # <ms>-<hash>.json.gz (older snapshots are named <ms>.json.gz)
+            names = sorted((n for n in os.listdir(directory) if n.endswith('.json.gz')),
+                           key=lambda n: (int(n.split('.')[0].split('-')[0]), n))
+            if latest_only:
+                names = names[-1:]
+            for name in names:
+                yield os.path.join(directory, name)
+
+
+# Counter keys in Facebook's JSON payloads, used to fill counts the DOM pass missed
+_RESPONSE_COUNTS = {
+    'comments': re.compile(r'"comment_count":\{"total_count":(\d+)'),
+    'shares': re.compile(r'"share_count":\{"count":(\d+)'),
+    'likes': re.compile(r'"reaction_count":\{"count":(\d+)'),
+    'views': re.compile(r'"(?:play_count|video_view_count)":(\d+)'),
+}
+
+
+def _texts_to_count(elements):
+    for el in elements:
+        number = normalize_count(el.get_text(strip=True))
+        if number is not None:
+            return number
+    return None
+
+
+def _pick_first(soup, selectors, group, accept):
+    """Python counterpart of the page scripts' pickFirst(): first match of the group's selectors, in order,
+    that accept() takes"""
+    for selector in selectors.get(group, ()):
+        try:
+            element = soup.select_one(selector)
+        except Exception:
+            element = None
+        if element is not None and accept(element):
+            return element
+    return None
+
+
+def extract_from_html(html, mode, stages, selectors=None, base_url=None):
+    """Python port of the in-page extraction stages, returning the same keys as the page scripts
+
+    ``selectors`` is {group: [selector, ...]} in the order to try them, like the
+    page scripts' SELECTORS; the default is SELECTOR_STRATEGIES. Links and media
+    URLs are resolved against ``base_url`` (the page URL), as the page's el.href
+    and video.src properties are.
+    """
+    from bs4 import BeautifulSoup
+    from scraper import SELECTOR_STRATEGIES
+
+    if selectors is None:
+        selectors = {group: list(group_selectors) for group, group_selectors in SELECTOR_STRATEGIES.items()}
+    soup = BeautifulSoup(html, 'html.parser')
+    result = {}
+
+    def absolute(url):
+        return urljoin(base_url, url) if base_url else url
+
+    if 'video' in stages:
+        video = soup.find('video')
+        if video and video.get('src'):
+            result['video_url'] = absolute(video['src'])
+        if video and video.get('poster'):
+            result['thumbnail'] = absolute(video['poster'])
+
+    if 'description' in stages:
+        desc = _pick_first(soup, selectors, 'description', lambda el: el.get_text().strip())
+        if desc:
+            result['description'] = desc.get_text().strip()
+
+    if 'user' in stages:
+        if mode == 'quick':
+            user = _pick_first(soup, selectors, 'quick_user', lambda el: el.get('href'))
+            if user:
+                result['user_posted'] = user.get_text().strip()
+                result['user_profile_url'] = absolute(user.get('href'))
+        else:
+            user = _pick_first(soup, selectors, 'user', lambda el: el.get('href'))
+            if user:
+                result['user_profile_url'] = absolute(user['href'])
+                result['user_name'] = user.get_text().strip()
+
+    if 'engagement' in stages:
+        keys = {'Comment': 'comments', 'Share': 'shares', 'Like': 'likes'}
+        for button in soup.select('[aria-label="Comment"], [aria-label="Share"], [aria-label="Like"]'):
+            key = keys[button['aria-label']]
+            if result.get(key):
+                continue
+            container = button.find_parent('div')
+            depth = 0
+            while container is not None and depth < 4 and not result.get(key):
+                number = _texts_to_count(container.find_all('span'))
+                if number is not None:
+                    result[key] = number
+                container = container.find_parent()
+                depth += 1
+        if not (result.get('comments') and result.get('shares') and result.get('likes')):
+            numbers = sorted((n for n in (normalize_count(s.get_text(strip=True)) for s in soup.find_all('span'))
+                              if n is not None), reverse=True)
+            # Usually: likes (largest), comments (medium), shares (smallest)
+            for key, number in zip(('likes', 'comments', 'shares'), numbers):
+                if not result.get(key):
+                    result[key] = number
+
+    if 'counts' in stages:
+        numbers = [n for n in (normalize_count(s.get_text(strip=True)) for s in soup.find_all('span')) if n is not None]
+        if len(numbers) >= 1:
+            result['views'] = numbers[0]
+        if len(numbers) >= 2:
+            result['num_comments'] = numbers[1]
+
+    if 'date' in stages:
+        time_el = _pick_first(soup, selectors, 'date', lambda el: el.get_text().strip())
+        if time_el:
+            result['date_posted'] = time_el.get_text().strip()
+
+    return result
+
+
+def fill_from_responses(data, responses, mode):
+    """Fill counters missing from the DOM pass using the captured JSON responses"""
+    for key, pattern in _RESPONSE_COUNTS.items():
+        target = 'num_comments' if (mode == 'quick' and key == 'comments') else key
+        if data.get(target):
+            continue
+        for response in responses:
+            match = pattern.search(response.get('body') or '')
+            if match:
+                data[target] = int(match.group(1))
+                break
+    return data
+
+
+_worker_scraper = None
+
+
+def reextract_snapshot(path, fields=None):
+    """Re-run extraction over one stored snapshot; returns a ReelRecord or None"""
+    global _worker_scraper
+    # Imported here so the scraper module (and its dependencies) load once per worker process
+    from scraper import (FacebookReelScraper, parse_fields, stages_for,
+                         PUBLIC_FIELD_STAGES, QUICK_FIELD_STAGES)
+    if _worker_scraper is None:
+        _worker_scraper = FacebookReelScraper(use_cookies=False)
+
+    try:
+        snapshot = SnapshotStore.load(path)
+    except Exception as e:
+        logger.error("Failed to load snapshot %s: %s", path, e)
+        return None
+
+    fields = parse_fields(fields)
+    mode = snapshot.get('mode', 'public')
+    field_stages = QUICK_FIELD_STAGES if mode == 'quick' else PUBLIC_FIELD_STAGES
+    stages = stages_for(fields, field_stages)
+    # Same strategy order as live scrapes, with dead selectors tried last rather than skipped
+    registry = _worker_scraper.selector_registry
+    selectors = {group: registry.order(group, explore=True) for group in registry.strategies}
+    data = extract_from_html(snapshot['html'], mode, stages, selectors, base_url=snapshot.get('url'))
+    data = fill_from_responses(data, snapshot.get('responses') or [], mode)
+
+    if mode == 'quick':
+        reel_data = _worker_scraper.build_quick_reel_data(snapshot['url'], snapshot['reel_id'], data, stages, fields)
+    else:
+        reel_data = _worker_scraper.build_public_reel_data(snapshot['url'], snapshot['reel_id'], data, stages, fields)
+    reel_data['snapshot_timestamp'] = snapshot['timestamp']
+    return reel_data
+
+
+def reextract(root='snapshots', reel_ids=None, fields=None, workers=None, latest_only=False):
+    """Yield re-extracted ReelRecords for every stored snapshot, using a process pool"""
+    paths = list(SnapshotStore(root).paths(reel_ids, latest_only=latest_only))
+    workers = workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(paths) // (workers * 4))
+        for reel_data in executor.map(reextract_snapshot, paths, [fields] * len(paths), chunksize=chunksize):
+            if reel_data:
+                yield reel_data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Page snapshot tools")
+    sub = parser.add_subparsers(dest='command', required=True)
+    re_parser = sub.add_parser('reextract', help="Re-run extraction over stored snapshots (no browser, no network)")
+    re_parser.add_argument('--root', default='snapshots', help="Snapshot directory")
+    re_parser.add_argument('--reel', action='append', dest='reel_ids', help="Only this reel ID (repeatable)")
+    re_parser.add_argument('--fields', help="Comma-separated output fields")
+    re_parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    re_parser.add_argument('--latest', action='store_true', help="Only the newest snapshot of each reel")
+    re_parser.add_argument('--output', help="Write here instead of stdout")
+    re_parser.add_argument('--format', choices=('ndjson', 'binary'), default='ndjson',
+                           help="NDJSON or ReelRecord binary records (see records.py)")
+    args = parser.parse_args(argv)
+
+    from records import write_binary, write_ndjson
+    logging.basicConfig(level=logging.WARNING)
+    binary = args.format == 'binary'
+    if args.output:
+        out = open(args.output, 'wb' if binary else 'w')
+    else:
+        out = sys.stdout.buffer if binary else sys.stdout
+    started = time.time()
+    try:
+        records = reextract(args.root, args.reel_ids, args.fields, args.workers, args.latest)
+        count = write_binary(records, out) if binary else write_ndjson(records, out)
+    finally:
+        if args.output:
+            out.close()
+    print(f"Re-extracted {count} snapshots in {time.time() - started:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Structured, asynchronous, sampled logging.
+
+``configure_logging`` replaces the root handlers with a ``QueueHandler``. The
+scraping threads only enqueue records; a ``QueueListener`` thread formats and
+writes them. Records carry the current job and reel IDs (from context
+variables) and are written as one JSON object per line.
+
+Below WARNING, records are sampled per job: a job's INFO lines are either
+all kept or all dropped, so a sampled job reads end to end. Jobs outside the
+sample that are tracked with ``begin_job``/``end_job`` have their records
+buffered until they end, and the buffer is written instead of dropped when
+the job fails (or logs an ERROR), so failures always keep their full trail.
+WARNING and above are always kept. Sampling runs before any formatting, so
+dropped records cost next to nothing. Call sites should log with %-style
+arguments (not f-strings) so that disabled levels never build their message.
+"""
+import atexit
+import collections
+import contextlib
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import zlib
+
+job_id_var = contextvars.ContextVar('job_id', default=None)
+reel_id_var = contextvars.ContextVar('reel_id', default=None)
+
+_listener = None
+_sampler = None
+
+
+class ContextFilter(logging.Filter):
+    """Attach job_id/reel_id from the emitting thread's context to the record"""
+
+    def filter(self, record):
+        record.job_id = job_id_var.get()
+        record.reel_id = reel_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every WARNING+ record and a sample_rate share of the rest, decided per job when there is one
+
+    Records of tracked jobs outside the sample are held back (at most ``max_buffered``
+    per job, newest kept) until ``end_job`` says whether the job failed. Runs after
+    ContextFilter, in the emitting thread of ``handler``.
+    """
+
+    def __init__(self, handler, sample_rate=1.0, max_buffered=1000):
+        super().__init__()
+        self.handler = handler
+        self.sample_rate = sample_rate
+        self.max_buffered = max_buffered
+        # job_id -> deque of prepared records, or None once the job failed and keeps everything
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def in_sample(self, job_id):
+        return zlib.crc32(job_id.encode('utf-8')) % 10000 < self.sample_rate * 10000
+
+    def begin_job(self, job_id):
+        if self.sample_rate < 1.0 and not self.in_sample(job_id):
+            with self._lock:
+                self._jobs[job_id] = collections.deque(maxlen=self.max_buffered)
+
+    def end_job(self, job_id, success):
+        with self._lock:
+            buffered = self._jobs.pop(job_id, None)
+        if buffered and not success:
+            self._flush(buffered)
+
+    def _flush(self, records):
+        for record in records:
+            self.handler.enqueue(record)
+
+    def filter(self, record):
+        if self.sample_rate >= 1.0:
+            return True
+        job_id = getattr(record, 'job_id', None)
+        if job_id is None:
+            return record.levelno >= logging.WARNING or random.random() < self.sample_rate
+        if job_id not in self._jobs:
+            # Untracked or sampled job
+            return record.levelno >= logging.WARNING or self.in_sample(job_id)
+        with self._lock:
+            buffered = self._jobs.get(job_id)
+            if buffered is not None:
+                if record.levelno < logging.WARNING:
+                    buffered.append(self.handler.prepare(record))
+                    return False
+                if record.levelno >= logging.ERROR:
+                    # The job is failing: write what it logged so far and keep the rest
+                    self._jobs[job_id] = None
+                    self._flush(buffered)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        job_id = getattr(record, 'job_id', None)
+        reel_id = getattr(record, 'reel_id', None)
+        if job_id:
+            entry['job_id'] = job_id
+        if reel_id:
+            entry['reel_id'] = reel_id
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain-text lines with the job/reel IDs when set"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(levelname)s - %(name)s - %(context)s%(message)s')
+
+    def format(self, record):
+        parts = [f"{key}={getattr(record, key)}" for key in ('job_id', 'reel_id') if getattr(record, key, None)]
+        record.context = f"[{' '.join(parts)}] " if parts else ''
+        return super().format(record)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that merges args in the emitting thread but leaves formatting to the listener"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        # Args may be mutable objects, so render the message before the record changes threads
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level=None, sample_rate=None, fmt=None, stream=None):
+    """Route all logging through a background queue listener (idempotent; later calls reconfigure)
+
+    Defaults come from LOG_LEVEL, LOG_SAMPLE_RATE and LOG_FORMAT ('json' or 'text').
+    """
+    global _listener, _sampler
+    level = level or os.getenv('LOG_LEVEL', 'INFO').upper()
+    sample_rate = float(os.getenv('LOG_SAMPLE_RATE', '1.0') if sample_rate is None else sample_rate)
+    fmt = fmt or os.getenv('LOG_FORMAT', 'json')
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    records = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    # Filters run in the emitting thread: capture its context, then sample by job
+    handler.addFilter(ContextFilter())
+    _sampler = SamplingFilter(handler, sample_rate)
+    handler.addFilter(_sampler)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def begin_job(job_id):
+    """Start tracking a job, so its unsampled records are kept if it fails"""
+    if _sampler is not None and job_id is not None:
+        _sampler.begin_job(job_id)
+
+
+def end_job(job_id, success):
+    """Finish a job: drop its held-back records if it succeeded, write them if it failed"""
+    if _sampler is not None and job_id is not None:
+        _sampler.end_job(job_id, success)
+
+
+@atexit.register
+def _flush():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+@contextlib.contextmanager
+def log_context(job_id=None, reel_id=None):
+    """Set the job/reel IDs attached to records logged inside the block"""
+    tokens = []
+    if job_id is not None:
+        tokens.append((job_id_var, job_id_var.set(job_id)))
+    if reel_id is not None:
+        tokens.append((reel_id_var, reel_id_var.set(reel_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """executor.submit that runs fn in a copy of the caller's context, so log records keep its job/reel IDs"""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -0,0 +1,118 @@
+import os
+import time
+
+import pytest
+
+import browser_watchdog
+from browser_watchdog import OWNER_FLAG, PLAYWRIGHT_MARKER, ChromiumWatchdog
+
+
+MB = 1024 * 1024
+CHROME = '/opt/chromium/chrome'
+
+
+def _fake_process(proc, pid, ppid, args, rss_mb=None, age=10):
+    path = proc / str(pid)
+    path.mkdir()
+    # pid (comm) state ppid ... utime(14) stime(15) ... starttime(22), in clock ticks since boot (btime 0)
+    started = int((time.time() - age) * os.sysconf('SC_CLK_TCK'))
+    fields = ['S', str(ppid)] + ['0'] * 9 + ['5', '5'] + ['0'] * 6 + [str(started)]
+    (path / 'stat').write_text(f"{pid} (chrome) {' '.join(fields)}\n")
+    (path / 'cmdline').write_bytes('\x00'.join(args).encode())
+    pages = 100 if rss_mb is None else rss_mb * MB // os.sysconf('SC_PAGE_SIZE')
+    (path / 'statm').write_text(f"1000 {pages}\n")
+
+
+@pytest.fixture
+def fake_proc(tmp_path, monkeypatch):
+    """Empty fake /proc; _kill records pids instead of signalling real processes"""
+    proc = tmp_path / 'proc'
+    proc.mkdir()
+    (proc / 'stat').write_text('btime 0\n')
+    monkeypatch.setattr(browser_watchdog, 'PROC', str(proc))
+    killed = []
+    monkeypatch.setattr(ChromiumWatchdog, '_kill', lambda self, pids: killed.extend(pids))
+    return proc, killed
+
+
+def _browser(proc, pid, ppid, owner_pid, instance='test', **kwargs):
+    _fake_process(proc, pid, ppid, [CHROME, PLAYWRIGHT_MARKER, f"{OWNER_FLAG}={instance}.{owner_pid}"], **kwargs)
+
+
+def test_scan_only_sees_owned_browsers(tmp_path, monkeypatch):
+    proc = tmp_path / 'proc'
+    proc.mkdir()
+    (proc / 'stat').write_text('btime 0\n')
+    me = os.getpid()
+    chrome = '/opt/chromium/chrome'
+    _fake_process(proc, 10, 9, ['node', 'cli.js'])
+    _fake_process(proc, 11, 10, [chrome, PLAYWRIGHT_MARKER, f"{OWNER_FLAG}=test.{me}"])
+    _fake_process(proc, 12, 11, [chrome, '--type=renderer'])
+    # Another worker of the same instance, another instance, and an unrelated Playwright browser
+    _fake_process(proc, 21, 10, [chrome, PLAYWRIGHT_MARKER, f"{OWNER_FLAG}=test.999999"])
+    _fake_process(proc, 31, 10, [chrome, PLAYWRIGHT_MARKER, f"{OWNER_FLAG}=other.{me}"])
+    _fake_process(proc, 41, 10, [chrome, PLAYWRIGHT_MARKER])
+    monkeypatch.setattr(browser_watchdog, 'PROC', str(proc))
+
+    watchdog = ChromiumWatchdog(instance='test')
+    assert sorted(watchdog._scan()) == [11, 21]
+    owned = watchdog._scan(owned_by=me)
+    assert list(owned) == [11]
+    assert [c['pid'] for c in owned[11]['children']] == [12]
+
+
+def test_owner_arg_round_trip(monkeypatch):
+    monkeypatch.setenv('SCRAPER_INSTANCE', 'api.eu-1')
+    assert browser_watchdog._owner([browser_watchdog.owner_arg()]) == ('api.eu-1', os.getpid())
+    assert browser_watchdog._owner(['--no-sandbox']) is None
+
+
+def test_sample_enforces_budgets_on_own_browsers(fake_proc):
+    proc, killed = fake_proc
+    me = os.getpid()
+    _fake_process(proc, 10, 9, ['node', 'cli.js'])
+    # Over the browser budget in total (two renderers under budget each)
+    _browser(proc, 11, 10, me, rss_mb=100)
+    _fake_process(proc, 12, 11, [CHROME, '--type=renderer'], rss_mb=600)
+    _fake_process(proc, 13, 11, [CHROME, '--type=renderer'], rss_mb=600)
+    # One renderer over the per-context budget
+    _browser(proc, 21, 10, me, rss_mb=100)
+    _fake_process(proc, 22, 21, [CHROME, '--type=renderer'], rss_mb=900)
+    _fake_process(proc, 23, 21, [CHROME, '--type=renderer'], rss_mb=100)
+    # Running longer than max_browser_age
+    _browser(proc, 31, 10, me, rss_mb=50, age=600)
+    # Within budgets
+    _browser(proc, 41, 10, me, rss_mb=50)
+    # Another worker's browser, far over budget: that worker's watchdog handles it
+    _browser(proc, 51, 10, 999999, rss_mb=5000)
+
+    watchdog = ChromiumWatchdog(browser_budget_mb=1200, context_budget_mb=800, max_browser_age=300, instance='test')
+    metrics = watchdog.sample()
+
+    assert sorted(killed) == [11, 12, 13, 22, 31]
+    assert metrics['browsers_killed'] == 2 and metrics['renderers_killed'] == 1
+    assert sorted(t['pid'] for t in metrics['trees']) == [21, 41]
+    assert next(t for t in metrics['trees'] if t['pid'] == 21)['rss_bytes'] == 200 * MB
+
+
+def test_reap_orphans_spares_live_owners(fake_proc):
+    proc, killed = fake_proc
+    me = os.getpid()
+    _fake_process(proc, 10, 9, ['node', 'cli.js'])
+    _fake_process(proc, 500, 1, ['python', 'main.py'])  # another live worker
+    # Driver alive: never an orphan
+    _browser(proc, 11, 10, 600)
+    # Re-parented to init, launching worker gone: reaped with its children
+    _browser(proc, 21, 1, 600)
+    _fake_process(proc, 22, 21, [CHROME, '--type=renderer'])
+    # Re-parented, but the launching worker is alive (its scrape may still be closing the browser)
+    _browser(proc, 31, 1, 500)
+    # Re-parented and launched by this process
+    _browser(proc, 41, 1, me)
+    # Another deployment's orphan
+    _browser(proc, 51, 1, 600, instance='other')
+
+    watchdog = ChromiumWatchdog(instance='test')
+    assert watchdog.reap_orphans() == 2
+    assert sorted(killed) == [21, 22, 41]
+    assert watchdog.metrics()['orphans_reaped'] == 2
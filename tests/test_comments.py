@@ -0,0 +1,78 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from comments import COLLECT_COMMENTS_JS, BoundedIdSet, CommentHarvester
+
+# Just enough of the DOM for COLLECT_COMMENTS_JS: a flat list of article nodes with optional
+# nested replies and buttons; querySelectorAll honours the :not([data-harvested]) filter
+FAKE_DOM = '''
+class Node {
+    constructor(label, id, {replies = [], buttons = []} = {}) {
+        this.label = label; this.id = id; this.dataset = {};
+        this.replies = replies; this.buttons = buttons.map(text => ({textContent: text}));
+        this.removed = false;
+    }
+    getAttribute(name) { return name === 'aria-label' ? this.label : null; }
+    querySelectorAll(selector) {
+        if (selector.startsWith('a[href')) return [{href: `https://fb.com/r?comment_id=${this.id}`, textContent: '1h'}];
+        if (selector.startsWith('div[role="button"]')) return this.buttons;
+        return [];
+    }
+    querySelector(selector) {
+        if (selector === 'div[role="article"]') return this.replies[0] || null;
+        if (selector === 'a[role="link"]') return {textContent: 'Author', href: 'https://fb.com/a'};
+        if (selector === 'div[dir="auto"]') return {textContent: `text ${this.id}`};
+        return null;
+    }
+    remove() { this.removed = true; nodes.splice(nodes.indexOf(this), 1); }
+}
+const nodes = [
+    new Node('Comment by A', '1'),
+    new Node('Comment by B', '2', {buttons: ['View all 3 replies']}),
+    new Node('Comment by C', '3', {replies: [{}]}),
+    new Node('Sponsored', '4'),
+];
+global.document = {
+    querySelectorAll: selector => nodes.filter(n => !(selector.includes(':not([data-harvested])') && n.dataset.harvested)),
+};
+const collect = %s;
+const first = collect();
+const second = collect();
+nodes.push(new Node('Reply by D', '5'));
+const third = collect();
+process.stdout.write(JSON.stringify({
+    first: first.map(c => c.id), second: second.map(c => c.id), third: third.map(c => c.id),
+    left: nodes.map(n => n.id),
+}));
+'''
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_collect_removes_harvested_leaf_comments():
+    output = subprocess.run(['node', '-e', FAKE_DOM % COLLECT_COMMENTS_JS],
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output)
+    assert result['first'] == ['1', '2', '3']
+    assert result['second'] == []
+    assert result['third'] == ['5']
+    # Leaf comments are gone; ones holding replies or "view replies" buttons stay for expansion
+    assert result['left'] == ['2', '3', '4']
+
+
+def test_bounded_id_set_evicts_oldest():
+    ids = BoundedIdSet(max_size=2)
+    assert ids.add('a') and ids.add('b')
+    assert not ids.add('a')  # refreshes 'a'
+    assert ids.add('c')  # evicts 'b'
+    assert len(ids) == 2
+    assert ids.add('b')
+
+
+def test_comment_key_without_id_hashes_content():
+    a = {'id': None, 'author': 'A', 'text': 'hi', 'date': '1h'}
+    assert CommentHarvester.comment_key(a) == CommentHarvester.comment_key(dict(a))
+    assert CommentHarvester.comment_key(a) != CommentHarvester.comment_key(dict(a, text='other'))
+    assert CommentHarvester.comment_key({'id': '42'}) == '42'
@@ -0,0 +1,32 @@
+import shutil
+
+import pytest
+
+from counts import FIXTURES, check_fixtures, check_js_fixtures, normalize_count, normalize_counts
+
+
+def test_python_fixtures():
+    assert check_fixtures() == []
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_js_fixtures_match_python():
+    assert check_js_fixtures() == []
+
+
+def test_non_ascii_digits_are_not_counts():
+    assert normalize_count('٣') is None
+    assert normalize_count('１２') is None
+
+
+def test_loose_mode_takes_first_count():
+    assert normalize_count('1.2K views', strict=False) == 1200
+    assert normalize_count('15 comments', strict=False) == 15
+    assert normalize_count('no numbers', strict=False) is None
+    # Only the first count is used, whatever follows it
+    assert normalize_count('15 comments, 3K views', strict=False) == 15
+
+
+def test_batch_matches_single():
+    texts = [text for text, _ in FIXTURES] + [None, 5]
+    assert normalize_counts(texts) == [normalize_count(t) if isinstance(t, str) else None for t in texts]
@@ -0,0 +1,106 @@
+import io
+import struct
+
+from media import MediaProber, cache_key, full_file_url, iter_boxes, parse_moov
+
+
+def box(box_type, payload):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def mvhd(timescale, duration):
+    return box(b'mvhd', b'\x00' * 12 + struct.pack('>II', timescale, duration) + b'\x00' * 80)
+
+
+def tkhd(width, height):
+    return box(b'tkhd', b'\x00' * 76 + struct.pack('>II', width << 16, height << 16))
+
+
+def mp4(moov_first=True, mdat_size=100000):
+    moov = box(b'moov', mvhd(1000, 12500) + box(b'trak', tkhd(0, 0)) + box(b'trak', tkhd(720, 1280)))
+    parts = [box(b'ftyp', b'isom\x00\x00\x02\x00'), moov, box(b'mdat', b'\x00' * mdat_size)]
+    if not moov_first:
+        parts[1], parts[2] = parts[2], parts[1]
+    return b''.join(parts)
+
+
+class FakeResponse:
+    def __init__(self, data, start, end):
+        self.status_code = 206
+        self.headers = {'Content-Range': f"bytes {start}-{end}/{len(data)}"}
+        self.raw = io.BytesIO(data[start:end + 1])
+        self.raw.read = lambda n, decode_content=False, _read=self.raw.read: _read(n)
+
+    def raise_for_status(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, data):
+        self.data = data
+        self.requests = []
+        self.proxies = {}
+
+    def get(self, url, headers, timeout, stream, proxies=None):
+        start, end = map(int, headers['Range'].split('=')[1].split('-'))
+        self.requests.append((start, end, proxies))
+        return FakeResponse(self.data, start, min(end, len(self.data) - 1))
+
+
+def test_iter_boxes_stops_at_truncated_header():
+    data = box(b'ftyp', b'isom') + b'\x00\x00'
+    assert [t for t, _, _ in iter_boxes(data)] == [b'ftyp']
+
+
+def test_parse_moov_picks_largest_video_track():
+    data = mp4()
+    moov = next((p, e) for t, p, e in iter_boxes(data) if t == b'moov')
+    assert parse_moov(data[moov[0]:moov[1]]) == {'duration': 12.5, 'width': 720, 'height': 1280}
+
+
+def test_probe_moov_at_end_uses_range_reads_through_proxy():
+    data = mp4(moov_first=False)
+    session = FakeSession(data)
+    prober = MediaProber(session=session, chunk_size=1024, max_workers=1)
+    proxies = {'https': 'http://10.0.0.1:3128'}
+
+    info = prober.probe('https://cdn.example/v.mp4?bytestart=0&byteend=10&oh=sig', proxies=proxies)
+    assert info == {'duration': 12.5, 'width': 720, 'height': 1280, 'size': len(data),
+                    'bitrate': int(len(data) * 8 / 12.5)}
+    # First chunk, the moov header after mdat, then the moov box itself
+    assert len(session.requests) == 3
+    assert all(p == proxies for _, _, p in session.requests)
+    # Cached by URL without the query
+    assert prober.probe('https://cdn.example/v.mp4?oh=other') == info
+    assert len(session.requests) == 3
+
+
+def test_urls():
+    assert full_file_url('https://cdn/v.mp4?bytestart=5&byteend=9&oh=x') == 'https://cdn/v.mp4?oh=x'
+    assert cache_key('https://cdn/v.mp4?oh=x#t') == 'https://cdn/v.mp4'
+
+
+def test_media_metadata_waits_once_for_all_probes():
+    import concurrent.futures
+    import logging
+    import time
+
+    from scraper import FacebookReelScraper
+
+    scraper = FacebookReelScraper.__new__(FacebookReelScraper)
+    scraper.logger = logging.getLogger('test')
+    small, large = concurrent.futures.Future(), concurrent.futures.Future()
+    small.set_result({'width': 360, 'height': 640})
+    large.set_result({'width': 720, 'height': 1280})
+    stuck = [concurrent.futures.Future() for _ in range(3)]
+
+    started = time.monotonic()
+    best = scraper.media_metadata([stuck[0], small, stuck[1], large, stuck[2]], timeout=0.2)
+    assert time.monotonic() - started < 0.5  # one deadline, not 0.2s per stuck probe
+    assert best == {'width': 720, 'height': 1280}
@@ -0,0 +1,32 @@
+import pytest
+
+from profile_crawl import reels_tab_url
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('facebook.com/zuck', 'https://web.facebook.com/zuck/reels/'),
+    ('https://www.facebook.com/zuck/', 'https://web.facebook.com/zuck/reels/'),
+    ('https://m.facebook.com/zuck/reels', 'https://web.facebook.com/zuck/reels/'),
+    ('https://web.facebook.com/profile.php?id=4&sk=reels_tab', 'https://web.facebook.com/profile.php?id=4&sk=reels_tab'),
+    ('https://www.facebook.com/people/Jane-Doe/1000123/', 'https://web.facebook.com/people/Jane-Doe/1000123/reels/'),
+])
+def test_reels_tab_url(url, expected):
+    assert reels_tab_url(url) == expected
+
+
+@pytest.mark.parametrize('url', [
+    '',
+    'https://evil.com/zuck',
+    'https://facebook.com.evil.com/zuck',
+    'https://web.facebook.com/reel/123',
+    'https://www.facebook.com/watch/?v=123',
+    'https://fb.watch/abc',
+    'https://www.facebook.com/zuck/videos/123/',
+    'https://facebook.com/',
+    'https://facebook.com/groups',
+    'facebook.com/profile.php',
+    'facebook.com/profile.php?id=abc',
+])
+def test_reels_tab_url_rejects_non_profiles(url):
+    with pytest.raises(ValueError):
+        reels_tab_url(url)
@@ -0,0 +1,92 @@
+import os
+import time
+
+from profiles import CACHE_DIR, LAST_USED_FILE, PersistentBrowser, ProfilePool
+
+
+def make_cache(pool, name, size, last_used):
+    path = os.path.join(pool.root, name)
+    os.makedirs(os.path.join(path, CACHE_DIR))
+    with open(os.path.join(path, CACHE_DIR, 'data'), 'wb') as f:
+        f.write(b'\0' * size)
+    with open(os.path.join(path, LAST_USED_FILE), 'w') as f:
+        f.write(str(last_used))
+    return path
+
+
+def test_evicts_least_recently_used_idle_caches(tmp_path):
+    pool = ProfilePool(root=str(tmp_path), max_total_cache_mb=0)
+    pool.max_total_cache = 2500
+    oldest = make_cache(pool, 'public-0', 1000, 1)
+    in_use = make_cache(pool, 'public-1', 1000, 2)
+    newest = make_cache(pool, 'public-2', 1000, 3)
+    lock = pool._try_lock(in_use)
+
+    assert pool.maybe_evict(force=True) == 1
+    assert not os.path.isdir(os.path.join(oldest, CACHE_DIR))
+    assert os.path.isdir(os.path.join(in_use, CACHE_DIR))
+    assert os.path.isdir(os.path.join(newest, CACHE_DIR))
+    os.close(lock)
+
+
+def test_acquire_does_not_wait_for_eviction(tmp_path, monkeypatch):
+    pool = ProfilePool(root=str(tmp_path), size=1)
+    monkeypatch.setattr(ProfilePool, '_dir_size', staticmethod(lambda path: time.sleep(1) or 0))
+    make_cache(pool, 'public-5', 10, 1)
+
+    started = time.monotonic()
+    profile = pool.acquire('public')
+    assert time.monotonic() - started < 0.5
+    assert profile is not None
+    profile.release()
+
+
+class FakeSession:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def send(self, method, params):
+        self.calls.append((method, params['origin'], params['storageTypes']))
+
+    def detach(self):
+        self.calls.append(('detach',))
+
+
+class FakeContext:
+    def __init__(self):
+        self.calls = []
+        self.pages = ['page']
+
+    def clear_cookies(self):
+        self.calls.append(('clear_cookies',))
+
+    def new_cdp_session(self, page):
+        return FakeSession(self.calls)
+
+    def close(self):
+        pass
+
+
+class FakeChromium:
+    def __init__(self):
+        self.context = FakeContext()
+
+    def launch_persistent_context(self, path, **options):
+        return self.context
+
+
+def test_new_context_clears_site_data_but_not_the_http_cache(tmp_path):
+    pool = ProfilePool(root=str(tmp_path))
+    chromium = FakeChromium()
+    browser = PersistentBrowser(chromium, pool.acquire('public'), {})
+    browser.new_context()
+
+    calls = chromium.context.calls
+    assert calls[0] == ('clear_cookies',) and calls[-1] == ('detach',)
+    cleared = [c for c in calls if c[0] == 'Storage.clearDataForOrigin']
+    assert {c[1] for c in cleared} >= {'https://web.facebook.com', 'https://www.facebook.com'}
+    for _, _, types in cleared:
+        types = types.split(',')
+        assert {'cookies', 'local_storage', 'indexeddb', 'service_workers'} <= set(types)
+        assert 'cache' not in types
+    browser.close()
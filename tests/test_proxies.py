@@ -0,0 +1,122 @@
+import http.server
+import random
+import socket
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from proxies import ProxyPool
+from scraper import FacebookReelScraper
+
+
+def test_session_stays_pinned_until_quarantined():
+    pool = ProxyPool(['http://10.0.0.1:3128', 'http://10.0.0.2:3128'], quarantine_after=1, rng=random.Random(1))
+    pinned = pool.acquire('account:a')
+    assert all(pool.acquire('account:a') is pinned for _ in range(20))
+
+    pool.report(pinned, success=False)
+    assert pinned.is_quarantined()
+    assert pool.acquire('account:a') is not pinned
+
+
+def test_proxy_session_is_the_same_before_and_after_login(monkeypatch):
+    monkeypatch.setenv('FACEBOOK_EMAIL', 'me@example.com')
+    scraper = FacebookReelScraper.__new__(FacebookReelScraper)
+    scraper.use_cookies = True
+    scraper.cookies = {}
+    before_login = scraper.proxy_session()
+    scraper.cookies = {'c_user': '1000123', 'xs': 'token'}
+    assert scraper.proxy_session() == before_login == 'account:me@example.com'
+
+    scraper.use_cookies = False
+    assert scraper.proxy_session() is None
+
+
+def test_ewma_latency_and_success_rate():
+    pool = ProxyPool(['http://10.0.0.1:3128'], alpha=0.5, quarantine_after=10)
+    proxy = pool.proxies[0]
+    pool.report(proxy, success=True, latency=1.0)
+    assert proxy.latency == 1.0
+    pool.report(proxy, success=True, latency=0.2)
+    assert proxy.latency == pytest.approx(0.6)
+    pool.report(proxy, success=False)
+    assert proxy.success_rate == pytest.approx(0.5)
+    assert proxy.latency == pytest.approx(0.6)  # failures do not move the latency
+    assert pool.weight(proxy) == pytest.approx(0.5 / 0.6)
+
+
+def test_selection_is_weighted_by_latency():
+    pool = ProxyPool(['http://10.0.0.1:3128', 'http://10.0.0.2:3128'], rng=random.Random(7))
+    fast, slow = pool.proxies
+    pool.report(fast, success=True, latency=0.1)
+    pool.report(slow, success=True, latency=1.0)
+    picks = Counter(pool.acquire() for _ in range(1100))
+    # Weights are 10:1
+    assert 850 < picks[fast] < 1050
+    assert picks[slow] > 0
+
+
+class _StandInProxy(http.server.BaseHTTPRequestHandler):
+    """Forward proxy stand-in: answers absolute-URL requests itself after ``delay`` with ``status``"""
+    delay = 0.0
+    status = 200
+
+    def do_HEAD(self):
+        time.sleep(self.delay)
+        self.send_response(self.status if self.path.startswith('http://') else 400)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_proxy():
+    servers = []
+
+    def start(delay=0.0, status=200):
+        handler = type('Handler', (_StandInProxy,), {'delay': delay, 'status': status})
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_check_scores_selects_and_quarantines_through_real_proxies(local_proxy):
+    fast_url, slow_url, failing_url = local_proxy(), local_proxy(delay=0.2), local_proxy(status=502)
+    pool = ProxyPool([fast_url, slow_url, failing_url], quarantine_after=3, rng=random.Random(3))
+    fast, slow, failing = pool.proxies
+    target = 'http://reels.example.test/'
+
+    for _ in range(3):
+        assert pool.check(fast, target, timeout=5)
+        assert pool.check(slow, target, timeout=5)
+        assert not pool.check(failing, target, timeout=5)
+
+    assert fast.latency < slow.latency
+    assert slow.latency >= 0.2
+    assert failing.latency is None and failing.success_rate < 0.5
+    assert failing.is_quarantined()
+    assert not fast.is_quarantined() and not slow.is_quarantined()
+
+    picks = Counter(pool.acquire() for _ in range(500))
+    assert picks[failing] == 0
+    assert picks[fast] > 3 * picks[slow]
+
+
+def test_check_fails_on_unreachable_proxy():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    pool = ProxyPool([f'http://127.0.0.1:{port}'], quarantine_after=1)
+    proxy = pool.proxies[0]
+    assert not pool.check(proxy, 'http://reels.example.test/', timeout=2)
+    assert proxy.failures == 1 and proxy.is_quarantined()
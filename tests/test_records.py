@@ -0,0 +1,78 @@
+import io
+import json
+import pickle
+
+import pytest
+
+from records import (BINARY_MAGIC, FIELDS, ReelRecord, _encode_value, json_default, read_binary, read_ndjson,
+                     write_binary, write_ndjson)
+
+
+def sample():
+    return ReelRecord(url='https://web.facebook.com/reel/1', post_id='1', likes=12, views=3400, length=12.5,
+                      hashtags=['cats', 'dogs'], is_verified=True, description='héllo')
+
+
+def test_mapping_interface():
+    record = sample()
+    assert record['likes'] == 12
+    assert record.get('shares') is None
+    assert list(record) == list(FIELDS)
+    assert dict(record)['hashtags'] == ['cats', 'dogs']
+    with pytest.raises(TypeError):
+        ReelRecord(unknown=1)
+    assert ReelRecord.from_dict({'post_id': '1', 'extra': 'ignored'}).post_id == '1'
+
+
+def test_projection_limits_exposed_fields():
+    record = sample().project(['likes'], keep=('post_id', 'url'))
+    assert list(record) == ['url', 'post_id', 'likes']
+    with pytest.raises(KeyError):
+        record['views']
+    record['shares'] = 5
+    assert list(record) == ['url', 'post_id', 'shares', 'likes']
+    assert json.loads(record.to_json()) == {'url': 'https://web.facebook.com/reel/1', 'post_id': '1',
+                                            'shares': 5, 'likes': 12}
+
+
+def test_ndjson_round_trip_keeps_projection():
+    buffer = io.StringIO()
+    assert write_ndjson([sample(), sample().project(['views'])], buffer) == 2
+    buffer.seek(0)
+    full, projected = read_ndjson(buffer)
+    assert dict(full) == dict(sample())
+    assert list(projected) == ['views']
+
+
+def test_binary_round_trip():
+    buffer = io.BytesIO()
+    assert write_binary([sample(), sample().project(['views', 'is_verified'])], buffer) == 2
+    assert buffer.getvalue().startswith(BINARY_MAGIC)
+    buffer.seek(0)
+    full, projected = read_binary(buffer)
+    assert dict(full) == dict(sample())
+    assert dict(projected) == {'views': 3400, 'is_verified': True}
+
+
+def test_binary_reads_files_written_with_an_older_schema():
+    # A file from before 'shares' was added to the schema: its header lists the fields it has
+    old_schema = [f for f in FIELDS if f != 'shares']
+    record = sample()
+    buffer = io.BytesIO()
+    names = '\n'.join(old_schema).encode('utf-8')
+    body = (2 ** len(old_schema) - 1).to_bytes(8, 'little') + b''.join(
+        _encode_value(getattr(record, f)) for f in old_schema)
+    buffer.write(BINARY_MAGIC + len(names).to_bytes(4, 'little') + names + len(body).to_bytes(4, 'little') + body)
+    buffer.seek(0)
+
+    (decoded,) = read_binary(buffer)
+    assert decoded['likes'] == 12 and decoded['description'] == 'héllo'
+    assert 'shares' not in decoded
+
+
+def test_pickle_and_json_default():
+    record = sample().project(['likes'])
+    assert dict(pickle.loads(pickle.dumps(record))) == {'likes': 12}
+    assert json.dumps({'r': record}, default=json_default) == '{"r": {"likes": 12}}'
+    with pytest.raises(TypeError):
+        json.dumps({'x': object()}, default=json_default)
@@ -0,0 +1,69 @@
+import pytest
+
+from reel_index import ReelIndex, creator_key, posted_timestamp
+
+NOW = 1_700_000_000
+
+
+@pytest.mark.parametrize('value, key', [
+    ('https://web.facebook.com/Some.Creator', 'some.creator'),
+    ('https://www.facebook.com/profile.php?id=100123', '100123'),
+    ('facebook.com/people/Jane-Doe/100456/', '100456'),
+    ('@Creator', 'creator'),
+    ('', None),
+])
+def test_creator_key(value, key):
+    assert creator_key(value) == key
+
+
+def test_posted_timestamp():
+    assert posted_timestamp('3d', NOW) == NOW - 3 * 86400
+    assert posted_timestamp('5 hours ago', NOW) == NOW - 5 * 3600
+    assert posted_timestamp('2m', NOW) == NOW - 120
+    assert posted_timestamp('March 5, 2024 at 3:00 PM', NOW) == posted_timestamp('2024-03-05', NOW)
+    assert posted_timestamp('yesterday-ish', NOW) is None
+
+
+def test_query_by_hashtag_creator_and_time(tmp_path):
+    index = ReelIndex(str(tmp_path / 'index.sqlite'))
+    index.add({'post_id': '1', 'url': 'u1', 'user_profile_url': 'https://web.facebook.com/alice',
+               'date_posted': '1d', 'likes': 10, 'hashtags': ['#Cats', 'dogs']}, scraped_at=NOW)
+    index.add({'post_id': '2', 'url': 'u2', 'user_profile_url': 'https://web.facebook.com/bob',
+               'date_posted': '3d', 'likes': 30, 'hashtags': ['cats']}, scraped_at=NOW)
+    index.add({'post_id': '3', 'url': 'u3', 'user_profile_url': 'https://web.facebook.com/alice',
+               'date_posted': '10d', 'likes': None}, scraped_at=NOW)
+    assert not index.add({'url': 'no id'})
+
+    assert [r['post_id'] for r in index.query(hashtag='#CATS')] == ['2', '1']
+    assert [r['post_id'] for r in index.query(creator='alice')] == ['1', '3']
+    assert [r['post_id'] for r in index.query(since=NOW - 5 * 86400, sort='posted_at')] == ['1', '2']
+    assert [r['post_id'] for r in index.query(sort='likes', descending=False)] == ['1', '2', '3']
+    assert index.hashtags() == [('cats', 2), ('dogs', 1)]
+    assert index.stats() == {'reels': 3, 'creators': 2, 'hashtags': 2}
+    with pytest.raises(ValueError):
+        index.query(sort='data')
+
+
+def test_partial_updates_merge_and_keep_first_post_time(tmp_path):
+    index = ReelIndex(str(tmp_path / 'index.sqlite'))
+    index.add({'post_id': '1', 'date_posted': '1d', 'likes': 10, 'views': 100, 'hashtags': ['cats']},
+              scraped_at=NOW)
+    # A later projection without hashtags: only the fields it carries change
+    index.add({'post_id': '1', 'date_posted': '2d', 'likes': 20}, scraped_at=NOW + 86400)
+
+    (reel,) = index.query()
+    assert (reel['likes'], reel['views'], reel['scraped_at']) == (20, 100, NOW + 86400)
+    assert index.query(hashtag='cats')[0]['post_id'] == '1'
+    assert index.query(since=NOW - 86400 - 1, until=NOW - 86400 + 1)[0]['post_id'] == '1'
+    index.close()
+
+
+def test_projection_without_counters_is_indexed(tmp_path):
+    from records import ReelRecord
+
+    index = ReelIndex(str(tmp_path / 'index.sqlite'))
+    projected = ReelRecord(post_id='9', url='u9', hashtags=['#Cats'],
+                           user_profile_url='https://web.facebook.com/alice').project(
+        ['hashtags', 'user_profile_url'], keep=('url', 'post_id'))
+    assert index.add(projected, scraped_at=NOW)
+    assert [r['post_id'] for r in index.query(hashtag='cats', creator='alice')] == ['9']
@@ -0,0 +1,108 @@
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from scheduling import ClientPolicy, FairScheduler, QueueTimeout, QuotaExceeded, load_policies
+
+
+def test_abandoned_scrape_holds_capacity_until_done():
+    scheduler = FairScheduler(capacity=1, queue_timeout=0.1)
+    future = concurrent.futures.Future()
+    with scheduler.slot():
+        scheduler.hold_until_done(future)
+    assert scheduler.stats()['abandoned'] == 1
+
+    with pytest.raises(QueueTimeout):
+        with scheduler.slot():
+            pass
+
+    future.set_result(None)
+    assert scheduler.stats()['abandoned'] == 0
+    with scheduler.slot():
+        assert scheduler.stats()['in_service'] == 1
+
+
+def test_waiter_is_dispatched_when_an_abandoned_scrape_finishes():
+    scheduler = FairScheduler(capacity=1, queue_timeout=5)
+    future = concurrent.futures.Future()
+    with scheduler.slot():
+        scheduler.hold_until_done(future)
+    served = threading.Event()
+
+    def wait_for_slot():
+        with scheduler.slot():
+            served.set()
+
+    waiter = threading.Thread(target=wait_for_slot)
+    waiter.start()
+    while scheduler.stats()['waiting'] < 1:
+        time.sleep(0.01)
+    assert not served.is_set()
+    future.set_result(None)
+    waiter.join(timeout=5)
+    assert served.is_set()
+    assert scheduler.stats()['abandoned'] == 0
+
+
+def test_rate_limit():
+    scheduler = FairScheduler(policies={'k': ClientPolicy('k', rate=0.001, burst=1)})
+    policy = scheduler.policy_for('k')
+    with scheduler.slot(policy):
+        pass
+    with pytest.raises(QuotaExceeded) as e:
+        with scheduler.slot(policy):
+            pass
+    assert e.value.retry_after > 0
+
+
+def test_interactive_clients_are_served_before_bulk():
+    interactive = ClientPolicy('ui', priority='interactive', max_queued=10)
+    bulk = ClientPolicy('backfill', priority='bulk', max_queued=10)
+    scheduler = FairScheduler(capacity=1, queue_timeout=5)
+    order = []
+    release = threading.Event()
+
+    def hold():
+        with scheduler.slot(bulk):
+            release.wait()
+
+    def run(policy):
+        with scheduler.slot(policy):
+            order.append(policy.name)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    while scheduler.stats()['in_service'] == 0:
+        time.sleep(0.01)
+    waiters = [threading.Thread(target=run, args=(p,)) for p in (bulk, bulk, interactive, interactive)]
+    for w in waiters:
+        w.start()
+    while scheduler.stats()['waiting'] < 4:
+        time.sleep(0.01)
+    release.set()
+    for t in [holder, *waiters]:
+        t.join()
+    assert order[:2] == ['ui', 'ui']
+
+
+def test_load_policies_rejects_duplicate_names():
+    policies = load_policies('{"k1": {"name": "web"}, "*": {"max_concurrent": 2}}')
+    assert policies['k1'].name == 'web' and policies['*'].name == 'anonymous'
+    with pytest.raises(ValueError):
+        load_policies('{"k1": {"name": "web"}, "k2": {"name": "web"}}')
+    with pytest.raises(ValueError):
+        load_policies('{"anonymous": {}, "*": {}}')
+
+
+def test_policies_with_the_same_name_keep_separate_counters():
+    first, second = ClientPolicy('web', max_concurrent=1), ClientPolicy('web', max_concurrent=1)
+    scheduler = FairScheduler(capacity=2, queue_timeout=0.1)
+    with scheduler.slot(first):
+        # A second policy object must not reset the first one's in-flight count
+        with scheduler.slot(second):
+            pass
+        with pytest.raises(QueueTimeout):
+            with scheduler.slot(first):
+                pass
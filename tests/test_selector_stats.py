@@ -0,0 +1,74 @@
+import sqlite3
+
+from selector_stats import SelectorRegistry
+
+STRATEGIES = {'user': ('a.old', 'a.new', 'a.other')}
+
+
+def run(registry, *tries):
+    registry.record({'user': [[selector, hit, 1.0] for selector, hit in tries]})
+
+
+def test_orders_by_hit_rate():
+    registry = SelectorRegistry(STRATEGIES, explore_every=0)
+    for _ in range(5):
+        run(registry, ('a.old', 0), ('a.new', 1))
+    assert registry.order('user') == ['a.new', 'a.other', 'a.old']
+
+
+def test_selector_that_used_to_hit_dies_after_a_run_of_misses():
+    registry = SelectorRegistry(STRATEGIES, dead_after=50, window=100, explore_every=0)
+    for _ in range(300):
+        run(registry, ('a.old', 1))
+    # Markup changed: a.old stops matching. Decay keeps its (halved) hits above zero.
+    for _ in range(49):
+        run(registry, ('a.old', 0), ('a.new', 1))
+    assert 'a.old' in registry.order('user')
+    run(registry, ('a.old', 0), ('a.new', 1))
+    assert registry._totals[('user', 'a.old')].hits > 0
+    assert 'a.old' not in registry.order('user')
+    assert registry.report()['user'][-1]['status'] == 'dead'
+    assert registry.order('user', explore=True)[-1] == 'a.old'
+
+    # Explored again and matching: back to life
+    run(registry, ('a.old', 1))
+    assert 'a.old' in registry.order('user')
+
+
+def test_shared_file_keeps_the_run_of_misses_across_processes(tmp_path):
+    path = str(tmp_path / 'stats.sqlite')
+    first = SelectorRegistry(STRATEGIES, path=path, dead_after=10, flush_interval=3600)
+    second = SelectorRegistry(STRATEGIES, path=path, dead_after=10, flush_interval=3600)
+    run(first, ('a.old', 1))
+    first.flush()
+    for _ in range(6):
+        run(first, ('a.old', 0))
+    for _ in range(4):
+        run(second, ('a.old', 0))
+    first.flush()
+    second.flush()
+
+    assert second.report()['user'][-1]['selector'] == 'a.old'
+    assert second.report()['user'][-1]['misses_since_hit'] == 10
+    assert second.report()['user'][-1]['status'] == 'dead'
+    run(second, ('a.old', 0), ('a.old', 1))
+    second.flush()
+    first.flush()
+    assert first._totals[('user', 'a.old')].misses == 0
+    first.close()
+    second.close()
+
+
+def test_migrates_files_without_misses(tmp_path):
+    path = str(tmp_path / 'stats.sqlite')
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE selector_stats (group_name TEXT NOT NULL, selector TEXT NOT NULL, '
+               'attempts REAL NOT NULL, hits REAL NOT NULL, cost_ms REAL NOT NULL, '
+               'PRIMARY KEY (group_name, selector))')
+    db.executemany('INSERT INTO selector_stats VALUES (?, ?, ?, ?, ?)',
+                   [('user', 'a.old', 80, 0, 80), ('user', 'a.new', 80, 60, 80)])
+    db.commit()
+
+    registry = SelectorRegistry(STRATEGIES, path=path, dead_after=50)
+    assert registry.order('user') == ['a.new', 'a.other']
+    registry.close()
@@ -0,0 +1,121 @@
+import gzip
+import json
+import os
+import sqlite3
+
+from records import ReelRecord
+from sinks import JsonlSink, SinkGroup, SqliteSink, WebhookSink
+
+
+def full():
+    return ReelRecord(post_id='1', url='u1', likes=5, views=50)
+
+
+def projected():
+    return ReelRecord(post_id='2', url='u2', likes=7).project(['likes'], keep=('post_id', 'url'))
+
+
+def test_sqlite_sink_tags_projected_rows(tmp_path):
+    path = str(tmp_path / 'results.sqlite')
+    sink = SqliteSink(path, batch_size=10, flush_interval=0.05)
+    assert sink.put(full()) and sink.put(projected())
+    sink.close()
+
+    rows = sqlite3.connect(path).execute('SELECT post_id, fields, data FROM results ORDER BY id').fetchall()
+    assert [(r[0], r[1]) for r in rows] == [('1', None), ('2', 'url,post_id,likes')]
+    assert json.loads(rows[1][2]) == {'url': 'u2', 'post_id': '2', 'likes': 7}
+    assert sink.stats()['written'] == 2
+
+
+def test_sqlite_sink_adds_fields_column_to_old_tables(tmp_path):
+    path = str(tmp_path / 'results.sqlite')
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE results (id INTEGER PRIMARY KEY, post_id TEXT, url TEXT, scraped_at REAL NOT NULL, '
+               'data TEXT NOT NULL)')
+    db.commit()
+    sink = SqliteSink(path, flush_interval=0.05)
+    sink.put(projected())
+    sink.close()
+    assert db.execute('SELECT fields FROM results').fetchone() == ('url,post_id,likes',)
+
+
+def test_jsonl_sink_rotates_complete_files(tmp_path):
+    sink = JsonlSink(str(tmp_path), max_bytes=1, flush_interval=0.05, batch_size=1)
+    sink.put(full())
+    sink.put(projected())
+    sink.close()
+
+    files = sorted(os.listdir(tmp_path))
+    assert len(files) == 2 and all(f.endswith('.jsonl.gz') for f in files)
+    rows = [json.loads(line) for f in files for line in gzip.open(tmp_path / f, 'rt')]
+    assert '_fields' not in rows[0] and rows[0]['views'] == 50
+    assert rows[1] == {'url': 'u2', 'post_id': '2', 'likes': 7, '_fields': ['url', 'post_id', 'likes']}
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    class Stuck(SqliteSink):
+        def write_batch(self, batch):
+            raise RuntimeError('destination down')
+
+    sink = Stuck(str(tmp_path / 'r.sqlite'), max_queue=1, flush_interval=60, batch_size=1000)
+    results = [sink.put({'post_id': str(i)}) for i in range(50)]
+    assert not all(results)
+    assert sink.stats()['dropped'] >= 1
+    sink.close()
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.bodies = []
+
+    def post(self, url, data, headers, timeout):
+        self.bodies.append(json.loads(data))
+        return FakeResponse(self.statuses.pop(0), {'Retry-After': '0'})
+
+    def close(self):
+        pass
+
+
+def test_webhook_retries_then_delivers():
+    session = FakeSession([503, 429, 200])
+    sink = WebhookSink('https://hook', session=session, flush_interval=0.05, max_retries=3)
+    group = SinkGroup([sink])
+    group.put(full())
+    group.close()
+    assert len(session.bodies) == 3
+    assert session.bodies[-1]['results'][0]['post_id'] == '1'
+    assert group.stats()['webhook']['written'] == 1
+
+
+class RecordingSink:
+    def __init__(self):
+        self.results = []
+
+    def put(self, result):
+        self.results.append(result)
+        return True
+
+
+def test_scraper_emits_the_results_its_entry_methods_return(monkeypatch):
+    import logging
+
+    from scraper import FacebookReelScraper
+
+    scraper = FacebookReelScraper.__new__(FacebookReelScraper)
+    scraper.logger = logging.getLogger('test')
+    scraper.use_cookies = False
+    scraper.sinks = RecordingSink()
+    results = iter([None, full()])
+    monkeypatch.setattr(scraper, 'get_reel_data_public', lambda url, fields=None, snapshot=False: next(results))
+
+    assert scraper.get_reel_data('https://www.facebook.com/reel/1') is None
+    record = scraper.get_reel_data('https://www.facebook.com/reel/1')
+    # The inner public scrape is not an entry method, so the result is emitted once
+    assert scraper.sinks.results == [record]
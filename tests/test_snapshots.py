@@ -0,0 +1,81 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from snapshots import SnapshotStore, extract_from_html, fill_from_responses
+
+
+def test_save_and_load(tmp_path):
+    store = SnapshotStore(tmp_path)
+    path = store.save('123', 'https://web.facebook.com/reel/123', 'public', '<html></html>', [], timestamp=1000.5)
+    snapshot = store.load(path)
+    assert snapshot['reel_id'] == '123'
+    assert snapshot['timestamp'] == 1000.5
+    assert not [n for n in os.listdir(tmp_path / '123') if n.endswith('.tmp')]
+
+
+def test_saves_in_the_same_millisecond_are_kept(tmp_path):
+    store = SnapshotStore(tmp_path)
+    first = store.save('1', 'u', 'public', '<p>a</p>', [], timestamp=1000.0)
+    second = store.save('1', 'u', 'public', '<p>b</p>', [], timestamp=1000.0)
+    assert first != second
+    assert sorted(store.load(p)['html'] for p in store.paths(['1'])) == ['<p>a</p>', '<p>b</p>']
+    # Identical content is stored once
+    assert store.save('1', 'u', 'public', '<p>a</p>', [], timestamp=1000.0) == first
+    assert len(list(store.paths(['1']))) == 2
+
+
+def test_paths_order_includes_legacy_names(tmp_path):
+    store = SnapshotStore(tmp_path)
+    new = store.save('1', 'u', 'public', '', [], timestamp=2.0)
+    legacy = tmp_path / '1' / '1000.json.gz'
+    legacy.write_bytes(gzip.compress(json.dumps({'html': 'old'}).encode()))
+    assert list(store.paths(['1'])) == [str(legacy), new]
+    assert list(store.paths(['1'], latest_only=True)) == [new]
+
+
+def test_invalid_reel_id(tmp_path):
+    with pytest.raises(ValueError):
+        SnapshotStore(tmp_path).save('../x', 'u', 'public', '', [])
+
+
+def test_fill_from_responses():
+    responses = [{'body': '{"comment_count":{"total_count":12},"reaction_count":{"count":40}}'}]
+    data = fill_from_responses({'likes': 7}, responses, 'quick')
+    assert data == {'likes': 7, 'num_comments': 12}
+
+
+HTML = '''
+<h3><a href="/alice">Alice</a></h3>
+<a href="/people/Bob/100/">Bob</a>
+<div class="userContent">From the old markup</div>
+<div data-testid="post_message">Hello #cats</div>
+<span class="timestamp">3d</span>
+<video src="/v/clip.mp4" poster="https://cdn.example.com/poster.jpg"></video>
+'''
+PAGE_URL = 'https://www.facebook.com/reel/123'
+
+
+def test_extract_from_html_follows_selector_order():
+    data = extract_from_html(HTML, 'public', {'user', 'description', 'date'}, base_url=PAGE_URL)
+    assert data == {'user_profile_url': 'https://www.facebook.com/people/Bob/100/', 'user_name': 'Bob',
+                    'description': 'Hello #cats', 'date_posted': '3d'}
+
+    # A registry that ranks other selectors first changes what is picked, like in the page scripts
+    selectors = {
+        'user': ['h3 a[href*="/"]', 'a[href*="/people/"]'],
+        'description': ['.userContent', '[data-testid="post_message"]'],
+        'date': ['time'],
+    }
+    data = extract_from_html(HTML, 'public', {'user', 'description', 'date'}, selectors, base_url=PAGE_URL)
+    assert data == {'user_profile_url': 'https://www.facebook.com/alice', 'user_name': 'Alice', 'description': 'From the old markup'}
+
+
+def test_extract_from_html_resolves_urls_like_the_page():
+    # el.href / video.src in the page are absolute; re-extraction resolves against the snapshot URL
+    data = extract_from_html(HTML, 'quick', {'video', 'user'}, base_url=PAGE_URL)
+    assert data['video_url'] == 'https://www.facebook.com/v/clip.mp4'
+    assert data['thumbnail'] == 'https://cdn.example.com/poster.jpg'
+    assert data['user_profile_url'] == 'https://www.facebook.com/alice'
@@ -0,0 +1,99 @@
+import io
+import json
+import logging
+
+import pytest
+
+import structured_logging
+from structured_logging import begin_job, configure_logging, end_job, log_context
+
+
+@pytest.fixture
+def configure():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    stream = io.StringIO()
+
+    def start(**kwargs):
+        configure_logging(level='DEBUG', fmt='json', stream=stream, **kwargs)
+        return stream
+
+    yield start
+    structured_logging._flush()
+    structured_logging._sampler = None
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def lines(stream):
+    # Stopping the listener drains the queue
+    structured_logging._flush()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_are_written_by_the_listener_with_context(configure):
+    stream = configure()
+    logger = logging.getLogger('test.scraper')
+    items = ['a']
+    with log_context(job_id='job-1', reel_id='123'):
+        logger.info("Scraped %s", items)
+        # The message is rendered when the record is enqueued, not when the listener writes it
+        items.append('b')
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Failed")
+    logger.info("No context")
+
+    first, second, third = lines(stream)
+    assert first['msg'] == "Scraped ['a']"
+    assert first['job_id'] == 'job-1' and first['reel_id'] == '123'
+    assert first['level'] == 'INFO' and first['logger'] == 'test.scraper'
+    assert second['level'] == 'ERROR' and 'ValueError: boom' in second['exc']
+    assert third['msg'] == 'No context' and 'job_id' not in third and 'reel_id' not in third
+
+
+def test_unsampled_jobs_keep_their_records_only_when_they_fail(configure):
+    stream = configure(sample_rate=0.0)
+    logger = logging.getLogger('test.scraper')
+
+    for job_id in ('ok', 'failed', 'errored'):
+        begin_job(job_id)
+    with log_context(job_id='ok'):
+        logger.info("ok step")
+        logger.warning("ok warning")
+    with log_context(job_id='failed'):
+        logger.info("failed step")
+    with log_context(job_id='errored'):
+        logger.info("errored step")
+        logger.error("errored error")
+        logger.info("errored after")
+    with log_context(job_id='untracked'):
+        logger.info("untracked step")
+    end_job('ok', success=True)
+    end_job('failed', success=False)
+    end_job('errored', success=True)
+
+    messages = [line['msg'] for line in lines(stream)]
+    assert sorted(messages) == sorted(["ok warning", "failed step", "errored step", "errored error", "errored after"])
+    assert messages.index("errored step") < messages.index("errored error") < messages.index("errored after")
+
+
+def test_sampled_jobs_are_kept_whole(configure):
+    stream = configure(sample_rate=0.5)
+    sampler = structured_logging._sampler
+    kept = next(f"job-{i}" for i in range(100) if sampler.in_sample(f"job-{i}"))
+    dropped = next(f"job-{i}" for i in range(100) if not sampler.in_sample(f"job-{i}"))
+    logger = logging.getLogger('test.scraper')
+
+    for job_id in (kept, dropped):
+        begin_job(job_id)
+        with log_context(job_id=job_id):
+            logger.info("step 1")
+            logger.debug("step 2")
+        end_job(job_id, success=True)
+
+    assert [(line['job_id'], line['msg']) for line in lines(stream)] == [(kept, "step 1"), (kept, "step 2")]
@@ -0,0 +1,37 @@
+from tiers import CircuitBreaker, LatencyTracker
+
+
+def test_timeout_follows_p99_within_bounds():
+    tracker = LatencyTracker(min_samples=10, multiplier=1.5)
+    assert tracker.timeout('public', 30) == 30
+    for _ in range(10):
+        tracker.record('public', 4.0)
+    assert tracker.timeout('public', 30) == 6.0
+    assert tracker.timeout('public', 30, floor=10) == 10
+
+
+def test_timeouts_widen_the_timeout():
+    tracker = LatencyTracker(window=20, min_samples=10, multiplier=1.5)
+    for _ in range(10):
+        tracker.record('public', 10.0)
+    timeout = tracker.timeout('public', 30, ceiling=90)
+    assert timeout == 15.0
+    # The tier slowed down past the timeout: every attempt times out, nothing succeeds
+    for _ in range(3):
+        tracker.record_timeout('public', timeout)
+        widened = tracker.timeout('public', 30, ceiling=90)
+        assert widened > timeout
+        timeout = widened
+    assert timeout == 50.625
+
+
+def test_circuit_opens_and_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0)
+    breaker.record('authenticated', False)
+    assert breaker.allow('authenticated')
+    breaker.record('authenticated', False)
+    # Cooldown of 0: half-open immediately, one trial at a time
+    assert breaker.allow('authenticated')
+    assert not breaker.allow('authenticated')
+    breaker.record('authenticated', True)
+    assert breaker.allow('authenticated') and breaker.allow('authenticated')
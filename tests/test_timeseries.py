@@ -0,0 +1,98 @@
+import multiprocessing
+import os
+
+import pytest
+
+from timeseries import MAGIC, RECORD, EngagementStore
+
+
+def test_append_and_range(tmp_path):
+    store = EngagementStore(tmp_path)
+    for i in range(10):
+        store.append('123', num_comments=i, shares=None, likes=i * 10, views=i * 100, timestamp=1000 + i)
+
+    snapshots = store.range('123', start=1003, end=1006)
+    assert [s['timestamp'] for s in snapshots] == [1003, 1004, 1005]
+    assert snapshots[0] == {'timestamp': 1003, 'num_comments': 3, 'shares': None, 'likes': 30, 'views': 300}
+    assert store.range('123', metric='likes')[-1] == (1009, 90)
+    assert store.last('123')['views'] == 900
+    assert store.reels() == ['123']
+
+
+def test_out_of_order_rejected(tmp_path):
+    store = EngagementStore(tmp_path)
+    store.append('1', likes=1, timestamp=200)
+    with pytest.raises(ValueError):
+        store.append('1', likes=2, timestamp=100)
+    # A fresh store (another worker) sees the same last timestamp from the file
+    with pytest.raises(ValueError):
+        EngagementStore(tmp_path).append('1', likes=2, timestamp=100)
+
+
+def test_invalid_reel_id(tmp_path):
+    with pytest.raises(ValueError):
+        EngagementStore(tmp_path).append('../etc', likes=1)
+
+
+def test_partial_record_is_truncated_before_append(tmp_path):
+    store = EngagementStore(tmp_path)
+    store.append('1', likes=1, timestamp=100)
+    with open(tmp_path / '1.ts', 'ab') as f:
+        f.write(b'\x01\x02\x03')  # interrupted append
+    store.append('1', likes=2, timestamp=101)
+
+    assert os.path.getsize(tmp_path / '1.ts') == len(MAGIC) + 2 * RECORD.size
+    assert [s['likes'] for s in store.range('1')] == [1, 2]
+
+
+def test_partial_header_is_rewritten(tmp_path):
+    (tmp_path / '1.ts').write_bytes(MAGIC[:3])
+    store = EngagementStore(tmp_path)
+    store.append('1', likes=5, timestamp=100)
+    assert store.last('1')['likes'] == 5
+
+
+def test_last_without_records(tmp_path):
+    store = EngagementStore(tmp_path)
+    assert store.last('1') is None
+    (tmp_path / '2.ts').write_bytes(MAGIC + b'\x00' * (RECORD.size - 1))
+    assert store.last('2') is None
+    assert store.range('2') == []
+
+
+def _append_many(root, worker):
+    store = EngagementStore(root)
+    for i in range(50):
+        store.append('1', likes=worker, timestamp=0)
+
+
+def test_concurrent_processes_keep_records_aligned(tmp_path):
+    workers = [multiprocessing.Process(target=_append_many, args=(str(tmp_path), n)) for n in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    assert os.path.getsize(tmp_path / '1.ts') == len(MAGIC) + 200 * RECORD.size
+    assert sorted({s['likes'] for s in EngagementStore(tmp_path).range('1')}) == [0, 1, 2, 3]
+
+
+def test_export_csv(tmp_path):
+    store = EngagementStore(tmp_path / 'store')
+    store.append('1', likes=1, timestamp=100)
+    store.append('2', views=7, timestamp=100)
+    assert store.export_csv(tmp_path / 'out.csv') == 2
+    lines = (tmp_path / 'out.csv').read_text().splitlines()
+    assert lines[0] == 'reel_id,timestamp,num_comments,shares,likes,views'
+    assert lines[2] == '2,100.0,,,,7'
+
+
+def test_append_reel_skips_results_without_counters(tmp_path):
+    from records import ReelRecord
+
+    store = EngagementStore(tmp_path)
+    projected = ReelRecord(post_id='1', url='u', video_url='v', likes=5).project(['video_url'], keep=('url', 'post_id'))
+    assert store.append_reel(projected) is False
+    assert store.append_reel({'post_id': '1', 'likes': None}) is False
+    assert store.append_reel({'post_id': '1', 'likes': 3}, timestamp=100) is True
+    assert store.range('1') == [{'timestamp': 100, 'num_comments': None, 'shares': None, 'likes': 3, 'views': None}]
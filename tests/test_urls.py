@@ -0,0 +1,93 @@
+import sqlite3
+
+import pytest
+
+from urls import UrlResolver, canonical_url, is_short_link, reel_id_from_url
+
+
+@pytest.mark.parametrize('url, reel_id', [
+    ('https://www.facebook.com/reel/123', '123'),
+    ('m.facebook.com/reels/123/', '123'),
+    ('https://fb.com/watch/?v=123', '123'),
+    ('https://web.facebook.com/video.php?v=123', '123'),
+    ('https://www.facebook.com/page/videos/some-slug/123/', '123'),
+    ('https://l.facebook.com/l.php?u=https%3A%2F%2Fwww.facebook.com%2Freel%2F123', '123'),
+    ('https://evil.com/reel/123', None),
+    ('https://www.facebook.com/watch/?v=abc', None),
+    ('https://fb.watch/abc/', None),
+    ('', None),
+])
+def test_reel_id_from_url(url, reel_id):
+    assert reel_id_from_url(url) == reel_id
+
+
+def test_is_short_link():
+    assert is_short_link('fb.watch/abc')
+    assert is_short_link('https://www.facebook.com/share/r/XyZ/')
+    assert not is_short_link('https://www.facebook.com/reel/1')
+    assert not is_short_link('https://evil.com/share/r/XyZ/')
+
+
+class FakeResponse:
+    def __init__(self, status_code, location=None):
+        self.status_code = status_code
+        self.headers = {'Location': location} if location else {}
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, redirects):
+        self.redirects = redirects
+        self.calls = []
+
+    def head(self, url, allow_redirects, timeout, proxies=None):
+        self.calls.append(('HEAD', url, proxies))
+        if url not in self.redirects:
+            return FakeResponse(405)
+        return FakeResponse(302, self.redirects[url])
+
+    def get(self, url, allow_redirects, timeout, stream, proxies=None):
+        self.calls.append(('GET', url, proxies))
+        return FakeResponse(302, self.redirects.get(url + '#get'))
+
+
+def test_resolver_follows_hops_through_proxy_and_caches(tmp_path):
+    session = FakeSession({
+        'https://fb.watch/abc': 'https://www.facebook.com/share/r/XyZ/',
+        'https://www.facebook.com/share/r/XyZ/#get': '/reel/456/?s=1',
+    })
+    resolver = UrlResolver(cache_path=str(tmp_path / 'cache.sqlite'), session=session)
+    proxies = {'https': 'http://10.0.0.1:3128'}
+
+    assert resolver.resolve('fb.watch/abc', proxies=proxies) == '456'
+    assert [c[0] for c in session.calls] == ['HEAD', 'HEAD', 'GET']
+    assert all(p == proxies for _, _, p in session.calls)
+
+    # Served from the persistent cache, also by a new resolver
+    resolver.close()
+    resolver = UrlResolver(cache_path=str(tmp_path / 'cache.sqlite'), session=session)
+    assert resolver.resolve('fb.watch/abc') == '456'
+    assert len(session.calls) == 3
+    # Plain reel URLs never touch the network
+    assert resolver.resolve('https://www.facebook.com/reel/1') == '1'
+    assert canonical_url('1') == 'https://web.facebook.com/reel/1'
+
+
+def test_resolver_returns_id_when_cache_is_locked(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    session = FakeSession({'https://fb.watch/abc': 'https://www.facebook.com/reel/456/'})
+    resolver = UrlResolver(cache_path=path, session=session, db_timeout=0.1)
+
+    # Another process holds the write lock
+    other = sqlite3.connect(path)
+    other.execute('BEGIN EXCLUSIVE')
+    try:
+        assert resolver.resolve('https://fb.watch/abc') == '456'
+    finally:
+        other.rollback()
+        other.close()
+    assert resolver.cached('https://fb.watch/abc') is None
+    assert resolver.resolve('https://fb.watch/abc') == '456'
+    assert resolver.cached('https://fb.watch/abc') == '456'
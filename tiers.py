@@ -0,0 +1,153 @@
+"""Adaptive timeouts and circuit breakers for the scraping tiers.
+
+LatencyTracker keeps a rolling window of durations per key (a tier such as
+'public', or a step such as 'goto') and derives timeouts from the observed
+p99 instead of fixed budgets. Timeouts count as samples at the timeout, so
+the timeout widens when the tier slows down. CircuitBreaker stops sending
+traffic to a tier that keeps failing (e.g. 'authenticated' while the cookies
+are dead) for a cooldown, then lets a single trial request through.
+"""
+import collections
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Rolling latency percentiles per key, and timeouts derived from them"""
+
+    def __init__(self, window=200, min_samples=10, multiplier=1.5):
+        self.window = window
+        # Fall back to the caller's default until a key has this many samples
+        self.min_samples = min_samples
+        # Headroom applied on top of p99
+        self.multiplier = multiplier
+        self._samples = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            self._samples[key].append(seconds)
+
+    def record_timeout(self, key, timeout):
+        """Record an attempt that timed out as a censored sample at the timeout.
+
+        The true duration is at least ``timeout``, so after a slowdown p99 (and
+        with it the next timeout) grows by the multiplier instead of staying put.
+        """
+        self.record(key, timeout)
+
+    def percentile(self, key, q):
+        """q-th percentile (0-100) of the recorded durations, or None without samples"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(q / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def timeout(self, key, default, floor=None, ceiling=None):
+        """Timeout in seconds for key: p99 * multiplier once enough samples exist, else default"""
+        with self._lock:
+            count = len(self._samples.get(key, ()))
+        if count < self.min_samples:
+            value = default
+        else:
+            value = self.percentile(key, 99) * self.multiplier
+        if floor is not None:
+            value = max(value, floor)
+        if ceiling is not None:
+            value = min(value, ceiling)
+        return value
+
+    def stats(self):
+        with self._lock:
+            keys = list(self._samples)
+        return {
+            key: {
+                'samples': len(self._samples[key]),
+                'p50': self.percentile(key, 50),
+                'p95': self.percentile(key, 95),
+                'p99': self.percentile(key, 99),
+            }
+            for key in keys
+        }
+
+
+class CircuitBreaker:
+    """Per-tier circuit breaker: closed -> open after repeated failures -> half-open after cooldown"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, cooldown=60, max_cooldown=900):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def _get(self, tier):
+        return self._state.setdefault(tier, {
+            'state': self.CLOSED,
+            'failures': 0,
+            'opened_at': None,
+            'cooldown': self.cooldown,
+            'trial_running': False,
+        })
+
+    def allow(self, tier):
+        """Whether a request may be sent to the tier now"""
+        with self._lock:
+            entry = self._get(tier)
+            if entry['state'] == self.CLOSED:
+                return True
+            if entry['state'] == self.OPEN:
+                if time.time() - entry['opened_at'] < entry['cooldown']:
+                    return False
+                entry['state'] = self.HALF_OPEN
+                entry['trial_running'] = False
+            # Half-open: let one trial request through at a time
+            if entry['trial_running']:
+                return False
+            entry['trial_running'] = True
+            return True
+
+    def record(self, tier, success):
+        with self._lock:
+            entry = self._get(tier)
+            if success:
+                if entry['state'] != self.CLOSED:
+                    logger.info("Circuit for tier %s closed", tier)
+                entry.update(state=self.CLOSED, failures=0, opened_at=None,
+                             cooldown=self.cooldown, trial_running=False)
+                return
+
+            entry['failures'] += 1
+            if entry['state'] == self.HALF_OPEN:
+                # Trial failed: open again with a longer cooldown
+                entry['cooldown'] = min(entry['cooldown'] * 2, self.max_cooldown)
+                self._open(tier, entry)
+            elif entry['failures'] >= self.failure_threshold:
+                self._open(tier, entry)
+
+    def _open(self, tier, entry):
+        entry.update(state=self.OPEN, opened_at=time.time(), trial_running=False)
+        logger.warning("Circuit for tier %s opened for %ds after %d failures", tier, entry['cooldown'], entry['failures'])
+
+    def stats(self):
+        with self._lock:
+            return {
+                tier: {
+                    'state': entry['state'],
+                    'failures': entry['failures'],
+                    'cooldown': entry['cooldown'],
+                    'retry_in': max(0, round(entry['opened_at'] + entry['cooldown'] - time.time(), 1))
+                    if entry['state'] == self.OPEN else 0,
+                }
+                for tier, entry in self._state.items()
+            }
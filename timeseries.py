@@ -0,0 +1,225 @@
+"""Compact append-only storage for reel engagement snapshots.
+
+Each reel gets its own binary file of fixed-size records (timestamp plus the
+four engagement counters), so appends are a single write and range queries are
+a binary search over a memory-mapped file instead of a scan over JSON blobs.
+"""
+import bisect
+import csv
+import fcntl
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# File header: magic + format version, followed by packed records
+MAGIC = b'FBRTS\x00\x00\x01'
+# timestamp (unix seconds), num_comments, shares, likes, views
+RECORD = struct.Struct('<dqqqq')
+METRICS = ('num_comments', 'shares', 'likes', 'views')
+# Stored in place of a counter that was not observed in a snapshot
+MISSING = -1
+
+
+def has_engagement(reel_data):
+    """Whether a scrape result carries at least one engagement counter"""
+    return any(reel_data.get(metric) is not None for metric in METRICS)
+
+
+class _TimestampView:
+    """Sequence view over the timestamps of a mapped series, for bisect"""
+
+    def __init__(self, buf, count):
+        self.buf = buf
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return RECORD.unpack_from(self.buf, len(MAGIC) + i * RECORD.size)[0]
+
+
+class EngagementStore:
+    """Append-only time-series store with one record file per reel"""
+
+    def __init__(self, root='engagement_store'):
+        self.root = str(root)
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, reel_id):
+        reel_id = str(reel_id)
+        if not re.fullmatch(r'[0-9A-Za-z_-]+', reel_id):
+            raise ValueError(f"Invalid reel ID for engagement store: {reel_id!r}")
+        return os.path.join(self.root, f"{reel_id}.ts")
+
+    def append(self, reel_id, num_comments=None, shares=None, likes=None, views=None, timestamp=None):
+        """Append one snapshot; timestamps must not go backwards for a reel"""
+        path = self._path(reel_id)
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        values = [MISSING if v is None else int(v) for v in (num_comments, shares, likes, views)]
+
+        with self._lock:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                # Other processes (gunicorn workers) append to the same files
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                size = os.fstat(fd).st_size
+                if size < len(MAGIC):
+                    # New file, or one whose header write was interrupted
+                    os.ftruncate(fd, 0)
+                    os.pwrite(fd, MAGIC, 0)
+                    size = len(MAGIC)
+                elif os.pread(fd, len(MAGIC), 0) != MAGIC:
+                    raise ValueError(f"Not an engagement series file: {path}")
+                count = (size - len(MAGIC)) // RECORD.size
+                end = len(MAGIC) + count * RECORD.size
+                if size != end:
+                    # Drop a trailing partial record left by an interrupted append
+                    logger.warning("Truncating %d stray bytes from %s", size - end, path)
+                    os.ftruncate(fd, end)
+
+                if count:
+                    last_ts = RECORD.unpack(os.pread(fd, RECORD.size, end - RECORD.size))[0]
+                    if timestamp < last_ts:
+                        raise ValueError(f"Out-of-order snapshot for reel {reel_id}: {timestamp} < {last_ts}")
+                os.pwrite(fd, RECORD.pack(timestamp, *values), end)
+            finally:
+                os.close(fd)
+
+    def append_reel(self, reel_data, timestamp=None):
+        """Append the counters of a scraped reel_data dict (skipped when it carries none, e.g. a projection)"""
+        reel_id = reel_data.get('post_id')
+        if not reel_id:
+            logger.warning("Skipping engagement snapshot without post_id")
+            return False
+        if not has_engagement(reel_data):
+            logger.debug("Skipping engagement snapshot without counters for %s", reel_id)
+            return False
+        self.append(
+            reel_id,
+            num_comments=reel_data.get('num_comments'),
+            shares=reel_data.get('shares'),
+            likes=reel_data.get('likes'),
+            views=reel_data.get('views'),
+            timestamp=timestamp,
+        )
+        return True
+
+    def reels(self):
+        """List reel IDs that have at least one snapshot"""
+        return sorted(name[:-3] for name in os.listdir(self.root) if name.endswith('.ts'))
+
+    def _map(self, reel_id):
+        """Memory-map a reel's series, returning (mmap, record count) or (None, 0)"""
+        path = self._path(reel_id)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None, 0
+        if size <= len(MAGIC):
+            return None, 0
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mm[:len(MAGIC)] != MAGIC:
+            mm.close()
+            raise ValueError(f"Not an engagement series file: {path}")
+        # Ignore a trailing partial record left by an interrupted append
+        return mm, (size - len(MAGIC)) // RECORD.size
+
+    def range(self, reel_id, start=None, end=None, metric=None):
+        """Snapshots with start <= timestamp < end.
+
+        Returns dicts with every counter, or (timestamp, value) tuples when a
+        single metric is requested.
+        """
+        if metric is not None and metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}, expected one of {METRICS}")
+
+        mm, count = self._map(reel_id)
+        if mm is None:
+            return []
+        try:
+            timestamps = _TimestampView(mm, count)
+            lo = 0 if start is None else bisect.bisect_left(timestamps, start)
+            hi = count if end is None else bisect.bisect_left(timestamps, end)
+            if lo >= hi:
+                return []
+            chunk = mm[len(MAGIC) + lo * RECORD.size:len(MAGIC) + hi * RECORD.size]
+        finally:
+            mm.close()
+
+        if metric is not None:
+            idx = METRICS.index(metric) + 1
+            return [(rec[0], None if rec[idx] == MISSING else rec[idx]) for rec in RECORD.iter_unpack(chunk)]
+        return [self._to_dict(rec) for rec in RECORD.iter_unpack(chunk)]
+
+    def last_days(self, reel_id, days, metric=None):
+        """Snapshots from the last ``days`` days"""
+        return self.range(reel_id, start=time.time() - days * 86400, metric=metric)
+
+    def last(self, reel_id):
+        """Most recent snapshot for a reel, or None"""
+        mm, count = self._map(reel_id)
+        if mm is None:
+            return None
+        try:
+            if count == 0:
+                return None
+            return self._to_dict(RECORD.unpack_from(mm, len(MAGIC) + (count - 1) * RECORD.size))
+        finally:
+            mm.close()
+
+    @staticmethod
+    def _to_dict(rec):
+        snapshot = {'timestamp': rec[0]}
+        for name, value in zip(METRICS, rec[1:]):
+            snapshot[name] = None if value == MISSING else value
+        return snapshot
+
+    def _iter_rows(self, reel_ids=None, start=None, end=None):
+        for reel_id in reel_ids or self.reels():
+            for snapshot in self.range(reel_id, start=start, end=end):
+                yield reel_id, snapshot
+
+    def export_csv(self, path, reel_ids=None, start=None, end=None):
+        """Write snapshots as CSV rows (reel_id, timestamp, counters); returns row count"""
+        rows = 0
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('reel_id', 'timestamp') + METRICS)
+            for reel_id, snapshot in self._iter_rows(reel_ids, start, end):
+                writer.writerow([reel_id, snapshot['timestamp']] + [snapshot[m] for m in METRICS])
+                rows += 1
+        logger.info("Exported %d snapshots to %s", rows, path)
+        return rows
+
+    def export_parquet(self, path, reel_ids=None, start=None, end=None):
+        """Write snapshots to a Parquet file (requires pyarrow); returns row count"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+
+        columns = {'reel_id': [], 'timestamp': []}
+        columns.update({m: [] for m in METRICS})
+        for reel_id, snapshot in self._iter_rows(reel_ids, start, end):
+            columns['reel_id'].append(reel_id)
+            for name in ('timestamp',) + METRICS:
+                columns[name].append(snapshot[name])
+
+        table = pa.table({
+            'reel_id': pa.array(columns['reel_id'], pa.string()),
+            'timestamp': pa.array(columns['timestamp'], pa.float64()),
+            **{m: pa.array(columns[m], pa.int64()) for m in METRICS},
+        })
+        pq.write_table(table, path)
+        logger.info("Exported %d snapshots to %s", table.num_rows, path)
+        return table.num_rows
@@ -0,0 +1,193 @@
+"""Reel URL canonicalization and short-link resolution.
+
+Every known reel URL form is reduced to the numeric reel ID:
+
+- ``facebook.com/reel/<id>`` on any host variant (www., web., m., mbasic., fb.com)
+- ``facebook.com/watch/?v=<id>`` and ``video.php?v=<id>``
+- ``facebook.com/<page>/videos/<id>`` and ``/<page>/videos/<slug>/<id>``
+- ``l.facebook.com/l.php?u=...`` link-shim wrappers around any of the above
+
+Short links (``fb.watch/<code>``, ``facebook.com/share/r/<code>``) only
+redirect, so they are resolved with HEAD requests over a pooled session
+instead of a browser navigation. Resolutions are kept in a persistent
+SQLite cache.
+"""
+import concurrent.futures
+import logging
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qs, urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+CANONICAL_REEL_URL = 'https://web.facebook.com/reel/{}'
+
+FACEBOOK_HOST = re.compile(r'^(?:(?:www|web|m|mbasic|touch|mobile)\.)?(?:facebook|fb)\.com$')
+LINK_SHIM_HOST = re.compile(r'^(?:l|lm)\.facebook\.com$')
+SHORT_LINK_HOST = re.compile(r'^(?:www\.)?fb\.watch$')
+
+# Path patterns that carry the reel/video ID
+ID_PATHS = (
+    re.compile(r'^/reels?/(\d+)/?$'),
+    re.compile(r'^/[^/]+/videos/(?:[^/]+/)?(\d+)/?$'),
+    re.compile(r'^/videos/(\d+)/?$'),
+)
+# Paths that carry the ID in the 'v' query parameter
+ID_QUERY_PATHS = ('/watch', '/watch/', '/video.php', '/watch/live', '/watch/live/')
+# facebook.com paths that are redirect-only short links
+SHARE_PATH = re.compile(r'^/share/(?:r|v)/[^/]+/?$')
+
+
+def _parse(url):
+    url = url.strip()
+    if '://' not in url:
+        url = f"https://{url}"
+    return urlparse(url)
+
+
+def reel_id_from_url(url):
+    """Reel ID for any known reel URL form, or None (including for short links, which need resolve())"""
+    if not url:
+        return None
+    parsed = _parse(url)
+    host = (parsed.hostname or '').lower()
+
+    if LINK_SHIM_HOST.match(host):
+        target = parse_qs(parsed.query).get('u', [None])[0]
+        return reel_id_from_url(target) if target else None
+    if not FACEBOOK_HOST.match(host):
+        return None
+
+    path = parsed.path or '/'
+    for pattern in ID_PATHS:
+        match = pattern.match(path)
+        if match:
+            return match.group(1)
+    if path in ID_QUERY_PATHS:
+        video_id = parse_qs(parsed.query).get('v', [None])[0]
+        if video_id and video_id.isdigit():
+            return video_id
+    return None
+
+
+def is_short_link(url):
+    """Whether the URL is a redirect-only share link that resolve() can follow"""
+    if not url:
+        return False
+    parsed = _parse(url)
+    host = (parsed.hostname or '').lower()
+    return bool(SHORT_LINK_HOST.match(host) or (FACEBOOK_HOST.match(host) and SHARE_PATH.match(parsed.path or '')))
+
+
+def canonical_url(reel_id):
+    """The one URL used for a reel ID"""
+    return CANONICAL_REEL_URL.format(reel_id)
+
+
+class UrlResolver:
+    """Resolve short links to reel IDs with pooled HEAD requests and a persistent cache"""
+
+    def __init__(self, cache_path='url_cache.sqlite', session=None, pool_size=8, timeout=10,
+                 max_redirects=5, max_age=30 * 86400, db_timeout=5):
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        # Cached resolutions older than this are re-resolved
+        self.max_age = max_age
+        self.pool_size = pool_size
+        self.session = session or self._new_session(pool_size)
+        self._lock = threading.Lock()
+        # Other processes share the cache file: wait up to db_timeout seconds for their locks
+        self._db = sqlite3.connect(cache_path, check_same_thread=False, timeout=db_timeout)
+        self._db.execute(f'PRAGMA busy_timeout = {int(db_timeout * 1000)}')
+        with self._lock, self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS resolutions '
+                '(url TEXT PRIMARY KEY, reel_id TEXT NOT NULL, resolved_at REAL NOT NULL)'
+            )
+
+    @staticmethod
+    def _new_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                                         '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        return session
+
+    def cached(self, url):
+        try:
+            with self._lock:
+                row = self._db.execute('SELECT reel_id, resolved_at FROM resolutions WHERE url = ?', (url,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("URL cache lookup failed for %s: %s", url, e)
+            return None
+        if row and time.time() - row[1] < self.max_age:
+            return row[0]
+        return None
+
+    def _store(self, url, reel_id):
+        """Cache a resolution; a cache that cannot be written (e.g. locked) only costs a re-resolve later"""
+        try:
+            with self._lock, self._db:
+                self._db.execute('INSERT OR REPLACE INTO resolutions (url, reel_id, resolved_at) VALUES (?, ?, ?)',
+                                 (url, reel_id, time.time()))
+        except sqlite3.Error as e:
+            logger.warning("Failed to cache resolution of %s: %s", url, e)
+
+    def _follow(self, url, proxies=None):
+        """Follow redirects hop by hop until a URL with a reel ID shows up; returns the ID or None"""
+        current = url
+        for _ in range(self.max_redirects):
+            response = self.session.head(current, allow_redirects=False, timeout=self.timeout, proxies=proxies)
+            if response.status_code == 405:
+                # Some edges refuse HEAD; a streamed GET still stops at the headers
+                response = self.session.get(current, allow_redirects=False, timeout=self.timeout, stream=True,
+                                            proxies=proxies)
+                response.close()
+            location = response.headers.get('Location')
+            if not location:
+                return None
+            current = urljoin(current, location)
+            reel_id = reel_id_from_url(current)
+            if reel_id:
+                return reel_id
+        return None
+
+    def resolve(self, url, proxies=None):
+        """Reel ID for a URL of any supported form, following short links over HTTP when needed
+
+        ``proxies`` (requests format) routes the redirect hops, e.g. through the scrape's proxy.
+        """
+        reel_id = reel_id_from_url(url)
+        if reel_id or not is_short_link(url):
+            return reel_id
+        key = url.strip().split('#')[0]
+        reel_id = self.cached(key)
+        if reel_id:
+            return reel_id
+        try:
+            reel_id = self._follow(key if '://' in key else f"https://{key}", proxies)
+        except requests.RequestException as e:
+            logger.warning("Failed to resolve %s: %s", key, e)
+            return None
+        if reel_id:
+            self._store(key, reel_id)
+        else:
+            logger.warning("Short link %s did not redirect to a reel", key)
+        return reel_id
+
+    def resolve_many(self, urls, proxies=None):
+        """Resolve several URLs concurrently; returns {url: reel_id or None}"""
+        unique = list(dict.fromkeys(u for u in urls if u))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            return dict(zip(unique, executor.map(lambda u: self.resolve(u, proxies), unique)))
+
+    def close(self):
+        with self._lock:
+            self._db.close()